@@ -1,10 +1,13 @@
 # 客户端网络管理器
 import godot
-import json
 import asyncio
 import websockets
 from datetime import datetime
 from typing import Dict, Any, Optional, Callable
+from shared.utils.wire_codec import JSON_CODEC, SUPPORTED_ENCODINGS, FrameDecodeError, decode_frame, negotiate_codec
+
+# 菜谱书列表只需要的字段
+RECIPE_BOOK_FIELDS = ("id", "name", "category")
 
 class NetworkManager(godot.Node):
     """客户端网络管理器，处理与游戏服务器的通信"""
@@ -18,6 +21,11 @@ class NetworkManager(godot.Node):
         self.message_handlers = {}
         self.pending_requests = {}  # 存储待处理的请求 {request_id: callback}
         self.request_counter = 0
+        self.codec = JSON_CODEC  # 发送消息使用的编解码器，身份验证时与服务器协商
+        self.resource_cache = {}  # 带版本号的本地数据副本 {cache_key: {"version": 版本号, "data": 数据}}
+        self.pending_cache_keys = {}  # 条件获取请求对应的本地副本 {request_id: cache_key}
+        self.market_items = {}  # 订阅的市场商品 {item_id: item}
+        self.market_seq = None  # 最近应用的市场增量序号，未订阅时为None
         
         # 注册消息处理器
         self._register_message_handlers()
@@ -28,6 +36,7 @@ class NetworkManager(godot.Node):
             "player_data": self._handle_player_data,
             "recipe_data": self._handle_recipe_data,
             "market_data": self._handle_market_data,
+            "market_delta": self._handle_market_delta,
             "quest_data": self._handle_quest_data,
             "chat_message": self._handle_chat_message,
             "notification": self._handle_notification,
@@ -64,6 +73,8 @@ class NetworkManager(godot.Node):
             await self.websocket.close()
             self.is_connected = False
             self.websocket = None
+            self.codec = JSON_CODEC
+            self.market_seq = None
             godot.print("已断开与服务器的连接")
             
     async def _receive_messages(self):
@@ -78,7 +89,7 @@ class NetworkManager(godot.Node):
     async def _process_message(self, message):
         """处理接收到的消息"""
         try:
-            data = json.loads(message)
+            data = decode_frame(message)
             message_type = data.get("type")
             message_data = data.get("data")
             request_id = data.get("request_id")
@@ -86,11 +97,11 @@ class NetworkManager(godot.Node):
             # 如果是响应消息，处理待处理的请求
             if request_id and request_id in self.pending_requests:
                 callback = self.pending_requests.pop(request_id)
+                cache_key = self.pending_cache_keys.pop(request_id, None)
+                if cache_key:
+                    message_data = self._resolve_versioned(cache_key, message_type, message_data, data.get("version"))
                 if callback:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(message_data)
-                    else:
-                        callback(message_data)
+                    await self._invoke_callback(callback, message_data)
                 return
                 
             # 处理普通消息
@@ -103,23 +114,55 @@ class NetworkManager(godot.Node):
             else:
                 godot.print(f"未知消息类型: {message_type}")
                 
-        except json.JSONDecodeError:
-            godot.print("解析消息失败: 无效的JSON格式")
+        except FrameDecodeError as e:
+            godot.print(f"解析消息失败: {e}")
         except Exception as e:
             godot.print(f"处理消息时出错: {e}")
             
-    async def send_message(self, message_type, data=None, callback=None):
-        """发送消息到服务器"""
+    async def _invoke_callback(self, callback, data):
+        """调用回调（兼容同步和异步回调）"""
+        if asyncio.iscoroutinefunction(callback):
+            await callback(data)
+        else:
+            callback(data)
+            
+    def _with_if_version(self, cache_key, data):
+        """为条件获取请求附加本地副本的版本号"""
+        cached = self.resource_cache.get(cache_key)
+        if not cached:
+            return data
+        return dict(data or {}, if_version=cached["version"])
+        
+    def _resolve_versioned(self, cache_key, message_type, message_data, version):
+        """
+        处理条件获取的响应
+        not_modified时返回本地副本，带版本号的完整响应则更新本地副本
+        """
+        if message_type == "not_modified":
+            cached = self.resource_cache.get(cache_key)
+            return cached["data"] if cached else None
+        if version is not None and message_type != "error":
+            self.resource_cache[cache_key] = {"version": version, "data": message_data}
+        return message_data
+        
+    async def send_message(self, message_type, data=None, callback=None, cache_key=None):
+        """
+        发送消息到服务器
+        :param cache_key: 本地副本的键，指定时请求携带if_version，服务器未修改时回调收到本地副本
+        """
         if not self.is_connected:
             godot.print("未连接到服务器")
             return False
             
         try:
             request_id = None
-            if callback:
+            if callback or cache_key:
                 self.request_counter += 1
                 request_id = self.request_counter
                 self.pending_requests[request_id] = callback
+                if cache_key:
+                    self.pending_cache_keys[request_id] = cache_key
+                    data = self._with_if_version(cache_key, data)
                 
             message = {
                 "type": message_type,
@@ -128,24 +171,87 @@ class NetworkManager(godot.Node):
                 "timestamp": datetime.now().isoformat()
             }
             
-            await self.websocket.send(json.dumps(message))
+            await self.websocket.send(self.codec.encode(message))
             return True
         except Exception as e:
             godot.print(f"发送消息失败: {e}")
             return False
             
+    async def send_batch(self, requests, callback=None):
+        """
+        把多个请求合并为一个batch消息发送，服务器并发处理后在一个响应帧中返回所有结果
+        :param requests: 子请求列表，每项为 {"type": 消息类型, "data": 消息数据, "callback": 可选的单项回调,
+                         "cache_key": 可选的本地副本键}
+        :param callback: 整个批次完成后的回调，参数为结果列表
+        """
+        batch_requests = []
+        item_callbacks = {}
+        item_cache_keys = {}
+        for index, request in enumerate(requests):
+            item_data = request.get("data") or {}
+            if request.get("cache_key"):
+                item_cache_keys[index] = request["cache_key"]
+                item_data = self._with_if_version(request["cache_key"], item_data)
+            batch_requests.append({
+                "type": request["type"],
+                "data": item_data,
+                "request_id": index
+            })
+            if request.get("callback"):
+                item_callbacks[index] = request["callback"]
+                
+        async def batch_callback(response):
+            results = (response or {}).get("results", [])
+            for result in results:
+                if result.get("type") == "error":
+                    await self._handle_error(result.get("data") or {})
+                    continue
+                cache_key = item_cache_keys.get(result.get("index"))
+                if cache_key:
+                    result["data"] = self._resolve_versioned(
+                        cache_key, result.get("type"), result.get("data"), result.get("version")
+                    )
+                item_callback = item_callbacks.get(result.get("index"))
+                if item_callback:
+                    await self._invoke_callback(item_callback, result.get("data"))
+                    
+            if callback:
+                await self._invoke_callback(callback, results)
+                
+        return await self.send_message("batch", {"requests": batch_requests}, batch_callback)
+        
+    async def load_scene_data(self, player_id=None, leaderboard_category="level"):
+        """场景加载时一次性获取玩家、菜谱、市场、任务和排行榜数据（一次往返）"""
+        target_player_id = player_id if player_id else self.player_id
+        
+        def print_callback(label):
+            def callback(response):
+                godot.print(f"收到{label}: {response}")
+            return callback
+            
+        return await self.send_batch([
+            {"type": "get_player_data", "data": {"player_id": target_player_id}, "callback": print_callback("玩家数据"),
+             "cache_key": f"player_data:{target_player_id}"},
+            {"type": "get_recipe_list", "data": {}, "callback": print_callback("菜谱列表"), "cache_key": "recipes"},
+            {"type": "get_market_data", "data": {}, "callback": print_callback("市场数据")},
+            {"type": "get_quest_list", "data": {"player_id": target_player_id}, "callback": print_callback("任务列表")},
+            {"type": "get_leaderboard", "data": {"category": leaderboard_category}, "callback": print_callback("排行榜数据")}
+        ])
+        
     async def authenticate_player(self, player_id, auth_token):
         """玩家身份验证"""
         async def auth_callback(response):
             if response.get("success"):
                 self.player_id = player_id
-                godot.print(f"玩家 {player_id} 身份验证成功")
+                self.codec = negotiate_codec([response.get("encoding")])
+                godot.print(f"玩家 {player_id} 身份验证成功，消息编码: {self.codec.name}")
             else:
                 godot.print(f"身份验证失败: {response.get('error')}")
                 
         await self.send_message("authenticate", {
             "player_id": player_id,
-            "auth_token": auth_token
+            "auth_token": auth_token,
+            "encodings": SUPPORTED_ENCODINGS
         }, auth_callback)
         
     async def get_player_data(self, player_id=None):
@@ -161,21 +267,50 @@ class NetworkManager(godot.Node):
             
         await self.send_message("get_player_data", {
             "player_id": target_player_id
-        }, player_data_callback)
+        }, player_data_callback, cache_key=f"player_data:{target_player_id}")
         
     async def update_player_data(self, player_data):
         """更新玩家数据"""
+        player_id = self.player_id
+        
+        async def update_callback(response):
+            # 更新成功后把服务端保存后的文档作为最新的本地副本（DAO保存时可能补充字段）
+            response = response or {}
+            if response.get("version") and "data" in response:
+                self.resource_cache[f"player_data:{player_id}"] = {"version": response["version"], "data": response["data"]}
+                
         await self.send_message("update_player_data", {
-            "player_id": self.player_id,
+            "player_id": player_id,
             "data": player_data
-        })
+        }, update_callback)
         
     async def get_recipe_list(self):
         """获取菜谱列表"""
         async def recipe_list_callback(response):
             godot.print(f"收到菜谱列表: {response}")
             
-        await self.send_message("get_recipe_list", {}, recipe_list_callback)
+        await self.send_message("get_recipe_list", {}, recipe_list_callback, cache_key="recipes")
+        
+    async def get_recipe_page(self, callback=None, cursor=None, limit=50, fields=RECIPE_BOOK_FIELDS, **filters):
+        """
+        分页获取菜谱列表，只返回指定字段
+        :param cursor: 上一页响应中的next_cursor，为None时从第一页开始
+        :param filters: 服务端过滤条件，如category、difficulty、min_level、max_level
+        :return: 回调收到 {"items": [...], "next_cursor": ..., "total": ..., "version": ...}
+        """
+        data = dict(filters, limit=limit)
+        if fields:
+            data["fields"] = list(fields)
+        if cursor:
+            data["cursor"] = cursor
+        await self.send_message("get_recipe_list", data, callback)
+        
+    async def get_ingredients(self):
+        """获取食材列表"""
+        async def ingredients_callback(response):
+            godot.print(f"收到食材列表: {response}")
+            
+        await self.send_message("get_ingredients", {}, ingredients_callback, cache_key="ingredients")
         
     async def get_market_data(self):
         """获取市场数据"""
@@ -184,6 +319,21 @@ class NetworkManager(godot.Node):
             
         await self.send_message("get_market_data", {}, market_data_callback)
         
+    async def subscribe_market(self):
+        """订阅市场价格推送（先收到快照，之后只收到价格或趋势变化的商品）"""
+        def market_snapshot_callback(response):
+            snapshot = response or {}
+            self.market_items = {item["id"]: item for item in snapshot.get("items", [])}
+            self.market_seq = snapshot.get("seq", 0)
+            godot.print(f"收到市场快照: {len(self.market_items)}个商品")
+            
+        await self.send_message("subscribe_market", {}, market_snapshot_callback)
+        
+    async def unsubscribe_market(self):
+        """取消订阅市场价格推送"""
+        self.market_seq = None
+        await self.send_message("unsubscribe_market", {})
+        
     async def get_quest_list(self, player_id=None):
         """获取任务列表"""
         target_player_id = player_id if player_id else self.player_id
@@ -193,7 +343,7 @@ class NetworkManager(godot.Node):
             
         await self.send_message("get_quest_list", {
             "player_id": target_player_id
-        }, quest_list_callback)
+        }, quest_list_callback, cache_key="quests")
         
     async def accept_quest(self, quest_id):
         """接受任务"""
@@ -209,12 +359,34 @@ class NetworkManager(godot.Node):
             "quest_id": quest_id
         })
         
-    async def send_chat_message(self, message, channel="global"):
-        """发送聊天消息"""
+    async def send_chat_message(self, message, channel="global", channel_id=None, target_id=None):
+        """
+        发送聊天消息
+        :param message: 消息内容
+        :param channel: 频道（global/guild/friends/whisper）
+        :param channel_id: 公会频道的公会ID
+        :param target_id: 私聊对象的玩家ID
+        """
         await self.send_message("chat_message", {
             "player_id": self.player_id,
             "message": message,
-            "channel": channel
+            "channel": channel,
+            "channel_id": channel_id,
+            "target_id": target_id
+        })
+        
+    async def join_chat_channel(self, channel, channel_id):
+        """订阅所属公会的频道或自己的好友频道（好友频道的channel_id为自己的玩家ID，接收各好友发送的好友消息）"""
+        await self.send_message("join_chat_channel", {
+            "channel": channel,
+            "channel_id": channel_id
+        })
+        
+    async def leave_chat_channel(self, channel, channel_id):
+        """取消订阅公会频道或好友动态"""
+        await self.send_message("leave_chat_channel", {
+            "channel": channel,
+            "channel_id": channel_id
         })
         
     async def get_leaderboard(self, category="level"):
@@ -313,6 +485,27 @@ class NetworkManager(godot.Node):
         godot.print(f"处理玩家数据: {data}")
         # 这里应该更新本地玩家数据
         
+    async def _handle_market_delta(self, data):
+        """处理市场价格增量推送"""
+        if self.market_seq is None:
+            return
+            
+        seq = data.get("seq")
+        if seq <= self.market_seq:
+            return
+        if seq != self.market_seq + 1:
+            # 有增量被丢弃（例如发送队列溢出），重新订阅获取快照
+            godot.print(f"市场增量序号不连续 ({self.market_seq} -> {seq})，重新订阅")
+            self.market_seq = None
+            await self.subscribe_market()
+            return
+            
+        for item in data.get("items", []):
+            self.market_items.setdefault(item["id"], {}).update(item)
+        for item_id in data.get("removed", []):
+            self.market_items.pop(item_id, None)
+        self.market_seq = seq
+        
     async def _handle_recipe_data(self, data):
         """处理菜谱数据消息"""
         godot.print(f"处理菜谱数据: {data}")
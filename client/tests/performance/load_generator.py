@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+游戏服务器压力测试工具
+使用asyncio模拟大量WebSocket客户端，按配置的消息比例向GameServer发送请求，
+统计每种消息类型的吞吐量、p50/p95/p99延迟以及事件循环延迟，并把结果写入JSON文件
+
+用法:
+    python client/tests/performance/load_generator.py --clients 2000 --duration 30 --output load_result.json
+    python client/tests/performance/load_generator.py --url ws://localhost:8765 --mix get_recipe_list=3,buy_item=1
+
+未指定--url时在本进程内启动GameServer，此时事件循环延迟同时反映服务器和模拟客户端的负载；
+本地服务器按当前工作目录查找assets/config下的目录文件，请在client目录下运行
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+# 添加项目路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(ROOT_DIR)
+
+import websockets
+from server.utils.metrics import LatencyHistogram, OperationMetrics
+from shared.utils.wire_codec import CODECS, JSON_CODEC, decode_frame
+
+# 默认消息比例 {消息类型: 权重}
+DEFAULT_MESSAGE_MIX = {
+    "get_recipe_list": 3,
+    "get_quest_list": 2,
+    "get_player_data": 2,
+    "buy_item": 2,
+    "sell_item": 1,
+    "chat_message": 2,
+    "craft_dish": 1
+}
+
+# 压测使用更细的延迟分桶（毫秒），便于比较不同版本的结果
+LOAD_TEST_BUCKETS_MS = [
+    0.1, 0.2, 0.5, 1, 1.5, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75,
+    100, 150, 200, 300, 500, 750, 1000, 2000, 5000, 10000
+]
+
+def parse_message_mix(text: str) -> Dict[str, float]:
+    """解析消息比例参数，格式为 type=weight,type=weight"""
+    mix = {}
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        message_type, _, weight = part.partition("=")
+        mix[message_type.strip()] = float(weight) if weight else 1.0
+    return mix
+
+def build_request_data(message_type: str, player_id: str, peer_id: str, rng: random.Random) -> Dict[str, Any]:
+    """为指定消息类型生成请求数据"""
+    if message_type in ("buy_item", "sell_item"):
+        return {"player_id": player_id, "item_id": rng.randint(1, 10), "quantity": rng.randint(1, 5)}
+    if message_type == "craft_dish":
+        return {"player_id": player_id, "recipe_id": rng.randint(1, 10), "quantity": 1}
+    if message_type == "chat_message":
+        # 默认发送私聊，避免全局频道的O(N)广播淹没其他消息
+        return {"player_id": player_id, "message": "压测消息", "channel": "whisper", "target_id": peer_id}
+    if message_type == "taste_dish":
+        return {"player_id": player_id, "dish_id": rng.randint(1, 10)}
+    return {"player_id": player_id}
+
+class EventLoopLagMonitor:
+    """事件循环延迟监视器，定期休眠并记录实际唤醒时间超出预期的部分"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.histogram = LatencyHistogram(LOAD_TEST_BUCKETS_MS)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """开始监视"""
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """停止监视"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        """监视循环"""
+        loop = asyncio.get_event_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.histogram.observe(max(0.0, loop.time() - expected) * 1000)
+
+class SimulatedClient:
+    """模拟客户端，每次发送一个请求并等待响应（闭环负载）"""
+
+    def __init__(self, index: int, generator: "LoadGenerator"):
+        self.index = index
+        self.generator = generator
+        self.player_id = f"load_{index}"
+        self.rng = random.Random(generator.seed * 100003 + index if generator.seed is not None else None)
+        self.websocket = None
+        self.codec = JSON_CODEC
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.request_counter = 0
+        self.pushes_received = 0
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> bool:
+        """建立连接并完成身份验证"""
+        metrics = self.generator.metrics
+        start_time = time.perf_counter()
+        try:
+            self.websocket = await websockets.connect(
+                self.generator.url, ping_interval=None, max_queue=None, open_timeout=self.generator.request_timeout
+            )
+        except Exception:
+            metrics.record("connect", (time.perf_counter() - start_time) * 1000, error=True)
+            return False
+        metrics.record("connect", (time.perf_counter() - start_time) * 1000)
+        self._reader_task = asyncio.ensure_future(self._read_messages())
+
+        response = await self.request("authenticate", {
+            "player_id": self.player_id,
+            "auth_token": "load_test",
+            "encodings": [self.generator.encoding]
+        })
+        if not response or response.get("type") == "error":
+            return False
+        self.codec = CODECS.get((response.get("data") or {}).get("encoding"), JSON_CODEC)
+        return True
+
+    async def run(self, deadline: float):
+        """在截止时间前按消息比例持续发送请求"""
+        message_types = self.generator.message_types
+        weights = self.generator.message_weights
+        while time.perf_counter() < deadline and self.websocket is not None:
+            message_type = self.rng.choices(message_types, weights)[0]
+            peer_id = f"load_{self.rng.randrange(self.generator.clients)}"
+            await self.request(message_type, build_request_data(message_type, self.player_id, peer_id, self.rng))
+            if self.generator.think_time > 0:
+                await asyncio.sleep(self.rng.uniform(0, 2 * self.generator.think_time))
+
+    async def request(self, message_type: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """发送请求并等待对应request_id的响应，记录延迟"""
+        self.request_counter += 1
+        request_id = self.request_counter
+        future = asyncio.get_event_loop().create_future()
+        self.pending[request_id] = future
+        message = {
+            "type": message_type,
+            "data": data,
+            "request_id": request_id,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        start_time = time.perf_counter()
+        response = None
+        try:
+            await self.websocket.send(self.codec.encode(message))
+            response = await asyncio.wait_for(future, self.generator.request_timeout)
+        except Exception:
+            pass
+        finally:
+            self.pending.pop(request_id, None)
+
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        error = response is None or response.get("type") == "error"
+        self.generator.metrics.record(message_type, elapsed_ms, error)
+        return response
+
+    async def _read_messages(self):
+        """接收消息，把响应交给等待中的请求"""
+        try:
+            async for frame in self.websocket:
+                message = decode_frame(frame)
+                future = self.pending.get(message.get("request_id"))
+                if future is not None and not future.done():
+                    future.set_result(message)
+                else:
+                    self.pushes_received += 1
+        except Exception:
+            pass
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.cancel()
+
+    async def close(self):
+        """关闭连接"""
+        if self.websocket is not None:
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+            self.websocket = None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+
+class LoadGenerator:
+    """压力测试执行器"""
+
+    def __init__(self, url: Optional[str] = None, clients: int = 100, duration: float = 10.0,
+                 message_mix: Optional[Dict[str, float]] = None, encoding: str = "json",
+                 think_time: float = 0.0, connect_concurrency: int = 200, request_timeout: float = 10.0,
+                 seed: Optional[int] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        :param url: 目标服务器地址，为空时在本进程内启动GameServer
+        :param clients: 模拟客户端数量
+        :param duration: 发送请求的持续时间（秒，不含建立连接的时间）
+        :param message_mix: 消息比例 {消息类型: 权重}
+        :param encoding: 声明使用的消息编码（json或compact）
+        :param think_time: 每个客户端两次请求之间的平均间隔（秒）
+        :param connect_concurrency: 同时建立连接的最大数量
+        :param request_timeout: 单个请求的超时时间（秒）
+        :param seed: 随机种子，指定后消息序列可复现
+        :param host: 本地服务器监听地址
+        :param port: 本地服务器端口，为0时自动选择空闲端口
+        """
+        self.url = url
+        self.clients = clients
+        self.duration = duration
+        self.message_mix = dict(message_mix or DEFAULT_MESSAGE_MIX)
+        self.message_types = list(self.message_mix)
+        self.message_weights = [self.message_mix[message_type] for message_type in self.message_types]
+        self.encoding = encoding
+        self.think_time = think_time
+        self.connect_concurrency = connect_concurrency
+        self.request_timeout = request_timeout
+        self.seed = seed
+        self.host = host
+        self.port = port
+        self.metrics = OperationMetrics(LOAD_TEST_BUCKETS_MS)
+        self.lag_monitor = EventLoopLagMonitor()
+        self.game_server = None
+        self._ws_server = None
+
+    async def start_local_server(self):
+        """在本进程内启动GameServer"""
+        from server.backend.server import GameServer
+        self.game_server = GameServer(self.host, self.port)
+        self._ws_server = await websockets.serve(self.game_server.handle_client, self.host, self.port)
+        port = self._ws_server.sockets[0].getsockname()[1]
+        self.url = f"ws://{self.host}:{port}"
+
+    async def stop_local_server(self):
+        """关闭本地GameServer"""
+        if self._ws_server is not None:
+            self._ws_server.close()
+            await self._ws_server.wait_closed()
+            self._ws_server = None
+
+    async def run(self) -> Dict[str, Any]:
+        """执行压力测试，返回结果"""
+        started_at = datetime.now().isoformat()
+        local_server = self.url is None
+        if local_server:
+            await self.start_local_server()
+        self.lag_monitor.start()
+
+        # 限制同时建立连接的数量，避免连接风暴
+        connect_semaphore = asyncio.Semaphore(self.connect_concurrency)
+        simulated_clients = [SimulatedClient(index, self) for index in range(self.clients)]
+
+        async def connect(client):
+            async with connect_semaphore:
+                return await client.connect()
+
+        connect_start = time.perf_counter()
+        connected = await asyncio.gather(*(connect(client) for client in simulated_clients))
+        connect_seconds = time.perf_counter() - connect_start
+        active_clients = [client for client, ok in zip(simulated_clients, connected) if ok]
+
+        # 只统计负载阶段的请求
+        setup_counts = {name: histogram.count for name, histogram in self.metrics.histograms.items()}
+        load_start = time.perf_counter()
+        deadline = load_start + self.duration
+        await asyncio.gather(*(client.run(deadline) for client in active_clients))
+        load_seconds = time.perf_counter() - load_start
+
+        await asyncio.gather(*(client.close() for client in simulated_clients))
+        await self.lag_monitor.stop()
+
+        server_stats = None
+        if local_server:
+            server_stats = {
+                "message_stats": self.game_server.get_message_stats(),
+                "send_queues": self.game_server.get_send_queue_stats()
+            }
+            await self.stop_local_server()
+
+        return self._build_results(started_at, connect_seconds, load_seconds, len(active_clients),
+                                   setup_counts, sum(client.pushes_received for client in simulated_clients),
+                                   server_stats)
+
+    def _build_results(self, started_at: str, connect_seconds: float, load_seconds: float, connected: int,
+                       setup_counts: Dict[str, int], pushes_received: int,
+                       server_stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """整理测试结果"""
+        per_type = {}
+        total_requests = 0
+        for name, stats in self.metrics.snapshot().items():
+            if name not in ("connect", "authenticate"):
+                requests = stats["count"] - setup_counts.get(name, 0)
+                stats["throughput_rps"] = requests / load_seconds if load_seconds > 0 else 0.0
+                total_requests += requests
+            per_type[name] = stats
+
+        return {
+            "started_at": started_at,
+            "config": {
+                "url": self.url,
+                "clients": self.clients,
+                "duration": self.duration,
+                "message_mix": self.message_mix,
+                "encoding": self.encoding,
+                "think_time": self.think_time,
+                "connect_concurrency": self.connect_concurrency,
+                "request_timeout": self.request_timeout,
+                "seed": self.seed
+            },
+            "connected_clients": connected,
+            "connect_seconds": connect_seconds,
+            "load_seconds": load_seconds,
+            "total_requests": total_requests,
+            "throughput_rps": total_requests / load_seconds if load_seconds > 0 else 0.0,
+            "pushes_received": pushes_received,
+            "per_type": per_type,
+            "event_loop_lag": self.lag_monitor.histogram.to_dict(),
+            "server": server_stats
+        }
+
+def write_results(results: Dict[str, Any], output_path: str):
+    """把测试结果写入JSON文件"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+def print_summary(results: Dict[str, Any]):
+    """打印测试结果摘要"""
+    print(f"客户端: {results['connected_clients']}/{results['config']['clients']}  "
+          f"建立连接: {results['connect_seconds']:.2f}s  负载阶段: {results['load_seconds']:.2f}s")
+    print(f"总请求数: {results['total_requests']}  吞吐量: {results['throughput_rps']:.1f} req/s  "
+          f"推送消息: {results['pushes_received']}")
+    print(f"{'消息类型':<20}{'请求数':>10}{'错误':>8}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, stats in sorted(results["per_type"].items()):
+        print(f"{name:<20}{stats['count']:>10}{stats['errors']:>8}{stats.get('throughput_rps', 0.0):>10.1f}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+    lag = results["event_loop_lag"]
+    print(f"事件循环延迟(ms): p50={lag['p50_ms']:.2f} p95={lag['p95_ms']:.2f} p99={lag['p99_ms']:.2f} "
+          f"max={lag['max_ms']:.2f}")
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="GameServer压力测试")
+    parser.add_argument("--url", help="目标服务器地址，不指定时在本进程内启动GameServer")
+    parser.add_argument("--clients", type=int, default=100, help="模拟客户端数量")
+    parser.add_argument("--duration", type=float, default=10.0, help="负载持续时间（秒）")
+    parser.add_argument("--mix", help="消息比例，格式为 type=weight,type=weight")
+    parser.add_argument("--encoding", default="json", choices=sorted(CODECS), help="消息编码")
+    parser.add_argument("--think-time", type=float, default=0.0, help="两次请求之间的平均间隔（秒）")
+    parser.add_argument("--connect-concurrency", type=int, default=200, help="同时建立连接的最大数量")
+    parser.add_argument("--timeout", type=float, default=10.0, help="请求超时时间（秒）")
+    parser.add_argument("--seed", type=int, help="随机种子")
+    parser.add_argument("--output", default="load_test_result.json", help="结果JSON文件路径")
+    args = parser.parse_args(argv)
+
+    generator = LoadGenerator(
+        url=args.url,
+        clients=args.clients,
+        duration=args.duration,
+        message_mix=parse_message_mix(args.mix) if args.mix else None,
+        encoding=args.encoding,
+        think_time=args.think_time,
+        connect_concurrency=args.connect_concurrency,
+        request_timeout=args.timeout,
+        seed=args.seed
+    )
+    results = asyncio.run(generator.run())
+    print_summary(results)
+    write_results(results, args.output)
+    print(f"结果已写入: {args.output}")
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+REST API事件循环延迟测试
+模拟慢速文件系统（每次open额外耗时），并发调用RESTfulAPIManager的处理器，
+检查事件循环延迟始终低于阈值，即处理器没有在事件循环线程上访问文件系统
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import builtins
+import tempfile
+import unittest
+from unittest import mock
+
+# 添加项目路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(ROOT_DIR)
+
+from server.backend import dao
+from server.backend.api import RESTfulAPIManager
+
+# 模拟的单次文件打开耗时（秒）
+SLOW_OPEN_SECONDS = 0.02
+# 允许的最大事件循环延迟（毫秒）
+MAX_LOOP_LAG_MS = 100
+
+class TestRESTAPILoopLag(unittest.TestCase):
+    """REST API事件循环延迟测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_dirs = {}
+        for name in ("player_dao", "recipe_dao", "quest_dao"):
+            dao_instance = getattr(dao, name)
+            self.original_dirs[name] = dao_instance.data_dir
+            dao_instance.data_dir = self.temp_dir.name
+            
+        with open(os.path.join(self.temp_dir.name, "recipes.json"), 'w', encoding='utf-8') as f:
+            json.dump([{"id": i, "name": f"菜谱{i}"} for i in range(50)], f, ensure_ascii=False)
+        with open(os.path.join(self.temp_dir.name, "main_quests.json"), 'w', encoding='utf-8') as f:
+            json.dump([{"id": f"quest_{i}", "name": f"任务{i}"} for i in range(20)], f, ensure_ascii=False)
+        for i in range(20):
+            with open(os.path.join(self.temp_dir.name, f"player_{i}.json"), 'w', encoding='utf-8') as f:
+                json.dump({"id": str(i), "level": i, "gold": 100 * i}, f)
+                
+        self.api_manager = RESTfulAPIManager()
+        
+    def tearDown(self):
+        """测试后清理"""
+        for name, data_dir in self.original_dirs.items():
+            getattr(dao, name).data_dir = data_dir
+        self.temp_dir.cleanup()
+        
+    def test_concurrent_requests_do_not_block_loop(self):
+        """测试并发请求时事件循环延迟低于阈值"""
+        original_open = builtins.open
+        
+        def slow_open(*args, **kwargs):
+            # 模拟慢速磁盘：在事件循环线程上调用会直接造成延迟
+            time.sleep(SLOW_OPEN_SECONDS)
+            return original_open(*args, **kwargs)
+            
+        async def run():
+            loop = asyncio.get_event_loop()
+            max_lag_ms = 0.0
+            stop = False
+            
+            async def monitor():
+                nonlocal max_lag_ms
+                while not stop:
+                    expected = loop.time() + 0.005
+                    await asyncio.sleep(0.005)
+                    max_lag_ms = max(max_lag_ms, (loop.time() - expected) * 1000)
+                    
+            monitor_task = asyncio.ensure_future(monitor())
+            handle = self.api_manager.api_interface.handle_request
+            requests = []
+            for i in range(20):
+                requests.append(handle("GET", f"/players/{i}"))
+                requests.append(handle("PUT", f"/players/new_{i}", {"id": f"new_{i}", "level": 1}))
+                requests.append(handle("GET", "/recipes"))
+                requests.append(handle("GET", f"/quests/quest_{i}"))
+            results = await asyncio.gather(*requests)
+            stop = True
+            await monitor_task
+            return results, max_lag_ms
+            
+        with mock.patch("builtins.open", slow_open):
+            results, max_lag_ms = asyncio.run(run())
+            
+        for result in results:
+            self.assertNotIn("error", result if isinstance(result, dict) else {})
+        print(f"\n最大事件循环延迟: {max_lag_ms:.2f}ms")
+        self.assertLess(max_lag_ms, MAX_LOOP_LAG_MS)
+
+if __name__ == '__main__':
+    unittest.main()
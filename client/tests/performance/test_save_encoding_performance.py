@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+存档编码性能测试
+用合成的大型玩家存档比较各种存档编码的文件大小、编码耗时和解码耗时
+"""
+
+import sys
+import os
+import time
+import unittest
+
+# 添加项目路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from server.utils.save_codec import SAVE_ENCODINGS, SAVE_JSON, SAVE_COMPACT, encode_save, decode_save
+
+def make_large_player(index):
+    """生成一份大型玩家存档（背包、任务、菜谱和经营记录都很长）"""
+    return {
+        "id": f"player_{index}",
+        "name": f"玩家{index}",
+        "level": index % 50 + 1,
+        "experience": index * 37,
+        "currency": 1000 + index,
+        "inventory": [
+            {"item_id": 100 + i, "name": f"食材{i}", "quantity": i % 30 + 1, "quality": "fresh", "expires_in": 3600 + i}
+            for i in range(500)
+        ],
+        "active_quests": [{"id": f"mq_{i:03d}", "status": "active", "progress": i * 3 % 100} for i in range(40)],
+        "completed_quests": [f"mq_{i:03d}" for i in range(200)],
+        "unlocked_recipes": list(range(1, 301)),
+        "daily_records": [
+            {"day": day, "customers": 50 + day % 20, "revenue": 1234.5 + day, "reputation": 50 + day % 10}
+            for day in range(180)
+        ]
+    }
+
+class TestSaveEncodingPerformance(unittest.TestCase):
+    """存档编码性能测试类"""
+    
+    PLAYERS = 20
+    
+    def setUp(self):
+        """测试前准备"""
+        self.players = [make_large_player(i) for i in range(self.PLAYERS)]
+        
+    def _measure(self, encoding):
+        start_time = time.perf_counter()
+        payloads = [encode_save(player, encoding) for player in self.players]
+        encode_ms = (time.perf_counter() - start_time) * 1000 / self.PLAYERS
+        start_time = time.perf_counter()
+        decoded = [decode_save(payload) for payload in payloads]
+        decode_ms = (time.perf_counter() - start_time) * 1000 / self.PLAYERS
+        size = sum(len(payload) for payload in payloads) / self.PLAYERS
+        return {"size": size, "encode_ms": encode_ms, "decode_ms": decode_ms, "decoded": decoded}
+        
+    def test_encodings_side_by_side(self):
+        """对比各种存档编码"""
+        results = {encoding: self._measure(encoding) for encoding in SAVE_ENCODINGS}
+        
+        baseline = results[SAVE_JSON]["size"]
+        print()
+        print(f"{'encoding':<10}{'avg bytes':>12}{'ratio':>8}{'encode ms':>11}{'decode ms':>11}")
+        for encoding, stats in results.items():
+            print(f"{encoding:<10}{stats['size']:>12.0f}{stats['size'] / baseline:>8.2f}"
+                  f"{stats['encode_ms']:>11.2f}{stats['decode_ms']:>11.2f}")
+            
+        for stats in results.values():
+            self.assertEqual(stats["decoded"], self.players)
+        self.assertLess(results[SAVE_COMPACT]["size"], baseline)
+        for encoding in SAVE_ENCODINGS[2:]:
+            self.assertLess(results[encoding]["size"], results[SAVE_COMPACT]["size"])
+
+if __name__ == '__main__':
+    unittest.main()
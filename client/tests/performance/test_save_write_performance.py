@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+存档写入性能测试
+在同一块磁盘上比较每次写入单独fsync与组提交的写入吞吐量（writes/sec）
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from server.utils.atomic_write import GroupCommitWriter, atomic_write_json
+
+def make_player(index):
+    """生成一份典型的玩家存档"""
+    return {
+        "id": f"player_{index}",
+        "name": f"玩家{index}",
+        "level": index % 50 + 1,
+        "experience": index * 37,
+        "currency": 1000 + index,
+        "inventory": [{"item_id": 100 + i, "quantity": i + 1} for i in range(20)],
+        "active_quests": [{"id": f"mq_00{i}", "status": "active", "progress": i * 10} for i in range(3)]
+    }
+
+class TestSaveWritePerformance(unittest.TestCase):
+    """存档写入性能测试类"""
+    
+    PLAYERS = 64  # 同时保存的玩家数
+    ROUNDS = 5  # 每个玩家保存的次数
+    
+    def setUp(self):
+        """测试前准备（临时目录与存档目录在同一块磁盘上）"""
+        self.temp_dir = tempfile.TemporaryDirectory(dir=os.path.join(PROJECT_ROOT, "server"))
+        self.players = [make_player(i) for i in range(self.PLAYERS)]
+        
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+        
+    def _path(self, mode, index):
+        return os.path.join(self.temp_dir.name, f"{mode}_player_{index}.json")
+        
+    async def _run_per_write_fsync(self):
+        """每次写入在executor中单独完成写临时文件、fsync和rename"""
+        loop = asyncio.get_event_loop()
+        for _ in range(self.ROUNDS):
+            await asyncio.gather(*(
+                loop.run_in_executor(None, atomic_write_json, self._path("fsync", i), player)
+                for i, player in enumerate(self.players)
+            ))
+            
+    async def _run_group_commit(self, writer):
+        """并发的写入合并为批次，每批一次executor调用"""
+        for _ in range(self.ROUNDS):
+            results = await asyncio.gather(*(
+                writer.write(self._path("group", i), player) for i, player in enumerate(self.players)
+            ))
+            self.assertTrue(all(results))
+            
+    def test_group_commit_throughput(self):
+        """比较两种模式的写入吞吐量"""
+        writes = self.PLAYERS * self.ROUNDS
+        
+        start_time = time.perf_counter()
+        asyncio.run(self._run_per_write_fsync())
+        per_write_seconds = time.perf_counter() - start_time
+        
+        writer = GroupCommitWriter()
+        start_time = time.perf_counter()
+        asyncio.run(self._run_group_commit(writer))
+        group_seconds = time.perf_counter() - start_time
+        stats = writer.get_stats()
+        
+        print()
+        print(f"{'mode':<18}{'writes':>8}{'seconds':>10}{'writes/sec':>12}")
+        print(f"{'per-write fsync':<18}{writes:>8}{per_write_seconds:>10.3f}{writes / per_write_seconds:>12.0f}")
+        print(f"{'group commit':<18}{writes:>8}{group_seconds:>10.3f}{writes / group_seconds:>12.0f}")
+        print(f"组提交批次: {stats['batches']}，平均每批 {stats['avg_batch_size']:.1f} 个文件")
+        
+        # 两种模式写出的存档内容一致
+        for i, player in enumerate(self.players):
+            for mode in ("fsync", "group"):
+                with open(self._path(mode, i), 'r', encoding='utf-8') as f:
+                    self.assertEqual(json.load(f), player)
+        self.assertLess(stats["batches"], writes)
+        # 没有遗留的临时文件
+        self.assertEqual(len(os.listdir(self.temp_dir.name)), self.PLAYERS * 2)
+
+if __name__ == '__main__':
+    unittest.main()
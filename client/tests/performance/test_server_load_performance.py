@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+游戏服务器负载性能测试
+在本进程内启动GameServer，用少量模拟客户端运行压力测试工具并检查结果格式
+完整规模的压测请直接运行load_generator.py
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from client.tests.performance.load_generator import LoadGenerator, parse_message_mix, write_results
+
+class TestServerLoadPerformance(unittest.TestCase):
+    """服务器负载性能测试类"""
+    
+    def test_parse_message_mix(self):
+        """测试消息比例参数解析"""
+        self.assertEqual(parse_message_mix("get_recipe_list=3, buy_item=1,chat_message"), {
+            "get_recipe_list": 3.0,
+            "buy_item": 1.0,
+            "chat_message": 1.0
+        })
+        
+    def test_small_load_run(self):
+        """测试小规模压测并输出JSON结果"""
+        # 不包含依赖工作目录下配置文件的目录请求
+        message_mix = {"get_player_data": 2, "buy_item": 2, "sell_item": 1, "chat_message": 2, "craft_dish": 1}
+        generator = LoadGenerator(clients=20, duration=1.0, message_mix=message_mix, seed=1)
+        results = asyncio.run(generator.run())
+        
+        self.assertEqual(results["connected_clients"], 20)
+        self.assertGreater(results["total_requests"], 0)
+        self.assertIn("authenticate", results["per_type"])
+        for name in generator.message_mix:
+            stats = results["per_type"][name]
+            self.assertEqual(stats["errors"], 0)
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+                self.assertIn(key, stats)
+        self.assertGreater(results["event_loop_lag"]["count"], 0)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "load_result.json")
+            write_results(results, output_path)
+            with open(output_path, 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f)["total_requests"], results["total_requests"])
+                
+        print(f"\n吞吐量: {results['throughput_rps']:.1f} req/s")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+存储后端性能测试
+在同一块磁盘上比较JSON文件后端与SQLite后端的写入、读取和列出全部记录的吞吐量
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from server.dao.data_access import BaseDAO, RecipeDAO
+from server.dao.sqlite_backend import SQLiteStorage, SQLiteRecipeDAO
+
+def make_player(index):
+    """生成一份典型的玩家存档"""
+    return {
+        "id": f"player_{index}",
+        "name": f"玩家{index}",
+        "level": index % 50 + 1,
+        "currency": 1000 + index,
+        "inventory": [{"item_id": 100 + i, "quantity": i + 1} for i in range(20)]
+    }
+
+async def timed(coroutine_factory, count):
+    """并发执行count个操作，返回每秒操作数"""
+    start_time = time.perf_counter()
+    await asyncio.gather(*(coroutine_factory(i) for i in range(count)))
+    return count / (time.perf_counter() - start_time)
+
+class TestStorageBackendPerformance(unittest.TestCase):
+    """存储后端性能测试类"""
+    
+    RECORDS = 300
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory(dir=os.path.join(PROJECT_ROOT, "server"))
+        self.json_dir = os.path.join(self.temp_dir.name, "json")
+        self.storage = SQLiteStorage(os.path.join(self.temp_dir.name, "game.db"))
+        self.players = [make_player(i) for i in range(self.RECORDS)]
+        
+    def tearDown(self):
+        """测试后清理"""
+        self.storage.close()
+        self.temp_dir.cleanup()
+        
+    async def _run(self):
+        json_dao = BaseDAO(self.json_dir)
+        json_recipes = RecipeDAO(self.json_dir)
+        sqlite_recipes = SQLiteRecipeDAO(self.storage)
+        path = lambda i: os.path.join(self.json_dir, f"player_{i}.json")
+        
+        results = {"json": {}, "sqlite": {}}
+        results["json"]["write"] = await timed(lambda i: json_dao._write_file(path(i), self.players[i]), self.RECORDS)
+        results["sqlite"]["write"] = await timed(lambda i: self.storage.put("players", i, self.players[i]), self.RECORDS)
+        results["json"]["read"] = await timed(lambda i: json_dao._read_file(path(i)), self.RECORDS)
+        results["sqlite"]["read"] = await timed(lambda i: self.storage.get("players", i), self.RECORDS)
+        
+        for i in range(self.RECORDS):
+            recipe = {"id": i, "name": f"菜谱{i}", "category": "烘焙"}
+            await json_dao._write_file(os.path.join(self.json_dir, f"recipe_{i}.json"), recipe)
+        await self.storage.put_many("recipes", [(i, {"id": i, "name": f"菜谱{i}", "category": "烘焙"}) for i in range(self.RECORDS)])
+        
+        start_time = time.perf_counter()
+        json_all = await json_recipes.get_all_recipes()
+        results["json"]["list_all_ms"] = (time.perf_counter() - start_time) * 1000
+        start_time = time.perf_counter()
+        sqlite_all = await sqlite_recipes.get_all_recipes()
+        results["sqlite"]["list_all_ms"] = (time.perf_counter() - start_time) * 1000
+        return results, len(json_all), len(sqlite_all)
+        
+    def test_backends_side_by_side(self):
+        """对比两种后端"""
+        results, json_count, sqlite_count = asyncio.run(self._run())
+        
+        print()
+        print(f"{'backend':<10}{'writes/sec':>12}{'reads/sec':>12}{'list all ms':>13}")
+        for backend, stats in results.items():
+            print(f"{backend:<10}{stats['write']:>12.0f}{stats['read']:>12.0f}{stats['list_all_ms']:>13.1f}")
+            
+        self.assertEqual(json_count, self.RECORDS)
+        self.assertEqual(sqlite_count, self.RECORDS)
+
+if __name__ == '__main__':
+    unittest.main()
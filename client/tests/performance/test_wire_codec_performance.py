@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+消息编码性能测试
+比较JSON与紧凑二进制格式在真实消息上的大小和编解码耗时
+"""
+
+import sys
+import os
+import json
+import time
+import unittest
+
+# 添加项目路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(PROJECT_ROOT)
+
+from shared.utils.wire_codec import JSON_CODEC, COMPACT_CODEC
+
+CONFIG_DIR = os.path.join(PROJECT_ROOT, "client", "assets", "config")
+
+def load_config(file_name):
+    """加载配置文件"""
+    with open(os.path.join(CONFIG_DIR, file_name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def measure(func, iterations):
+    """测量函数平均耗时（微秒）"""
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start_time) / iterations * 1e6
+
+class TestWireCodecPerformance(unittest.TestCase):
+    """消息编码性能测试类"""
+    
+    ITERATIONS = 200
+    
+    def setUp(self):
+        """测试前准备"""
+        timestamp = "2026-01-01T12:00:00.250000"  # 紧凑格式的时间戳精度为毫秒
+        shop_items = load_config("shop_items.json")
+        for item in shop_items:
+            item["current_price"] = item["base_price"] * 1.05
+            item["price_trend"] = "rising"
+            
+        self.payloads = {
+            "shop_items": {
+                "type": "shop_items",
+                "data": {"items": shop_items},
+                "request_id": 12,
+                "timestamp": timestamp
+            },
+            "recipe_list": {
+                "type": "recipe_list",
+                "data": load_config("recipes.json"),
+                "request_id": 13,
+                "timestamp": timestamp
+            },
+            "chat_message": {
+                "type": "chat_message",
+                "data": {
+                    "player_id": "player_1001",
+                    "message": "今天的草莓蛋糕特别好吃！",
+                    "channel": "global",
+                    "channel_id": None,
+                    "target_id": None,
+                    "timestamp": timestamp
+                },
+                "request_id": None,
+                "timestamp": timestamp
+            }
+        }
+        
+    def test_round_trip(self):
+        """测试两种格式都能还原消息"""
+        for message in self.payloads.values():
+            self.assertEqual(JSON_CODEC.decode(JSON_CODEC.encode(message)), message)
+            self.assertEqual(COMPACT_CODEC.decode(COMPACT_CODEC.encode(message)), message)
+            
+    def test_wire_size_and_speed(self):
+        """比较帧大小和编解码耗时"""
+        print()
+        print(f"{'payload':<14}{'json B':>9}{'compact B':>11}{'ratio':>8}"
+              f"{'json enc us':>13}{'cmp enc us':>12}{'json dec us':>13}{'cmp dec us':>12}")
+        for name, message in self.payloads.items():
+            json_frame = JSON_CODEC.encode(message).encode("utf-8")
+            compact_frame = COMPACT_CODEC.encode(message)
+            
+            json_encode = measure(lambda: JSON_CODEC.encode(message), self.ITERATIONS)
+            compact_encode = measure(lambda: COMPACT_CODEC.encode(message), self.ITERATIONS)
+            json_decode = measure(lambda: JSON_CODEC.decode(json_frame), self.ITERATIONS)
+            compact_decode = measure(lambda: COMPACT_CODEC.decode(compact_frame), self.ITERATIONS)
+            
+            print(f"{name:<14}{len(json_frame):>9}{len(compact_frame):>11}"
+                  f"{len(compact_frame) / len(json_frame):>8.2f}"
+                  f"{json_encode:>13.1f}{compact_encode:>12.1f}{json_decode:>13.1f}{compact_decode:>12.1f}")
+                  
+            self.assertLess(len(compact_frame), len(json_frame))
+
+if __name__ == '__main__':
+    unittest.main()
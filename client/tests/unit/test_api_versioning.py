@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+API版本号单元测试
+测试保存玩家数据后返回的版本号与之后读取到的文档一致
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.backend import api
+from server.backend.api import RESTfulAPIManager
+from server.backend.dao import PlayerDAO
+
+class TestUpdateVersion(unittest.TestCase):
+    """更新结果版本号测试类"""
+
+    def test_version_matches_stored_document(self):
+        """测试更新结果的版本号按保存后的文档（PlayerDAO会补充last_updated）计算，与带版本读取的结果一致"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            async def run():
+                player_dao = PlayerDAO(temp_dir, flush_interval=60)
+                with mock.patch.object(api, "player_dao", player_dao):
+                    manager = RESTfulAPIManager()
+                    result = await manager.update_player("p1", {"id": "p1", "level": 3})
+                    fetched = await manager.get_versioned("player", "p1", if_version=result["version"])
+                await player_dao.flush_all()
+                return result, fetched
+
+            result, fetched = asyncio.run(run())
+
+        self.assertEqual(result["status"], 200)
+        self.assertIn("last_updated", result["data"])
+        self.assertEqual(fetched["status"], 304)
+
+if __name__ == '__main__':
+    unittest.main()
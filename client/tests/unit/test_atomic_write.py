@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+原子写入单元测试
+测试atomic_write_json的原子替换和GroupCommitWriter的批量提交功能
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+# 添加项目路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(ROOT_DIR)
+
+from server.utils.atomic_write import GroupCommitWriter, atomic_write_json, commit_batch
+from server.backend.dao import BaseDAO
+
+class TestAtomicWrite(unittest.TestCase):
+    """原子写入测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "player_1.json")
+        
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+        
+    def _read(self, path=None):
+        with open(path or self.file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+            
+    def test_replace(self):
+        """测试写入替换目标文件且不遗留临时文件"""
+        atomic_write_json(self.file_path, {"level": 1})
+        atomic_write_json(self.file_path, {"level": 2, "name": "厨师"})
+        
+        self.assertEqual(self._read(), {"level": 2, "name": "厨师"})
+        self.assertEqual(os.listdir(self.temp_dir.name), ["player_1.json"])
+        
+    def test_failed_write_keeps_previous_version(self):
+        """测试写入中途失败时保留旧版本"""
+        atomic_write_json(self.file_path, {"level": 1})
+        
+        with self.assertRaises(TypeError):
+            atomic_write_json(self.file_path, {"level": 2, "bad": object()})
+            
+        self.assertEqual(self._read(), {"level": 1})
+        self.assertEqual(os.listdir(self.temp_dir.name), ["player_1.json"])
+        
+    def test_commit_batch_partial_failure(self):
+        """测试批量写入中单个文件失败不影响其他文件"""
+        good_path = os.path.join(self.temp_dir.name, "player_2.json")
+        bad_path = os.path.join(self.temp_dir.name, "missing", "player_3.json")
+        
+        results = commit_batch([(good_path, {"level": 2}), (bad_path, {"level": 3})])
+        
+        self.assertEqual(results, {good_path: True, bad_path: False})
+        self.assertEqual(self._read(good_path), {"level": 2})
+        
+    def test_commit_batch_fsyncs_files_and_directory(self):
+        """测试批量写入先写完所有临时文件再逐个fsync，每个目录只fsync一次，不调用全局os.sync"""
+        paths = [os.path.join(self.temp_dir.name, f"player_{i}.json") for i in range(3)]
+        real_fsync = os.fsync
+        synced = []
+        temp_files_at_first_fsync = []
+        
+        def counting_fsync(fd):
+            if not synced:
+                temp_files_at_first_fsync.extend(
+                    name for name in os.listdir(self.temp_dir.name) if name.endswith(".tmp")
+                )
+            synced.append(fd)
+            real_fsync(fd)
+            
+        with mock.patch("os.fsync", side_effect=counting_fsync), \
+                mock.patch("os.sync", side_effect=AssertionError("不应刷新整个系统"), create=True):
+            results = commit_batch([(path, {"index": i}) for i, path in enumerate(paths)])
+            
+        self.assertTrue(all(results.values()))
+        self.assertEqual(len(synced), len(paths) + 1)
+        self.assertEqual(len(temp_files_at_first_fsync), len(paths))
+        self.assertEqual(self._read(paths[2]), {"index": 2})
+        
+    def test_group_commit_coalesces_writes(self):
+        """测试组提交合并并发写入"""
+        async def run():
+            writer = GroupCommitWriter(max_delay=0.01)
+            paths = [os.path.join(self.temp_dir.name, f"player_{i}.json") for i in range(10)]
+            results = await asyncio.gather(
+                *(writer.write(path, {"index": i}) for i, path in enumerate(paths)),
+                writer.write(paths[0], {"index": 100})
+            )
+            return writer.get_stats(), results, paths
+            
+        stats, results, paths = asyncio.run(run())
+        
+        self.assertTrue(all(results))
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["coalesced"], 1)
+        self.assertEqual(self._read(paths[0]), {"index": 100})
+        self.assertEqual(self._read(paths[9]), {"index": 9})
+        
+    def test_dao_group_commit(self):
+        """测试DAO使用组提交写入"""
+        async def run():
+            writer = GroupCommitWriter()
+            dao = BaseDAO(self.temp_dir.name, group_commit=writer)
+            success = await dao._write_file(self.file_path, {"level": 5})
+            return success, writer.get_stats()
+            
+        success, stats = asyncio.run(run())
+        
+        self.assertTrue(success)
+        self.assertEqual(stats["files_written"], 1)
+        self.assertEqual(self._read(), {"level": 5})
+
+if __name__ == '__main__':
+    unittest.main()
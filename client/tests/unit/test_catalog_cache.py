@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+目录响应缓存单元测试
+测试CatalogResponseCache的缓存、失效和预编码功能
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.catalog_cache import CatalogResponseCache
+from shared.utils.wire_codec import JSON_CODEC, COMPACT_CODEC
+
+class TestCatalogResponseCache(unittest.TestCase):
+    """目录响应缓存测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "recipes.json")
+        self._write([{"id": 1, "name": "草莓蛋糕"}])
+        self.cache = CatalogResponseCache(check_interval=0)
+        self.cache.register("recipes", self.file_path, "recipe_list")
+        
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+        
+    def _write(self, data):
+        """写入配置文件"""
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            
+    def test_response_is_cached(self):
+        """测试未变化的配置文件只加载一次"""
+        first = asyncio.run(self.cache.get_response("recipes"))
+        second = asyncio.run(self.cache.get_response("recipes"))
+        
+        self.assertEqual(first["type"], "recipe_list")
+        self.assertEqual(first["data"], [{"id": 1, "name": "草莓蛋糕"}])
+        self.assertIs(first.entry, second.entry)
+        self.assertEqual(first["version"], first.entry.version)
+        
+    def test_reload_on_change(self):
+        """测试配置文件变化后重新加载"""
+        first = asyncio.run(self.cache.get_response("recipes"))
+        self._write([{"id": 1, "name": "草莓蛋糕"}, {"id": 2, "name": "抹茶拿铁"}])
+        response = asyncio.run(self.cache.get_response("recipes"))
+        
+        self.assertEqual(len(response["data"]), 2)
+        self.assertNotEqual(response.entry.version, first.entry.version)
+        
+    def test_not_modified(self):
+        """测试客户端版本一致时返回not_modified"""
+        first = asyncio.run(self.cache.get_response("recipes"))
+        response = asyncio.run(self.cache.get_response("recipes", first["version"]))
+        
+        self.assertEqual(response["type"], "not_modified")
+        self.assertEqual(response["data"], {"resource": "recipe_list", "version": first["version"]})
+        
+        # 过期版本返回完整数据
+        response = asyncio.run(self.cache.get_response("recipes", "stale"))
+        self.assertEqual(response["type"], "recipe_list")
+        
+    def test_encoded_frame(self):
+        """测试使用预编码片段生成的响应帧"""
+        for codec in (JSON_CODEC, COMPACT_CODEC):
+            response = asyncio.run(self.cache.get_response("recipes"))
+            response["request_id"] = 7
+            frame = self.cache.encode_response(codec, response)
+            self.assertEqual(codec.decode(frame), {
+                "type": "recipe_list",
+                "data": [{"id": 1, "name": "草莓蛋糕"}],
+                "version": response["version"],
+                "request_id": 7
+            })
+            self.assertIn(codec.name, response.entry.encoded_data)
+            
+    def test_missing_file(self):
+        """测试配置文件不存在"""
+        self.cache.register("quests", os.path.join(self.temp_dir.name, "missing.json"), "quest_list")
+        self.assertIsNone(asyncio.run(self.cache.get_response("quests")))
+
+if __name__ == '__main__':
+    unittest.main()
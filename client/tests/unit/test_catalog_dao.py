@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+目录DAO单元测试
+测试RecipeDAO和QuestDAO的内存索引查找、二级索引过滤和配置文件变化后的重新加载
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+import builtins
+from unittest import mock
+
+# 添加项目路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(ROOT_DIR)
+
+from server.backend.dao import RecipeDAO, QuestDAO
+from server.utils.catalog_cache import CatalogResponseCache
+
+class TestCatalogDAO(unittest.TestCase):
+    """目录DAO测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.recipes_path = os.path.join(self.temp_dir.name, "recipes.json")
+        self._write(self.recipes_path, [
+            {"id": 1, "name": "草莓蛋糕", "category": "烘焙", "unlock_conditions": {"type": "level", "value": 3}},
+            {"id": 2, "name": "蛋炒饭", "category": "中餐", "unlock_conditions": {"type": "level", "value": 1}},
+            {"id": 3, "name": "芝士蛋糕", "category": "烘焙", "unlock_conditions": {"type": "level", "value": 5}}
+        ])
+        self._write(os.path.join(self.temp_dir.name, "main_quests.json"), [
+            {"id": "mq_001", "title": "初出茅庐", "requirements": []},
+            {"id": "mq_002", "title": "小有名气", "requirements": [{"type": "level", "value": 5}]}
+        ])
+        self.cache = CatalogResponseCache(check_interval=0)
+        self.recipe_dao = RecipeDAO(self.temp_dir.name, cache=self.cache)
+        self.quest_dao = QuestDAO(self.temp_dir.name, cache=self.cache)
+        
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+        
+    def _write(self, path, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            
+    def test_lookup_without_io(self):
+        """测试目录加载后按ID查找不再读取文件"""
+        async def run():
+            await self.recipe_dao.get_recipes()
+            self.cache.check_interval = 60
+            with mock.patch.object(builtins, "open", side_effect=AssertionError("不应读取文件")):
+                return await self.recipe_dao.get_recipe(3), await self.recipe_dao.get_recipe("2")
+                
+        by_int, by_str = asyncio.run(run())
+        
+        self.assertEqual(by_int["name"], "芝士蛋糕")
+        self.assertEqual(by_str["name"], "蛋炒饭")
+        
+    def test_secondary_indexes(self):
+        """测试按分类和等级过滤"""
+        async def run():
+            return (
+                await self.recipe_dao.get_recipes_by_category("烘焙"),
+                await self.recipe_dao.get_recipes_unlocked_at(3),
+                await self.quest_dao.get_quests_for_level(1)
+            )
+            
+        baking, unlocked, quests = asyncio.run(run())
+        
+        self.assertEqual([r["id"] for r in baking], [1, 3])
+        self.assertEqual([r["id"] for r in unlocked], [1, 2])
+        self.assertEqual([q["id"] for q in quests], ["mq_001"])
+        
+    def test_reload_on_change(self):
+        """测试配置文件变化后替换为新快照"""
+        async def run():
+            old_snapshot = await self.recipe_dao.get_catalog()
+            self._write(self.recipes_path, [{"id": 9, "name": "抹茶布丁", "category": "甜点"}])
+            os.utime(self.recipes_path, (0, old_snapshot.mtime + 10))
+            new_snapshot = await self.recipe_dao.get_catalog()
+            return old_snapshot, new_snapshot, await self.recipe_dao.get_recipe(9), await self.recipe_dao.get_recipe(1)
+            
+        old_snapshot, new_snapshot, added, removed = asyncio.run(run())
+        
+        self.assertIsNot(old_snapshot, new_snapshot)
+        self.assertEqual(len(old_snapshot.data), 3)
+        self.assertEqual(added["name"], "抹茶布丁")
+        self.assertIsNone(removed)
+        
+    def test_add_recipe_invalidates(self):
+        """测试添加菜谱后立即可以查到"""
+        async def run():
+            self.cache.check_interval = 60
+            await self.recipe_dao.get_recipes()
+            await self.recipe_dao.add_recipe({"id": 4, "name": "番茄炒蛋", "category": "中餐"})
+            return await self.recipe_dao.get_recipe(4)
+            
+        self.assertEqual(asyncio.run(run())["name"], "番茄炒蛋")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+目录查询单元测试
+测试CatalogIndex的游标分页、索引过滤和字段投影功能
+"""
+
+import sys
+import os
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.catalog_query import CatalogQuerySpec, CatalogQueryError, field_getter, encode_cursor, MAX_PAGE_SIZE
+from server.utils.catalog_cache import CatalogEntry
+
+class TestCatalogQuery(unittest.TestCase):
+    """目录查询测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.recipes = [
+            {
+                "id": i,
+                "name": f"菜谱{i}",
+                "category": ["烘焙", "中餐", "甜点"][i % 3],
+                "difficulty": i % 5 + 1,
+                "level": i % 10 + 1,
+                "steps": ["准备", "烹饪"]
+            }
+            for i in range(1, 101)
+        ]
+        self.spec = CatalogQuerySpec(
+            "recipes",
+            equality_fields={"category": field_getter("category"), "difficulty": field_getter("difficulty")},
+            range_fields={"level": field_getter("level")}
+        )
+        self.index = self.spec.build(self.recipes)
+
+    def test_cursor_pagination(self):
+        """测试游标分页遍历完整目录"""
+        ids = []
+        cursor = None
+        pages = 0
+        while True:
+            page = self.index.query({"limit": "30", "cursor": cursor})
+            ids.extend(item["id"] for item in page["items"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(ids, list(range(1, 101)))
+        self.assertEqual(pages, 4)
+        self.assertEqual(page["total"], 100)
+
+    def test_filters(self):
+        """测试等值过滤和范围过滤"""
+        page = self.index.query({"category": "烘焙,甜点", "difficulty": "3", "min_level": "2", "max_level": "5"})
+        expected = [
+            r["id"] for r in self.recipes
+            if r["category"] in ("烘焙", "甜点") and r["difficulty"] == 3 and 2 <= r["level"] <= 5
+        ]
+
+        self.assertEqual([item["id"] for item in page["items"]], expected)
+        self.assertEqual(page["total"], len(expected))
+        self.assertIsNone(page["next_cursor"])
+
+    def test_filtered_pagination(self):
+        """测试过滤结果分页"""
+        first = self.index.query({"category": "中餐", "limit": 10})
+        second = self.index.query({"category": "中餐", "limit": 10, "cursor": first["next_cursor"]})
+        ids = [item["id"] for item in first["items"] + second["items"]]
+
+        self.assertEqual(ids, [r["id"] for r in self.recipes if r["category"] == "中餐"][:20])
+        self.assertEqual(first["total"], sum(1 for r in self.recipes if r["category"] == "中餐"))
+
+    def test_field_projection(self):
+        """测试字段投影，主键总是返回"""
+        page = self.index.query({"fields": "name,category", "limit": 1})
+
+        self.assertEqual(page["items"], [{"id": 1, "name": "菜谱1", "category": "中餐"}])
+
+    def test_invalid_parameters(self):
+        """测试无效参数"""
+        for params in ({"limit": MAX_PAGE_SIZE + 1}, {"limit": "abc"}, {"min_level": "x"}, {"cursor": "!!!"}, {"cursor": "OTk5"}):
+            with self.assertRaises(CatalogQueryError):
+                self.index.query(params)
+
+    def test_cursor_must_be_scalar_key(self):
+        """测试解析为列表、字典或布尔值的游标报查询参数错误"""
+        for key in ([1], {"id": 1}, True, None):
+            with self.assertRaises(CatalogQueryError):
+                self.index.query({"cursor": encode_cursor(key)})
+
+    def test_duplicate_keys_do_not_loop(self):
+        """测试主键重复时分页只返回第一条记录，游标不会回到前面的页"""
+        records = [{"id": i % 7} for i in range(14)]
+        index = self.spec.build(records)
+        ids = []
+        cursor = None
+        for _ in range(10):
+            page = index.query({"limit": "3", "cursor": cursor})
+            ids.extend(item["id"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(ids, list(range(7)))
+        self.assertIsNone(cursor)
+
+    def test_index_built_once_per_version(self):
+        """测试同一目录版本只建立一次索引"""
+        entry = CatalogEntry(self.recipes, "v1", 0.0, 0)
+
+        self.assertIs(entry.get_index(self.spec), entry.get_index(self.spec))
+        self.assertTrue(self.spec.is_query({"fields": "id"}))
+        self.assertFalse(self.spec.is_query({"player_id": "p1", "if_version": "v1"}))
+
+if __name__ == '__main__':
+    unittest.main()
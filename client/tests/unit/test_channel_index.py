@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+频道订阅索引单元测试
+测试ChannelSubscriptionIndex的订阅、取消订阅和断开连接清理，以及GameServer按频道路由聊天消息
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.channel_index import ChannelSubscriptionIndex
+from server.backend import server as backend_server
+from server.backend.dao import PlayerDAO
+from server.backend.server import GameServer
+
+# 测试玩家：alice和bob是g1公会成员并互为好友，carol不属于任何公会
+PLAYERS = {
+    "alice": {"guild_id": "g1", "friends": ["bob"]},
+    "bob": {"guild_id": "g1", "friends": ["alice"]},
+    "carol": {"friends": []}
+}
+
+class FakeWebSocket:
+    """测试用连接，记录收到的消息帧"""
+
+    def __init__(self, name):
+        self.name = name
+        self.remote_address = (name, 0)
+        self.sent = []
+
+    async def send(self, payload):
+        self.sent.append(json.loads(payload))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+    def chat_messages(self):
+        return [message["data"]["message"] for message in self.sent if message.get("type") == "chat_message"]
+
+class TestChannelSubscriptionIndex(unittest.TestCase):
+    """频道订阅索引测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.index = ChannelSubscriptionIndex()
+
+    def test_join_and_leave(self):
+        """测试订阅和取消订阅同时维护两个方向的映射"""
+        key = self.index.subscribe("ws1", "guild", "g1")
+        self.index.subscribe("ws2", "guild", "g1")
+        self.index.subscribe("ws1", "global")
+
+        self.assertEqual(key, "guild:g1")
+        self.assertEqual(self.index.get_subscribers("guild", "g1"), {"ws1", "ws2"})
+        self.assertEqual(self.index.get_client_channels("ws1"), {"guild:g1", "global"})
+
+        self.assertTrue(self.index.unsubscribe("ws1", "guild", "g1"))
+        self.assertFalse(self.index.unsubscribe("ws1", "guild", "g1"))
+        self.assertEqual(self.index.get_subscribers("guild", "g1"), {"ws2"})
+        self.assertEqual(self.index.get_client_channels("ws1"), {"global"})
+
+        self.index.unsubscribe("ws2", "guild", "g1")
+        self.assertNotIn("guild:g1", self.index.subscribers)
+        self.assertEqual(self.index.subscriber_count("guild", "g1"), 0)
+
+    def test_remove_client_unsubscribes_everywhere(self):
+        """测试断开连接时移除该连接的所有订阅，空频道被删除"""
+        self.index.subscribe("ws1", "global")
+        self.index.subscribe("ws1", "whisper", "p1")
+        self.index.subscribe("ws2", "global")
+
+        self.index.remove_client("ws1")
+
+        self.assertEqual(self.index.get_subscribers("global"), {"ws2"})
+        self.assertNotIn("whisper:p1", self.index.subscribers)
+        self.assertNotIn("ws1", self.index.client_channels)
+
+    def test_subscribers_returns_copy(self):
+        """测试返回的订阅集合是副本，修改不影响索引"""
+        self.index.subscribe("ws1", "global")
+
+        self.index.get_subscribers("global").add("ws2")
+
+        self.assertEqual(self.index.subscriber_count("global"), 1)
+
+class TestChatRouting(unittest.TestCase):
+    """聊天频道路由测试类"""
+
+    def _run(self, scenario):
+        async def run(temp_dir):
+            player_dao = PlayerDAO(temp_dir, flush_interval=60)
+            for name, player in PLAYERS.items():
+                await player_dao.create_player(name, dict(player))
+            server = GameServer(http_port=None)
+            clients = {name: FakeWebSocket(name) for name in PLAYERS}
+            for name, websocket in clients.items():
+                server.open_send_queue(websocket)
+                await server.authenticate_player(websocket, {"player_id": name})
+            try:
+                with mock.patch.object(backend_server, "player_dao", player_dao):
+                    return await scenario(server, clients)
+            finally:
+                for websocket in list(server.send_queues):
+                    server._remove_client(websocket)
+                await player_dao.flush_all()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            return asyncio.run(run(temp_dir))
+
+    def test_guild_broadcast_reaches_only_members(self):
+        """测试公会消息只发送给订阅了该公会频道的连接"""
+        async def scenario(server, clients):
+            await server.join_chat_channel(clients["alice"], {"channel": "guild", "channel_id": "g1"})
+            await server.join_chat_channel(clients["bob"], {"channel": "guild", "channel_id": "g1"})
+            response = await server.handle_chat_message(
+                clients["alice"], {"player_id": "alice", "message": "公会你好", "channel": "guild", "channel_id": "g1"}
+            )
+            await asyncio.sleep(0.01)
+            return response, {name: websocket.chat_messages() for name, websocket in clients.items()}
+
+        response, received = self._run(scenario)
+
+        self.assertEqual(response["data"]["recipients"], 2)
+        self.assertEqual(received, {"alice": ["公会你好"], "bob": ["公会你好"], "carol": []})
+
+    def test_whisper_reaches_target_and_sender(self):
+        """测试私聊只发送给对象和发送者"""
+        async def scenario(server, clients):
+            await server.handle_chat_message(
+                clients["alice"], {"player_id": "alice", "message": "悄悄话", "channel": "whisper", "target_id": "carol"}
+            )
+            await asyncio.sleep(0.01)
+            return {name: websocket.chat_messages() for name, websocket in clients.items()}
+
+        received = self._run(scenario)
+
+        self.assertEqual(received, {"alice": ["悄悄话"], "bob": [], "carol": ["悄悄话"]})
+
+    def test_leave_and_disconnect_stop_delivery(self):
+        """测试离开频道和断开连接后不再收到频道消息"""
+        async def scenario(server, clients):
+            for name in ("alice", "bob"):
+                await server.join_chat_channel(clients[name], {"channel": "guild", "channel_id": "g1"})
+            await server.leave_chat_channel(clients["bob"], {"channel": "guild", "channel_id": "g1"})
+            server._remove_client(clients["carol"])
+            response = await server.handle_chat_message(
+                clients["alice"], {"player_id": "alice", "message": "还有人吗", "channel": "guild", "channel_id": "g1"}
+            )
+            await asyncio.sleep(0.01)
+            return response, server.chat_channels.get_client_channels(clients["carol"]), \
+                {name: websocket.chat_messages() for name, websocket in clients.items()}
+
+        response, carol_channels, received = self._run(scenario)
+
+        self.assertEqual(response["data"]["recipients"], 1)
+        self.assertEqual(carol_channels, set())
+        self.assertEqual(received, {"alice": ["还有人吗"], "bob": [], "carol": []})
+
+    def test_join_rejects_foreign_channels(self):
+        """测试不能订阅其他玩家的好友频道或自己不属于的公会频道"""
+        async def scenario(server, clients):
+            guild = await server.join_chat_channel(clients["carol"], {"channel": "guild", "channel_id": "g1"})
+            friends = await server.join_chat_channel(clients["carol"], {"channel": "friends", "channel_id": "alice"})
+            own = await server.join_chat_channel(clients["carol"], {"channel": "friends", "channel_id": "carol"})
+            return guild, friends, own, server.chat_channels.get_client_channels(clients["carol"])
+
+        guild, friends, own, channels = self._run(scenario)
+
+        self.assertEqual(guild["data"]["code"], "CHANNEL_FORBIDDEN")
+        self.assertEqual(friends["data"]["code"], "CHANNEL_FORBIDDEN")
+        self.assertEqual(own["type"], "chat_channel_joined")
+        self.assertEqual(channels, {"global", "whisper:carol", "friends:carol"})
+
+    def test_sender_taken_from_connection(self):
+        """测试发送者取自连接，消息中伪造的player_id不能冒用他人身份或进入他人的公会频道"""
+        async def scenario(server, clients):
+            await server.join_chat_channel(clients["alice"], {"channel": "guild", "channel_id": "g1"})
+            guild = await server.handle_chat_message(
+                clients["carol"], {"player_id": "alice", "message": "冒充", "channel": "guild", "channel_id": "g1"}
+            )
+            await server.handle_chat_message(clients["carol"], {"player_id": "alice", "message": "大家好"})
+            await asyncio.sleep(0.01)
+            senders = [message["data"]["player_id"] for message in clients["bob"].sent
+                       if message.get("type") == "chat_message"]
+            return guild, senders, clients["alice"].chat_messages()
+
+        guild, senders, alice_received = self._run(scenario)
+
+        self.assertEqual(guild["data"]["code"], "CHANNEL_FORBIDDEN")
+        self.assertEqual(senders, ["carol"])
+        self.assertEqual(alice_received, ["大家好"])
+
+    def test_friends_message_reaches_friends(self):
+        """测试好友消息发送到发送者各好友订阅的好友频道"""
+        async def scenario(server, clients):
+            for name in ("bob", "carol"):
+                await server.join_chat_channel(clients[name], {"channel": "friends", "channel_id": name})
+            response = await server.handle_chat_message(clients["alice"], {"message": "好友们好", "channel": "friends"})
+            await asyncio.sleep(0.01)
+            return response, {name: websocket.chat_messages() for name, websocket in clients.items()}
+
+        response, received = self._run(scenario)
+
+        self.assertEqual(response["data"]["recipients"], 2)
+        self.assertEqual(received, {"alice": ["好友们好"], "bob": ["好友们好"], "carol": []})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+集合清单单元测试
+测试CollectionManifest的重建与维护、按清单并发加载集合以及段文件合并
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.dao.collection_manifest import CollectionManifest
+from server.dao.data_access import RecipeDAO, QuestDAO
+
+class TestCollectionManifest(unittest.TestCase):
+    """集合清单测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = self.temp_dir.name
+
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+
+    def _write_record(self, file_name, data):
+        with open(os.path.join(self.data_dir, file_name), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def test_rebuild_when_manifest_missing(self):
+        """测试清单缺失时扫描目录重建，只收录匹配前缀的文件"""
+        self._write_record("recipe_1.json", {"id": 1})
+        self._write_record("recipe_2.json", {"id": 2})
+        self._write_record("quest_1.json", {"id": 1})
+
+        manifest = CollectionManifest(self.data_dir, "recipes", "recipe_")
+        manifest.load()
+
+        self.assertEqual(set(manifest.entries), {"1", "2"})
+        self.assertEqual(manifest.entries["1"]["file"], "recipe_1.json")
+        self.assertTrue(os.path.exists(manifest.manifest_path))
+
+    def test_listing_reads_manifest_not_directory(self):
+        """测试清单存在后列出集合只读取清单中登记的文件"""
+        async def run():
+            recipe_dao = RecipeDAO(self.data_dir, max_concurrent_reads=2)
+            for i in range(5):
+                await recipe_dao.save_recipe({"id": i, "name": f"菜谱{i}"})
+            # 绕过DAO写入的文件不在清单中，重建清单后才会出现
+            self._write_record("recipe_99.json", {"id": 99})
+            before = await recipe_dao.get_all_recipes()
+            await recipe_dao.rebuild_manifest()
+            after = await recipe_dao.get_all_recipes()
+            return before, after
+
+        before, after = asyncio.run(run())
+
+        self.assertEqual(sorted(recipe["id"] for recipe in before), [0, 1, 2, 3, 4])
+        self.assertEqual(sorted(recipe["id"] for recipe in after), [0, 1, 2, 3, 4, 99])
+
+    def test_order_stable_across_rebuild(self):
+        """测试新增记录与重建清单后的列出顺序一致（数字ID按数值排序）"""
+        async def run():
+            recipe_dao = RecipeDAO(self.data_dir)
+            for record_id in (10, 2, "cake", 1):
+                await recipe_dao.save_recipe({"id": record_id})
+            before = await recipe_dao.get_all_recipes()
+            await recipe_dao.rebuild_manifest()
+            after = await RecipeDAO(self.data_dir).get_all_recipes()
+            return [recipe["id"] for recipe in before], [recipe["id"] for recipe in after]
+
+        before, after = asyncio.run(run())
+
+        self.assertEqual(before, [1, 2, 10, "cake"])
+        self.assertEqual(after, before)
+
+    def test_manifest_persists_across_instances(self):
+        """测试保存和删除记录会写回清单文件"""
+        async def run():
+            quest_dao = QuestDAO(self.data_dir)
+            await quest_dao._save_record(1, {"id": 1})
+            await quest_dao._save_record(2, {"id": 2})
+            deleted = await quest_dao._delete_record(1)
+            return deleted, await QuestDAO(self.data_dir).get_all_quests()
+
+        deleted, quests = asyncio.run(run())
+
+        self.assertTrue(deleted)
+        self.assertEqual(quests, [{"id": 2}])
+
+    def test_segment_serves_fresh_records_and_skips_stale(self):
+        """测试段文件中的记录与清单一致时直接使用，记录文件更新后改为读取文件"""
+        async def run():
+            recipe_dao = RecipeDAO(self.data_dir)
+            for i in range(3):
+                await recipe_dao.save_recipe({"id": i, "name": f"菜谱{i}"})
+            written = await recipe_dao.consolidate()
+            await recipe_dao.save_recipe({"id": 1, "name": "新菜谱1", "note": "更新"})
+
+            segment_dao = RecipeDAO(self.data_dir, use_segment=True)
+            manifest = await segment_dao._get_manifest()
+            segment_records = manifest.load_segment()
+            return written, segment_records, await segment_dao.get_all_recipes()
+
+        written, segment_records, recipes = asyncio.run(run())
+
+        self.assertEqual(written, 3)
+        self.assertEqual(set(segment_records), {"0", "2"})
+        self.assertEqual({recipe["id"]: recipe["name"] for recipe in recipes}, {0: "菜谱0", 1: "新菜谱1", 2: "菜谱2"})
+
+    def test_concurrent_reads_on_dao_created_outside_loop(self):
+        """测试在事件循环外创建的DAO（如全局DAO）可以在多个事件循环中被并发读取"""
+        for i in range(3):
+            self._write_record(f"recipe_{i}.json", {"id": i})
+        recipe_dao = RecipeDAO(self.data_dir)
+
+        async def run():
+            return await asyncio.gather(*(recipe_dao.get_all_recipes() for _ in range(8)))
+
+        first = asyncio.run(run())
+        recipe_dao.data_dir = self.data_dir + os.sep
+        second = asyncio.run(run())
+
+        self.assertEqual([len(recipes) for recipes in first + second], [3] * 16)
+
+if __name__ == '__main__':
+    unittest.main()
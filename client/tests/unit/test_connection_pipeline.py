@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+连接请求流水线单元测试
+测试ConnectionPipeline的并发上限、有序执行与取消后释放名额
+"""
+
+import sys
+import os
+import asyncio
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.connection_pipeline import ConnectionPipeline
+
+class TestConnectionPipeline(unittest.TestCase):
+    """连接请求流水线测试类"""
+    
+    def test_requests_run_concurrently(self):
+        """测试多个请求并发执行"""
+        async def scenario():
+            pipeline = ConnectionPipeline(max_in_flight=4)
+            finished = []
+            
+            async def request(name, delay):
+                await asyncio.sleep(delay)
+                finished.append(name)
+                
+            await pipeline.submit(request("slow", 0.05))
+            await pipeline.submit(request("fast", 0.0))
+            await pipeline.drain()
+            return finished
+            
+        self.assertEqual(asyncio.run(scenario()), ["fast", "slow"])
+        
+    def test_max_in_flight(self):
+        """测试在途请求上限"""
+        async def scenario():
+            pipeline = ConnectionPipeline(max_in_flight=2)
+            state = {"running": 0, "peak": 0}
+            
+            async def request():
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+                await asyncio.sleep(0.01)
+                state["running"] -= 1
+                
+            for _ in range(6):
+                await pipeline.submit(request())
+            await pipeline.drain()
+            return state["peak"]
+            
+        self.assertEqual(asyncio.run(scenario()), 2)
+        
+    def test_ordered_requests(self):
+        """测试有序请求按提交顺序完成"""
+        async def scenario():
+            pipeline = ConnectionPipeline(max_in_flight=8)
+            finished = []
+            
+            async def request(name, delay):
+                await asyncio.sleep(delay)
+                finished.append(name)
+                
+            await pipeline.submit(request("write_1", 0.03), ordered=True)
+            await pipeline.submit(request("read", 0.0))
+            await pipeline.submit(request("write_2", 0.0), ordered=True)
+            await pipeline.drain()
+            return finished
+            
+        self.assertEqual(asyncio.run(scenario()), ["read", "write_1", "write_2"])
+
+    def test_cancel_before_start_releases_slots(self):
+        """测试开始执行前被取消的请求也会释放在途名额"""
+        async def scenario():
+            pipeline = ConnectionPipeline(max_in_flight=2)
+            
+            async def request():
+                await asyncio.sleep(0.01)
+                
+            # 提交后立即取消，任务还没有机会开始执行
+            for _ in range(4):
+                await pipeline.submit(request())
+                pipeline.cancel()
+            await asyncio.sleep(0)
+            
+            ran = []
+            
+            async def after():
+                ran.append(True)
+                
+            await pipeline.submit(after())
+            await pipeline.submit(after())
+            await pipeline.drain()
+            return len(ran), pipeline.semaphore._value
+            
+        # 名额泄漏时submit会一直等待，用超时让测试失败而不是卡住
+        self.assertEqual(asyncio.run(asyncio.wait_for(scenario(), timeout=2.0)), (2, 2))
+
+if __name__ == '__main__':
+    unittest.main()
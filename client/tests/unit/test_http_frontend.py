@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HTTP前端单元测试
+测试HTTPFrontend的keep-alive、流水线、分块响应、gzip、ETag条件请求和查询参数处理
+"""
+
+import sys
+import os
+import gzip
+import json
+import asyncio
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.http_frontend import HTTPFrontend
+from server.utils.path_router import PathRouter
+from server.utils.catalog_cache import CatalogEntry
+from server.utils.versioning import compute_version
+
+class DummyAPI:
+    """测试用API接口"""
+    
+    def __init__(self):
+        self.router = PathRouter()
+        self.router.add("GET", "/api/players/{player_id}", self.get_player)
+        self.router.add("PUT", "/api/players/{player_id}", self.update_player)
+        self.router.add("GET", "/api/recipes", self.get_recipes)
+        self.router.add("GET", "/api/quests", self.get_quests)
+        quests = [{"id": f"q{i}", "name": f"任务{i}"} for i in range(100)]
+        self.quest_entry = CatalogEntry(quests, compute_version(quests), 0.0, 0)
+        self.calls = []
+        
+    async def dispatch(self, method, full_path, data=None):
+        match = self.router.match(method, full_path)
+        if match is None:
+            if self.router.allowed_methods(full_path):
+                return {"error": "Method not allowed", "status": 405}
+            return {"error": "Route not found", "status": 404}
+        return await match.handler(**match.build_kwargs(data))
+        
+    async def get_player(self, player_id: str):
+        self.calls.append(player_id)
+        return {"id": player_id, "level": 1}
+        
+    async def update_player(self, player_id: str, data: dict = None):
+        return {"message": "Player updated successfully", "player_id": player_id, "data": data, "status": 200}
+        
+    async def get_recipes(self):
+        return [{"id": i, "name": f"菜谱{i}", "description": "美味" * 20} for i in range(500)]
+        
+    async def get_quests(self):
+        return self.quest_entry
+
+async def read_response(reader):
+    """读取一个HTTP响应，返回 (状态码, 头部, 解码后的响应体)"""
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+        
+    if headers.get("transfer-encoding") == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+    else:
+        body = await reader.readexactly(int(headers.get("content-length", "0")))
+        
+    if headers.get("content-encoding") == "gzip":
+        body = gzip.decompress(body)
+    return status, headers, body
+
+class TestHTTPFrontend(unittest.TestCase):
+    """HTTP前端测试类"""
+    
+    def run_with_server(self, scenario, **options):
+        """启动HTTP前端并运行测试场景"""
+        async def run():
+            self.api = DummyAPI()
+            frontend = HTTPFrontend(self.api, "127.0.0.1", 0, **options)
+            await frontend.start()
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", frontend.port)
+                result = await scenario(reader, writer)
+                writer.close()
+                return result, frontend.get_stats()
+            finally:
+                await frontend.stop()
+        return asyncio.run(run())
+        
+    def test_keep_alive(self):
+        """测试同一连接上的多个请求"""
+        async def scenario(reader, writer):
+            responses = []
+            for player_id in ("p1", "p2"):
+                writer.write(f"GET /api/players/{player_id} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+                responses.append(await read_response(reader))
+            return responses
+            
+        responses, stats = self.run_with_server(scenario)
+        
+        self.assertEqual([status for status, _, _ in responses], [200, 200])
+        self.assertEqual(json.loads(responses[1][2]), {"id": "p2", "level": 1})
+        self.assertEqual(responses[0][1]["connection"], "keep-alive")
+        self.assertEqual(stats["connections"], 1)
+        
+    def test_pipelining(self):
+        """测试流水线请求按顺序响应"""
+        async def scenario(reader, writer):
+            body = json.dumps({"level": 2}).encode()
+            writer.write(
+                b"GET /api/players/a HTTP/1.1\r\n\r\n"
+                b"PUT /api/players/b HTTP/1.1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body +
+                b"GET /api/unknown HTTP/1.1\r\n\r\n"
+                b"DELETE /api/players/c HTTP/1.1\r\nConnection: close\r\n\r\n"
+            )
+            return [await read_response(reader) for _ in range(4)]
+            
+        responses, _ = self.run_with_server(scenario)
+        
+        self.assertEqual([status for status, _, _ in responses], [200, 200, 404, 405])
+        self.assertEqual(json.loads(responses[1][2])["data"], {"level": 2})
+        self.assertEqual(responses[3][1]["connection"], "close")
+        
+    def test_chunked_gzip_response(self):
+        """测试大响应使用分块传输和gzip压缩"""
+        async def scenario(reader, writer):
+            writer.write(b"GET /api/recipes HTTP/1.1\r\nAccept-Encoding: gzip, deflate\r\n\r\n")
+            compressed = await read_response(reader)
+            writer.write(b"GET /api/recipes HTTP/1.1\r\n\r\n")
+            plain = await read_response(reader)
+            return compressed, plain
+            
+        (compressed, plain), stats = self.run_with_server(scenario, chunk_size=8 * 1024)
+        
+        self.assertEqual(compressed[1]["transfer-encoding"], "chunked")
+        self.assertEqual(compressed[1]["content-encoding"], "gzip")
+        self.assertNotIn("content-encoding", plain[1])
+        self.assertEqual(len(json.loads(compressed[2])), 500)
+        self.assertEqual(compressed[2], plain[2])
+        self.assertEqual(stats["chunked_responses"], 2)
+        
+    def test_etag_conditional_request(self):
+        """测试带ETag的目录响应和If-None-Match返回304"""
+        async def scenario(reader, writer):
+            writer.write(b"GET /api/quests HTTP/1.1\r\n\r\n")
+            first = await read_response(reader)
+            etag = first[1]["etag"]
+            writer.write(f"GET /api/quests HTTP/1.1\r\nIf-None-Match: {etag}\r\n\r\n".encode())
+            revalidated = await read_response(reader)
+            writer.write(b"GET /api/quests HTTP/1.1\r\nAccept-Encoding: gzip\r\n\r\n")
+            compressed = await read_response(reader)
+            writer.write(f"GET /api/quests HTTP/1.1\r\nAccept-Encoding: gzip\r\nIf-None-Match: W/{compressed[1]['etag']}\r\n\r\n".encode())
+            compressed_revalidated = await read_response(reader)
+            writer.write(b"GET /api/quests HTTP/1.1\r\nIf-None-Match: \"stale\"\r\n\r\n")
+            stale = await read_response(reader)
+            return first, revalidated, compressed, compressed_revalidated, stale
+            
+        (first, revalidated, compressed, compressed_revalidated, stale), stats = self.run_with_server(
+            scenario, cache_max_age=30)
+        entry = self.api.quest_entry
+        
+        self.assertEqual(first[0], 200)
+        self.assertEqual(first[1]["etag"], f'"{entry.version}"')
+        self.assertEqual(first[1]["cache-control"], "public, max-age=30")
+        self.assertEqual(json.loads(first[2]), entry.data)
+        self.assertEqual((revalidated[0], revalidated[2]), (304, b""))
+        self.assertEqual(revalidated[1]["etag"], first[1]["etag"])
+        self.assertNotEqual(compressed[1]["etag"], first[1]["etag"])
+        self.assertEqual(compressed[2], first[2])
+        self.assertEqual(compressed_revalidated[0], 304)
+        self.assertEqual(stale[0], 200)
+        self.assertEqual(stats["not_modified"], 2)
+        # 响应体每种表示只编码一次
+        self.assertEqual(sorted(entry.encoded_data), ["http_json", "http_json_gzip"])
+        
+    def test_chunked_request_body(self):
+        """测试分块编码的请求体"""
+        async def scenario(reader, writer):
+            writer.write(
+                b"PUT /api/players/p1 HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+                b"6\r\n{\"leve\r\n6\r\nl\": 3}\r\n0\r\n\r\n"
+            )
+            return await read_response(reader)
+            
+        (status, _, body), _ = self.run_with_server(scenario)
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["data"], {"level": 3})
+        
+    def test_query_string_not_used_as_body(self):
+        """测试查询参数只作为GET请求的数据，不会成为无请求体的PUT请求的数据"""
+        async def scenario(reader, writer):
+            writer.write(b"PUT /api/players/p1?level=9 HTTP/1.1\r\nContent-Length: 0\r\n\r\n")
+            return await read_response(reader)
+            
+        (status, _, body), _ = self.run_with_server(scenario)
+        
+        self.assertEqual(status, 200)
+        self.assertIsNone(json.loads(body)["data"])
+        
+    def test_bad_request_closes_connection(self):
+        """测试无效请求返回400并关闭连接"""
+        async def scenario(reader, writer):
+            writer.write(b"NOT A VALID REQUEST LINE\r\n\r\n")
+            response = await read_response(reader)
+            return response, await reader.read()
+            
+        ((status, headers, _), rest), _ = self.run_with_server(scenario)
+        
+        self.assertEqual(status, 400)
+        self.assertEqual(headers["connection"], "close")
+        self.assertEqual(rest, b"")
+
+if __name__ == '__main__':
+    unittest.main()
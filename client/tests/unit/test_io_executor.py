@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+存储I/O线程池单元测试
+测试StorageIOExecutor的专用线程、排队等待与执行时间统计，以及DAO的读写字节数统计
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+import tempfile
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.io_executor import StorageIOExecutor
+from server.dao.data_access import BusinessDAO, PlayerDAO
+from server.backend.dao import RecipeDAO
+from server.utils.catalog_cache import CatalogResponseCache
+from server.utils.mutation_journal import MutationJournal
+
+class TestIOExecutor(unittest.TestCase):
+    """存储I/O线程池测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.io = StorageIOExecutor(max_workers=2)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.io.shutdown()
+        self.temp_dir.cleanup()
+
+    def test_runs_on_dedicated_threads(self):
+        """测试操作在专用线程池中执行"""
+        async def run():
+            return await self.io.run(None, "name", lambda: threading.current_thread().name)
+
+        self.assertTrue(asyncio.run(run()).startswith("storage-io"))
+
+    def test_queue_wait_separated_from_service_time(self):
+        """测试线程池占满时排队时间计入queue_wait，执行时间计入service"""
+        async def run():
+            metrics = self.io.metrics_for("SlowDAO")
+            await asyncio.gather(*(self.io.run(metrics, "read", time.sleep, 0.05) for _ in range(4)))
+            return self.io.get_stats()
+
+        stats = asyncio.run(run())
+        dao_stats = stats["daos"]["SlowDAO"]
+
+        self.assertEqual(stats["max_workers"], 2)
+        self.assertEqual(stats["peak_in_flight"], 4)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(dao_stats["service"]["read"]["count"], 4)
+        self.assertGreaterEqual(dao_stats["service"]["read"]["max_ms"], 45)
+        # 后两个操作要等前两个执行完
+        self.assertGreaterEqual(dao_stats["queue_wait"]["max_ms"], 40)
+
+    def test_errors_recorded(self):
+        """测试失败的操作计入错误数并把异常抛给调用者"""
+        async def run():
+            metrics = self.io.metrics_for("BrokenDAO")
+            with self.assertRaises(FileNotFoundError):
+                await self.io.run(metrics, "read", open, os.path.join(self.temp_dir.name, "missing.json"))
+            return metrics.get_stats()
+
+        self.assertEqual(asyncio.run(run())["service"]["read"]["errors"], 1)
+
+    def test_dao_bytes_counted(self):
+        """测试DAO读写字节数和操作次数按DAO类型统计"""
+        async def run():
+            business_dao = BusinessDAO(self.temp_dir.name, io_executor=self.io)
+            await business_dao.save_business_data("p1", {"revenue": 100})
+            data = await business_dao.get_business_data("p1")
+            player_dao = PlayerDAO(self.temp_dir.name, flush_interval=60, io_executor=self.io)
+            await player_dao.create_player("p1", {"level": 1})
+            await player_dao.flush_all()
+            return data, self.io.get_stats()["daos"]
+
+        data, daos = asyncio.run(run())
+        file_size = os.path.getsize(os.path.join(self.temp_dir.name, "business_p1.json"))
+
+        self.assertEqual(data["revenue"], 100)
+        self.assertEqual(daos["BusinessDAO"]["bytes_written"], file_size)
+        self.assertEqual(daos["BusinessDAO"]["bytes_read"], file_size)
+        self.assertEqual(daos["BusinessDAO"]["service"]["write"]["count"], 1)
+        self.assertIn("journal_append", daos["PlayerDAO"]["service"])
+        self.assertIn("journal_compact", daos["PlayerDAO"]["service"])
+        self.assertGreater(daos["PlayerDAO"]["bytes_written"], 0)
+
+    def test_catalog_refresh_and_journal_use_storage_pool(self):
+        """测试目录重新加载和变更日志读写在存储I/O线程池中执行，并记录到所属DAO的统计"""
+        with open(os.path.join(self.temp_dir.name, "recipes.json"), 'w', encoding='utf-8') as f:
+            f.write('[{"id": 1}]')
+
+        async def run():
+            recipe_dao = RecipeDAO(self.temp_dir.name, cache=CatalogResponseCache(), io_executor=self.io)
+            recipes = await recipe_dao.get_recipes()
+            journal = MutationJournal(io_executor=self.io)
+            await journal.write(os.path.join(self.temp_dir.name, "player_p1.json"), {"level": 1})
+            await journal.close()
+            return recipes, self.io.get_stats()["daos"]
+
+        recipes, daos = asyncio.run(run())
+
+        self.assertEqual(recipes, [{"id": 1}])
+        self.assertEqual(daos["RecipeDAO"]["service"]["catalog_refresh"]["count"], 1)
+        self.assertEqual(daos["RecipeDAO"]["bytes_read"], len('[{"id": 1}]'))
+        self.assertIn("journal_append", daos["MutationJournal"]["service"])
+
+if __name__ == '__main__':
+    unittest.main()
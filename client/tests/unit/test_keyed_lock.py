@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+按键加锁单元测试
+测试KeyedLockManager的同键串行、异键并行、空闲键清理和等待时间统计，以及服务层加经验不丢失更新
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(ROOT_DIR)
+
+from server.utils.keyed_lock import KeyedLockManager
+from server.backend import services
+
+class TestKeyedLock(unittest.TestCase):
+    """按键加锁测试类"""
+
+    def test_same_key_serialized(self):
+        """测试同一键的临界区不会交错执行"""
+        async def run():
+            locks = KeyedLockManager()
+            events = []
+
+            async def worker(name):
+                async with locks.lock("p1"):
+                    events.append(("enter", name))
+                    await asyncio.sleep(0.01)
+                    events.append(("exit", name))
+
+            await asyncio.gather(worker("a"), worker("b"), worker("c"))
+            return events, locks.get_stats()
+
+        events, stats = asyncio.run(run())
+
+        for index in range(0, len(events), 2):
+            self.assertEqual(events[index][0], "enter")
+            self.assertEqual(events[index + 1], ("exit", events[index][1]))
+        self.assertEqual(stats["acquisitions"], 3)
+        self.assertEqual(stats["contended"], 2)
+        self.assertEqual(stats["wait"]["count"], 3)
+        self.assertGreater(stats["wait"]["max_ms"], 5)
+
+    def test_different_keys_parallel(self):
+        """测试不同键的临界区可以同时执行"""
+        async def run():
+            locks = KeyedLockManager(stripes=1)
+            inside = []
+            peak = [0]
+
+            async def worker(key):
+                async with locks.lock(key):
+                    inside.append(key)
+                    peak[0] = max(peak[0], len(inside))
+                    await asyncio.sleep(0.01)
+                    inside.remove(key)
+
+            await asyncio.gather(*(worker(f"p{i}") for i in range(10)))
+            return peak[0], locks.get_stats()
+
+        peak, stats = asyncio.run(run())
+
+        self.assertEqual(peak, 10)
+        self.assertEqual(stats["contended"], 0)
+
+    def test_idle_keys_cleaned(self):
+        """测试没有持有者和等待者的键从锁表中删除，包括等待时被取消的情况"""
+        async def run():
+            locks = KeyedLockManager()
+            async with locks.lock("p1"):
+                waiter = asyncio.ensure_future(locks.lock("p1").__aenter__())
+                await asyncio.sleep(0)
+                waiter.cancel()
+                await asyncio.gather(waiter, return_exceptions=True)
+                held = locks.is_locked("p1")
+            return held, locks.get_stats()
+
+        held, stats = asyncio.run(run())
+
+        self.assertTrue(held)
+        self.assertEqual(stats["active_keys"], 0)
+        self.assertEqual(stats["acquisitions"], 1)
+
+    def test_add_experience_no_lost_updates(self):
+        """测试同一玩家并发加经验时不会丢失更新"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            async def run():
+                player_dao = services.player_dao
+                original_dir = player_dao.data_dir
+                player_dao.data_dir = temp_dir
+                try:
+                    await player_dao.create_player("p1", {"experience": 0})
+                    await asyncio.gather(*(services.player_service.add_experience("p1", 10) for _ in range(20)))
+                    return (await player_dao.get_player("p1"))["experience"]
+                finally:
+                    await player_dao.flush_all()
+                    player_dao.data_dir = original_dir
+
+            self.assertEqual(asyncio.run(run()), 200)
+
+if __name__ == '__main__':
+    unittest.main()
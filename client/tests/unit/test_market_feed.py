@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+市场价格推送单元测试
+测试MarketFeed的快照、增量合并和序号功能
+"""
+
+import sys
+import os
+import asyncio
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.market_feed import MarketFeed
+
+class TestMarketFeed(unittest.TestCase):
+    """市场价格推送测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.items = [
+            {"id": 1, "name": "优质面粉", "current_price": 50, "price_trend": "stable", "stock": 100},
+            {"id": 2, "name": "新鲜草莓", "current_price": 30, "price_trend": "stable", "stock": 200}
+        ]
+        self.feed = MarketFeed(lambda: [dict(item) for item in self.items], interval=0.01)
+        
+    def test_subscribe_returns_snapshot(self):
+        """测试订阅时返回快照"""
+        snapshot = self.feed.subscribe("client1")
+        
+        self.assertEqual(snapshot["seq"], 0)
+        self.assertEqual(len(snapshot["items"]), 2)
+        self.assertIn("client1", self.feed.subscribers)
+        
+    def test_delta_contains_only_changed_items(self):
+        """测试增量只包含价格或趋势变化的商品"""
+        self.feed.subscribe("client1")
+        self.items[0]["current_price"] = 55
+        self.items[0]["price_trend"] = "rising"
+        self.items[1]["stock"] = 150  # 库存变化不参与比较
+        
+        delta = self.feed.compute_delta()
+        
+        self.assertEqual(delta, {
+            "seq": 1,
+            "items": [{"id": 1, "current_price": 55, "price_trend": "rising"}]
+        })
+        self.assertIsNone(self.feed.compute_delta())
+        
+    def test_changes_between_ticks_are_coalesced(self):
+        """测试推送间隔内的多次变化合并为一条增量"""
+        self.feed.subscribe("client1")
+        self.items[1]["current_price"] = 31
+        self.items[1]["current_price"] = 32
+        self.items[1]["current_price"] = 33
+        
+        delta = self.feed.compute_delta()
+        
+        self.assertEqual(delta["items"], [{"id": 2, "current_price": 33, "price_trend": "stable"}])
+        self.assertEqual(self.feed.snapshot()["seq"], 1)
+        
+    def test_added_and_removed_items(self):
+        """测试商品上架和下架"""
+        self.feed.subscribe("client1")
+        self.items.pop(0)
+        self.items.append({"id": 3, "name": "黄油", "current_price": 20, "price_trend": "stable", "stock": 50})
+        
+        delta = self.feed.compute_delta()
+        
+        self.assertEqual(delta["items"], [self.items[1]])
+        self.assertEqual(delta["removed"], [1])
+        
+    def test_publish_loop(self):
+        """测试推送循环只向订阅者发布增量"""
+        published = []
+        
+        def tick():
+            self.items[0]["current_price"] += 1
+            
+        async def run():
+            feed = MarketFeed(lambda: [dict(item) for item in self.items], tick=tick, interval=0.01)
+            feed.subscribe("client1")
+            feed.start(lambda recipients, message: published.append((recipients, message)))
+            await asyncio.sleep(0.05)
+            feed.stop()
+            
+        asyncio.run(run())
+        
+        self.assertTrue(published)
+        recipients, message = published[0]
+        self.assertEqual(recipients, {"client1"})
+        self.assertEqual(message["type"], "market_delta")
+        self.assertEqual([message["data"]["seq"] for _, message in published], list(range(1, len(published) + 1)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+消息分发器单元测试
+测试MessageDispatcher与LatencyHistogram的功能
+"""
+
+import sys
+import os
+import asyncio
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.message_dispatcher import MessageDispatcher, message_handler
+from server.utils.metrics import LatencyHistogram
+
+class DummyServer:
+    """测试用服务器"""
+    
+    @message_handler("echo")
+    async def echo(self, data):
+        return {"type": "echo", "data": data}
+        
+    @message_handler("whoami", pass_websocket=True)
+    async def whoami(self, websocket, data):
+        return {"type": "whoami", "data": websocket}
+        
+    @message_handler("fail")
+    async def fail(self, data):
+        return {"type": "error", "data": {"code": "FAILED"}}
+        
+    @message_handler("boom")
+    async def boom(self, data):
+        raise ValueError("boom")
+        
+    @message_handler("write", ordered=True)
+    async def write(self, data):
+        await asyncio.sleep(data["delay"])
+        self.writes.append(data["value"])
+        return {"type": "written", "data": list(self.writes)}
+        
+    def __init__(self):
+        self.writes = []
+
+class TestMessageDispatcher(unittest.TestCase):
+    """消息分发器测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.dispatcher = MessageDispatcher(DummyServer())
+        
+    def test_collect_handlers(self):
+        """测试收集被标记的处理器"""
+        self.assertTrue(self.dispatcher.has_handler("echo"))
+        self.assertTrue(self.dispatcher.has_handler("whoami"))
+        self.assertFalse(self.dispatcher.has_handler("unknown"))
+        
+    def test_dispatch(self):
+        """测试分发消息"""
+        response = asyncio.run(self.dispatcher.dispatch("echo", None, {"value": 1}))
+        self.assertEqual(response, {"type": "echo", "data": {"value": 1}})
+        
+        response = asyncio.run(self.dispatcher.dispatch("whoami", "ws", {}))
+        self.assertEqual(response["data"], "ws")
+        
+    def test_error_counting(self):
+        """测试错误计数"""
+        asyncio.run(self.dispatcher.dispatch("echo", None, {}))
+        asyncio.run(self.dispatcher.dispatch("fail", None, {}))
+        with self.assertRaises(ValueError):
+            asyncio.run(self.dispatcher.dispatch("boom", None, {}))
+            
+        stats = self.dispatcher.get_stats()
+        self.assertEqual(stats["echo"]["count"], 1)
+        self.assertEqual(stats["echo"]["errors"], 0)
+        self.assertEqual(stats["fail"]["errors"], 1)
+        self.assertEqual(stats["boom"]["errors"], 1)
+
+    def test_dispatch_batch(self):
+        """测试批量分发"""
+        requests = [
+            {"type": "echo", "data": {"value": 1}, "request_id": "a"},
+            {"type": "unknown"},
+            {"type": "boom"},
+            {"type": "batch"}
+        ]
+        results = asyncio.run(self.dispatcher.dispatch_batch(None, requests))
+        
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0]["type"], "echo")
+        self.assertEqual(results[0]["request_id"], "a")
+        self.assertEqual(results[0]["data"], {"value": 1})
+        self.assertEqual(results[1]["data"]["code"], "UNKNOWN_MESSAGE_TYPE")
+        self.assertEqual(results[2]["data"]["code"], "INTERNAL_ERROR")
+        self.assertEqual(results[3]["data"]["code"], "UNKNOWN_MESSAGE_TYPE")
+        
+    def test_dispatch_batch_keeps_ordered_items_in_order(self):
+        """测试批次中的有序子请求按顺序执行"""
+        requests = [
+            {"type": "write", "data": {"value": 1, "delay": 0.02}},
+            {"type": "write", "data": {"value": 2, "delay": 0.0}}
+        ]
+        results = asyncio.run(self.dispatcher.dispatch_batch(None, requests))
+        self.assertEqual(results[1]["data"], [1, 2])
+
+class TestLatencyHistogram(unittest.TestCase):
+    """延迟直方图测试类"""
+    
+    def test_percentiles(self):
+        """测试百分位估算"""
+        histogram = LatencyHistogram([1, 10, 100])
+        for _ in range(90):
+            histogram.observe(0.5)
+        for _ in range(10):
+            histogram.observe(50)
+            
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 1)
+        self.assertEqual(histogram.percentile(99), 50)
+        self.assertEqual(histogram.to_dict()["buckets"]["le_100"], 10)
+        
+    def test_overflow_bucket(self):
+        """测试超出最大分桶的样本"""
+        histogram = LatencyHistogram([1, 10])
+        histogram.observe(500)
+        self.assertEqual(histogram.to_dict()["buckets"]["inf"], 1)
+        self.assertEqual(histogram.percentile(99), 500)
+
+if __name__ == '__main__':
+    unittest.main()
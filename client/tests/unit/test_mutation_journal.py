@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+变更日志单元测试
+测试差异计算与重放、日志追加的写入量、快照压缩以及PlayerDAO经过变更日志的读写
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.mutation_journal import MutationJournal, diff_documents, apply_ops
+from server.dao.data_access import PlayerDAO
+
+def make_player():
+    """生成带背包和任务列表的玩家存档"""
+    return {
+        "id": "p1",
+        "experience": 100,
+        "stats": {"gold": 10, "gems": 1},
+        "inventory": [{"item_id": i, "quantity": 1} for i in range(50)],
+        "active_quests": [{"id": "q1", "status": "active"}]
+    }
+
+class TestMutationJournal(unittest.TestCase):
+    """变更日志测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.player_path = os.path.join(self.temp_dir.name, "player_p1.json")
+
+    def tearDown(self):
+        """测试后清理"""
+        self.temp_dir.cleanup()
+
+    def test_diff_records_only_changes(self):
+        """测试差异只包含修改的字段和追加的列表元素"""
+        old = make_player()
+        new = make_player()
+        new["experience"] += 10
+        new["stats"]["gold"] = 20
+        del new["stats"]["gems"]
+        new["active_quests"].append({"id": "q2", "status": "active"})
+
+        ops = diff_documents(old, new)
+
+        self.assertEqual(ops, [
+            {"op": "set", "path": ["experience"], "value": 110},
+            {"op": "set", "path": ["stats", "gold"], "value": 20},
+            {"op": "unset", "path": ["stats", "gems"]},
+            {"op": "append", "path": ["active_quests"], "index": 1, "value": [{"id": "q2", "status": "active"}]}
+        ])
+        self.assertEqual(apply_ops(old, ops), new)
+
+    def test_replay_is_idempotent(self):
+        """测试同一组操作重放两次结果不变（折叠中途崩溃后重放）"""
+        base = make_player()
+        new = make_player()
+        new["active_quests"].append({"id": "q2"})
+        new["experience"] = 200
+        ops = diff_documents(base, new)
+
+        twice = apply_ops(apply_ops(make_player(), ops), ops)
+
+        self.assertEqual(twice, new)
+
+    def test_append_size_tracks_change_not_document(self):
+        """测试写入量与修改大小相关，而不是整份文档"""
+        async def run():
+            journal = MutationJournal(fsync=False)
+            player = make_player()
+            await journal.write(self.player_path, player)
+            full_bytes = journal.stats["bytes_appended"]
+            player["experience"] += 10
+            await journal.write(self.player_path, player)
+            await journal.write(self.player_path, player)
+            delta_bytes = journal.stats["bytes_appended"] - full_bytes
+            loaded = await MutationJournal().load(self.player_path)
+            return full_bytes, delta_bytes, journal.stats["appends"], loaded
+
+        full_bytes, delta_bytes, appends, loaded = asyncio.run(run())
+
+        self.assertEqual(appends, 2)
+        self.assertLess(delta_bytes * 10, full_bytes)
+        self.assertEqual(loaded["experience"], 110)
+        self.assertFalse(os.path.exists(self.player_path))
+
+    def test_compaction_folds_into_snapshot(self):
+        """测试压缩把日志折叠进快照并删除日志"""
+        async def run():
+            journal = MutationJournal(fsync=False)
+            player = make_player()
+            await journal.write(self.player_path, player)
+            player["stats"]["gold"] = 99
+            await journal.write(self.player_path, player)
+            written = await journal.close()
+            return written, journal.journal_path(self.player_path)
+
+        written, journal_path = asyncio.run(run())
+        with open(self.player_path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+
+        self.assertEqual(written, 1)
+        self.assertEqual(snapshot["stats"]["gold"], 99)
+        self.assertFalse(os.path.exists(journal_path))
+        self.assertFalse(os.path.exists(journal_path + ".old"))
+
+    def test_interrupted_compaction_replays_old_journal(self):
+        """测试上次压缩留下的.old日志在加载和下次压缩时都会重放"""
+        async def run():
+            journal = MutationJournal(fsync=False)
+            player = make_player()
+            await journal.write(self.player_path, player)
+            player["experience"] = 500
+            await journal.write(self.player_path, player)
+            journal_path = journal.journal_path(self.player_path)
+            os.replace(journal_path, journal_path + ".old")
+            loaded = await MutationJournal().load(self.player_path)
+            await MutationJournal().compact_directory(self.temp_dir.name)
+            return loaded
+
+        loaded = asyncio.run(run())
+        with open(self.player_path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+
+        self.assertEqual(loaded["experience"], 500)
+        self.assertEqual(snapshot, loaded)
+
+    def test_player_dao_delete(self):
+        """测试删除玩家后重新加载不会从日志中恢复"""
+        async def run():
+            player_dao = PlayerDAO(self.temp_dir.name, flush_interval=60)
+            await player_dao.create_player("p1", make_player())
+            await player_dao.cache.flush_all()
+            deleted = await player_dao.delete_player("p1")
+            reloaded = await PlayerDAO(self.temp_dir.name).get_player("p1")
+            await player_dao.flush_all()
+            return deleted, reloaded
+
+        deleted, reloaded = asyncio.run(run())
+
+        self.assertTrue(deleted)
+        self.assertIsNone(reloaded)
+        self.assertFalse(os.path.exists(self.player_path))
+
+    def test_player_dao_flush_uses_group_commit(self):
+        """测试PlayerDAO关闭时各分片压缩出的存档经组提交写入器按批写入和刷盘"""
+        async def run():
+            player_dao = PlayerDAO(self.temp_dir.name, flush_interval=60, journal_shards=4)
+            for i in range(8):
+                await player_dao.create_player(f"p{i}", {"level": i})
+            failed = await player_dao.flush_all()
+            return failed, player_dao.group_commit.get_stats()
+
+        failed, stats = asyncio.run(run())
+        with open(os.path.join(self.temp_dir.name, "player_p7.json"), 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+
+        self.assertEqual(failed, 0)
+        self.assertEqual(stats["files_written"], 8)
+        # 每个分片的存档一起提交，批次数不超过分片数（并发压缩的分片通常合并为同一批）
+        self.assertLessEqual(stats["batches"], 4)
+        self.assertEqual(snapshot["level"], 7)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+路径模板路由单元测试
+测试PathRouter的参数提取、类型转换和方法匹配功能
+"""
+
+import sys
+import os
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.path_router import PathRouter
+
+class TestPathRouter(unittest.TestCase):
+    """路径模板路由测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.router = PathRouter()
+        
+        async def get_player(player_id: str):
+            return player_id
+            
+        async def update_player(player_id: str, data: dict):
+            return player_id, data
+            
+        async def get_recipe(recipe_id: int):
+            return recipe_id
+            
+        async def complete_quest(quest_data: dict):
+            return quest_data
+            
+        async def get_quest(quest_id: str = None):
+            return quest_id
+            
+        self.router.add("GET", "/api/players/{player_id}", get_player)
+        self.router.add("PUT", "/api/players/{player_id}", update_player)
+        self.router.add("GET", "/api/recipes/{recipe_id:int}", get_recipe)
+        self.router.add("POST", "/api/quests/complete", complete_quest)
+        self.router.add("GET", "/api/quests/{quest_id}", get_quest)
+        
+    def test_extract_params(self):
+        """测试提取路径参数"""
+        match = self.router.match("GET", "/api/players/p%201?fields=name")
+        
+        self.assertIsNotNone(match)
+        self.assertEqual(match.params, {"player_id": "p 1"})
+        self.assertEqual(match.build_kwargs(), {"player_id": "p 1"})
+        
+    def test_body_param(self):
+        """测试请求体作为剩余参数传入"""
+        match = self.router.match("put", "/api/players/p1/")
+        self.assertEqual(match.build_kwargs({"gold": 1}), {"player_id": "p1", "data": {"gold": 1}})
+        
+        match = self.router.match("POST", "/api/quests/complete")
+        self.assertEqual(match.build_kwargs({"quest_id": "q1"}), {"quest_data": {"quest_id": "q1"}})
+        
+    def test_typed_params(self):
+        """测试参数类型转换"""
+        self.assertEqual(self.router.match("GET", "/api/recipes/42").params, {"recipe_id": 42})
+        self.assertIsNone(self.router.match("GET", "/api/recipes/abc"))
+        
+    def test_literal_and_param_fallback(self):
+        """测试字面段优先，方法不匹配时回退到参数段"""
+        self.assertEqual(self.router.match("POST", "/api/quests/complete").route.template, "/api/quests/complete")
+        self.assertEqual(self.router.match("GET", "/api/quests/complete").params, {"quest_id": "complete"})
+        
+    def test_not_found_and_method_not_allowed(self):
+        """测试路径不存在和方法不支持"""
+        self.assertIsNone(self.router.match("GET", "/api/unknown"))
+        self.assertEqual(self.router.allowed_methods("/api/unknown"), [])
+        self.assertIsNone(self.router.match("DELETE", "/api/players/p1"))
+        self.assertEqual(self.router.allowed_methods("/api/players/p1"), ["GET", "PUT"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+存档编码单元测试
+测试各种存档编码的往返、格式自动识别、旧存档兼容、DAO读写压缩存档以及配置文件不受存档编码影响
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.save_codec import (
+    SAVE_ENCODINGS, SAVE_JSON, SAVE_COMPACT, SAVE_ZLIB, SAVE_GZIP, MAGIC,
+    encode_save, decode_save, detect_encoding, set_save_encoding, get_save_encoding
+)
+from server.dao.data_access import BusinessDAO
+from server.backend.dao import RecipeDAO
+from server.utils.catalog_cache import CatalogResponseCache
+
+PLAYER = {"id": "p1", "name": "玩家", "inventory": [{"item_id": i, "quantity": 2} for i in range(10)]}
+
+class TestSaveCodec(unittest.TestCase):
+    """存档编码测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.original_encoding = get_save_encoding()
+
+    def tearDown(self):
+        """测试后清理"""
+        set_save_encoding(self.original_encoding)
+
+    def test_round_trip(self):
+        """测试每种编码都能原样解码"""
+        for encoding in SAVE_ENCODINGS:
+            with self.subTest(encoding=encoding):
+                self.assertEqual(decode_save(encode_save(PLAYER, encoding)), PLAYER)
+
+    def test_format_detection(self):
+        """测试压缩格式带文件头，JSON格式仍然是普通JSON"""
+        self.assertEqual(detect_encoding(encode_save(PLAYER, SAVE_ZLIB)), SAVE_ZLIB)
+        self.assertEqual(detect_encoding(encode_save(PLAYER, SAVE_GZIP)), SAVE_GZIP)
+        self.assertTrue(encode_save(PLAYER, SAVE_GZIP).startswith(MAGIC))
+        self.assertEqual(json.loads(encode_save(PLAYER, SAVE_COMPACT)), PLAYER)
+        self.assertNotIn(b"\n", encode_save(PLAYER, SAVE_COMPACT))
+
+    def test_legacy_json_readable(self):
+        """测试原来的缩进JSON存档可以直接读取"""
+        legacy = json.dumps(PLAYER, indent=2, ensure_ascii=False).encode("utf-8")
+
+        self.assertEqual(legacy, encode_save(PLAYER, SAVE_JSON))
+        self.assertEqual(decode_save(legacy), PLAYER)
+
+    def test_unknown_format_rejected(self):
+        """测试未知的格式字节和编码名称报错"""
+        with self.assertRaises(ValueError):
+            decode_save(MAGIC + b"\x09payload")
+        with self.assertRaises(ValueError):
+            set_save_encoding("brotli")
+
+    def test_dao_reads_mixed_formats(self):
+        """测试DAO按默认编码写入，并能读取其他格式的存档"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, "business_old.json"), 'w', encoding='utf-8') as f:
+                json.dump({"revenue": 1}, f, indent=2)
+
+            async def run():
+                set_save_encoding(SAVE_GZIP)
+                business_dao = BusinessDAO(temp_dir)
+                await business_dao.save_business_data("new", {"revenue": 2})
+                return await business_dao.get_business_data("old"), await business_dao.get_business_data("new")
+
+            old, new = asyncio.run(run())
+            with open(os.path.join(temp_dir, "business_new.json"), 'rb') as f:
+                header = f.read(len(MAGIC) + 1)
+
+        self.assertEqual(old, {"revenue": 1})
+        self.assertEqual(new["revenue"], 2)
+        self.assertEqual(detect_encoding(header), SAVE_GZIP)
+
+    def test_catalog_files_stay_plain_json(self):
+        """测试压缩存档编码下配置文件仍写成缩进的JSON，目录可以正常读取"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            recipes_path = os.path.join(temp_dir, "recipes.json")
+            with open(recipes_path, 'w', encoding='utf-8') as f:
+                json.dump([{"id": 1, "name": "蛋炒饭"}], f, ensure_ascii=False, indent=2)
+
+            async def run():
+                set_save_encoding(SAVE_ZLIB)
+                recipe_dao = RecipeDAO(temp_dir, cache=CatalogResponseCache(check_interval=0))
+                await recipe_dao.add_recipe({"id": 2, "name": "番茄炒蛋"})
+                return await recipe_dao.get_recipes()
+
+            recipes = asyncio.run(run())
+            with open(recipes_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+
+        self.assertEqual([recipe["id"] for recipe in recipes], [1, 2])
+        self.assertEqual(json.loads(text)[1]["name"], "番茄炒蛋")
+        self.assertIn("\n  ", text)
+
+if __name__ == '__main__':
+    unittest.main()
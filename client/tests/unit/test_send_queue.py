@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+客户端发送队列单元测试
+测试ClientSendQueue的溢出策略
+"""
+
+import sys
+import os
+import asyncio
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.send_queue import ClientSendQueue
+
+class FakeWebSocket:
+    """测试用连接，发送会一直阻塞直到被放行"""
+    
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+        self.release = asyncio.Event()
+        
+    async def send(self, payload):
+        await self.release.wait()
+        self.sent.append(payload)
+        
+    async def close(self, code=1000, reason=""):
+        self.closed = True
+
+class TestClientSendQueue(unittest.TestCase):
+    """客户端发送队列测试类"""
+    
+    def test_drop_oldest_push(self):
+        """测试丢弃最早的推送"""
+        async def scenario():
+            websocket = FakeWebSocket()
+            send_queue = ClientSendQueue(websocket, max_size=3)
+            send_queue.put("response", droppable=False)
+            send_queue.put("chat_1", droppable=True)
+            send_queue.put("chat_2", droppable=True)
+            send_queue.put("chat_3", droppable=True)
+            
+            send_queue.start()
+            websocket.release.set()
+            await asyncio.sleep(0.01)
+            send_queue.close()
+            return websocket.sent, send_queue.get_stats()
+            
+        sent, stats = asyncio.run(scenario())
+        self.assertEqual(sent, ["response", "chat_2", "chat_3"])
+        self.assertEqual(stats["dropped"], 1)
+        self.assertEqual(stats["peak_depth"], 3)
+        
+    def test_coalesce(self):
+        """测试合并相同键的推送"""
+        async def scenario():
+            send_queue = ClientSendQueue(FakeWebSocket(), max_size=2, overflow_policy="coalesce")
+            send_queue.put("market_v1", droppable=True, coalesce_key="market")
+            send_queue.put("chat", droppable=True)
+            send_queue.put("market_v2", droppable=True, coalesce_key="market")
+            return [entry[0] for entry in send_queue.queue], send_queue.get_stats()
+            
+        queued, stats = asyncio.run(scenario())
+        self.assertEqual(queued, ["chat", "market_v2"])
+        self.assertEqual(stats["coalesced"], 1)
+        
+    def test_disconnect_slow_consumer(self):
+        """测试驱逐慢速客户端"""
+        async def scenario():
+            websocket = FakeWebSocket()
+            send_queue = ClientSendQueue(websocket, max_size=1, overflow_policy="disconnect")
+            send_queue.put("first")
+            accepted = send_queue.put("second")
+            await asyncio.sleep(0)
+            return accepted, websocket.closed, send_queue.get_stats()
+            
+        accepted, closed, stats = asyncio.run(scenario())
+        self.assertFalse(accepted)
+        self.assertTrue(closed)
+        self.assertTrue(stats["evicted"])
+        
+    def test_invalid_policy(self):
+        """测试未知的溢出策略"""
+        # 只检查构造参数，不需要事件循环，传入普通对象代替连接
+        with self.assertRaises(ValueError):
+            ClientSendQueue(object(), overflow_policy="unknown")
+
+if __name__ == '__main__':
+    unittest.main()
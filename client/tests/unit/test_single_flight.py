@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+读取合并单元测试
+测试SingleFlight的并发合并、结果隔离、取消与写入后重新读取，以及BaseDAO和写回缓存的读取合并
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.utils.single_flight import SingleFlight
+from server.utils.write_behind_cache import WriteBehindCache
+from server.dao.data_access import BaseDAO
+
+class CountingReader:
+    """测试用读取函数，记录实际读取次数"""
+
+    def __init__(self, value, delay=0.01):
+        self.value = value
+        self.delay = delay
+        self.reads = 0
+
+    async def read(self, *args):
+        self.reads += 1
+        value = json.loads(json.dumps(self.value))
+        await asyncio.sleep(self.delay)
+        return value
+
+class TestSingleFlight(unittest.TestCase):
+    """读取合并测试类"""
+
+    def test_concurrent_reads_share_one_flight(self):
+        """测试并发读取同一个键只读取一次，不同键分别读取"""
+        async def run():
+            flight = SingleFlight()
+            reader = CountingReader({"level": 1})
+            results = await asyncio.gather(
+                *(flight.do("p1", reader.read) for _ in range(10)),
+                flight.do("p2", reader.read)
+            )
+            return reader.reads, results, flight.get_stats()
+
+        reads, results, stats = asyncio.run(run())
+
+        self.assertEqual(reads, 2)
+        self.assertTrue(all(result == {"level": 1} for result in results))
+        self.assertEqual(stats["calls"], 11)
+        self.assertEqual(stats["hits"], 9)
+        self.assertEqual(stats["coalesced"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_shared_results_are_isolated(self):
+        """测试共用读取的调用者得到独立的副本"""
+        async def run():
+            flight = SingleFlight()
+            reader = CountingReader({"items": [1, 2]})
+            first, second = await asyncio.gather(flight.do("p1", reader.read), flight.do("p1", reader.read))
+            first["items"].append(3)
+            return second
+
+        self.assertEqual(asyncio.run(run()), {"items": [1, 2]})
+
+    def test_cancelled_caller_does_not_cancel_read(self):
+        """测试一个调用者被取消时其他调用者仍然得到结果"""
+        async def run():
+            flight = SingleFlight()
+            reader = CountingReader("data")
+            first = asyncio.ensure_future(flight.do("p1", reader.read))
+            second = asyncio.ensure_future(flight.do("p1", reader.read))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second, reader.reads
+
+        self.assertEqual(asyncio.run(run()), ("data", 1))
+
+    def test_forget_starts_new_read(self):
+        """测试forget之后的调用者发起新的读取"""
+        async def run():
+            flight = SingleFlight()
+            reader = CountingReader("old")
+            first = asyncio.ensure_future(flight.do("p1", reader.read))
+            while reader.reads == 0:
+                await asyncio.sleep(0)
+            flight.forget("p1")
+            reader.value = "new"
+            second = await flight.do("p1", reader.read)
+            return await first, second, reader.reads
+
+        self.assertEqual(asyncio.run(run()), ("old", "new", 2))
+
+    def test_errors_propagate_to_all_callers(self):
+        """测试读取失败时所有调用者都收到异常，之后可以重新读取"""
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise IOError("disk error")
+
+        async def run():
+            flight = SingleFlight()
+            results = await asyncio.gather(flight.do("p1", failing), flight.do("p1", failing), return_exceptions=True)
+            return results, len(flight.in_flight)
+
+        results, in_flight = asyncio.run(run())
+
+        self.assertTrue(all(isinstance(result, IOError) for result in results))
+        self.assertEqual(in_flight, 0)
+
+    def test_base_dao_coalesces_file_reads(self):
+        """测试BaseDAO并发读取同一文件只在executor中读取一次"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "player_p1.json")
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump({"level": 3}, f)
+
+            async def run():
+                dao = BaseDAO(temp_dir)
+                reads = []
+                original = dao._sync_read_file
+
+                def counting_read(path):
+                    reads.append(path)
+                    return original(path)
+
+                dao._sync_read_file = counting_read
+                results = await asyncio.gather(*(dao._read_file(file_path) for _ in range(20)))
+                return results, len(reads)
+
+            results, reads = asyncio.run(run())
+
+        self.assertEqual(reads, 1)
+        self.assertTrue(all(result == {"level": 3} for result in results))
+
+    def test_write_behind_cache_coalesces_misses(self):
+        """测试写回缓存的并发未命中只加载一次"""
+        async def run():
+            reader = CountingReader({"exp": 5})
+            cache = WriteBehindCache(reader.read, None, flush_interval=60)
+            results = await asyncio.gather(*(cache.get("p1") for _ in range(10)))
+            results[0]["exp"] = 99
+            return reader.reads, results[1], cache.get_stats()["load_hits"]
+
+        reads, second, load_hits = asyncio.run(run())
+
+        self.assertEqual(reads, 1)
+        self.assertEqual(second, {"exp": 5})
+        self.assertEqual(load_hits, 9)
+
+if __name__ == '__main__':
+    unittest.main()
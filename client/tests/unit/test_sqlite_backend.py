@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SQLite存储后端单元测试
+测试SQLiteStorage、SQLite DAO、存档迁移工具和存储后端配置
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from server.dao.sqlite_backend import (
+    SQLiteStorage, SQLitePlayerDAO, SQLiteBusinessDAO, SQLiteRecipeDAO
+)
+from server.dao.migrate_to_sqlite import migrate
+from server.dao.storage_config import get_storage_config, STORAGE_JSON, STORAGE_SQLITE
+
+class TestSQLiteBackend(unittest.TestCase):
+    """SQLite存储后端测试类"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "game.db")
+        self.storage = SQLiteStorage(self.db_path, pool_size=2)
+        
+    def tearDown(self):
+        """测试后清理"""
+        self.storage.close()
+        self.temp_dir.cleanup()
+        
+    def test_wal_mode(self):
+        """测试数据库使用WAL模式"""
+        connection = self.storage._acquire()
+        try:
+            mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        finally:
+            self.storage._release(connection)
+            
+        self.assertEqual(mode, "wal")
+        
+    def test_storage_round_trip(self):
+        """测试记录的读写、覆盖、批量写入和删除"""
+        async def run():
+            await self.storage.put("players", "p1", {"level": 1})
+            await self.storage.put("players", "p1", {"level": 2})
+            inserted = await self.storage.insert("players", "p1", {"level": 3})
+            written = await self.storage.put_many("recipes", [(i, {"id": i}) for i in range(5)])
+            deleted = await self.storage.delete("recipes", 0)
+            return (
+                await self.storage.get("players", "p1"), inserted, written, deleted,
+                await self.storage.count("recipes"), await self.storage.get("players", "missing")
+            )
+            
+        player, inserted, written, deleted, recipe_count, missing = asyncio.run(run())
+        
+        self.assertEqual(player, {"level": 2})
+        self.assertFalse(inserted)
+        self.assertEqual(written, 5)
+        self.assertTrue(deleted)
+        self.assertEqual(recipe_count, 4)
+        self.assertIsNone(missing)
+        
+    def test_player_dao(self):
+        """测试玩家DAO经过写回缓存写入数据库"""
+        async def run():
+            player_dao = SQLitePlayerDAO(self.storage, flush_interval=60)
+            created = await player_dao.create_player("p1", {"level": 1})
+            duplicate = await player_dao.create_player("p1", {"level": 9})
+            player = await player_dao.get_player("p1")
+            player["level"] = 2
+            await player_dao.save_player("p1", player)
+            before_flush = await self.storage.get("players", "p1")
+            await player_dao.flush_all()
+            return created, duplicate, before_flush, await self.storage.get("players", "p1")
+            
+        created, duplicate, before_flush, saved = asyncio.run(run())
+        
+        self.assertTrue(created)
+        self.assertFalse(duplicate)
+        self.assertIsNone(before_flush)
+        self.assertEqual(saved["level"], 2)
+        self.assertEqual(saved["id"], "p1")
+        
+    def test_business_and_recipe_dao(self):
+        """测试经营和菜谱DAO（包括server.dao模块中的方法名）"""
+        async def run():
+            business_dao = SQLiteBusinessDAO(self.storage)
+            recipe_dao = SQLiteRecipeDAO(self.storage)
+            await business_dao.save_business_data("p1", {"reputation": 60})
+            for recipe_id in (3, 1, 2):
+                await recipe_dao.save_recipe({"id": recipe_id, "name": f"菜谱{recipe_id}"})
+            return (
+                await business_dao.get_business("p1"),
+                await recipe_dao.get_recipe("2"),
+                await recipe_dao.get_all_recipes()
+            )
+            
+        business, recipe, recipes = asyncio.run(run())
+        
+        self.assertEqual(business["reputation"], 60)
+        self.assertEqual(recipe["name"], "菜谱2")
+        self.assertEqual([r["id"] for r in recipes], [1, 2, 3])
+        
+    def test_migration(self):
+        """测试从JSON存档目录导入"""
+        saves_dir = os.path.join(self.temp_dir.name, "saves")
+        os.makedirs(saves_dir)
+        files = {
+            "player_1001.json": {"id": "1001", "level": 5},
+            "business_1001.json": {"reputation": 70},
+            "inventory_1001.json": {"items": []},
+            "recipe_7.json": {"id": 7, "name": "草莓蛋糕"},
+            "notes.txt": "忽略"
+        }
+        for file_name, data in files.items():
+            with open(os.path.join(saves_dir, file_name), 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        with open(os.path.join(saves_dir, "player_broken.json"), 'w', encoding='utf-8') as f:
+            f.write("{")
+            
+        migrated_db = os.path.join(self.temp_dir.name, "migrated.db")
+        result = asyncio.run(migrate(saves_dir, migrated_db))
+        # 重复执行不会产生重复记录
+        asyncio.run(migrate(saves_dir, migrated_db))
+        
+        storage = SQLiteStorage(migrated_db, pool_size=1)
+        try:
+            player = asyncio.run(storage.get("players", "1001"))
+            player_count = asyncio.run(storage.count("players"))
+        finally:
+            storage.close()
+            
+        self.assertEqual(result["imported"]["players"], 1)
+        self.assertEqual(result["imported"]["recipes"], 1)
+        self.assertEqual(len(result["failed"]), 1)
+        self.assertEqual(player, {"id": "1001", "level": 5})
+        self.assertEqual(player_count, 1)
+        
+    def test_storage_config(self):
+        """测试通过环境变量选择存储后端"""
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(get_storage_config()["backend"], STORAGE_JSON)
+        with mock.patch.dict(os.environ, {"KITCHEN_STORAGE_BACKEND": "SQLite", "KITCHEN_SQLITE_PATH": "x.db"}):
+            config = get_storage_config()
+            self.assertEqual((config["backend"], config["sqlite_path"]), (STORAGE_SQLITE, "x.db"))
+        with mock.patch.dict(os.environ, {"KITCHEN_STORAGE_BACKEND": "mysql"}):
+            with self.assertRaises(ValueError):
+                get_storage_config()
+
+if __name__ == '__main__':
+    unittest.main()
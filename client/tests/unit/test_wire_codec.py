@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+消息编解码单元测试
+测试紧凑格式对过深嵌套和无效时间戳的处理，以及时间戳与服务器时区无关
+"""
+
+import sys
+import os
+import time
+import unittest
+from unittest import mock
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from shared.utils import wire_codec
+from shared.utils.wire_codec import (
+    COMPACT_CODEC, JSON_CODEC, MAX_NESTING_DEPTH, FrameDecodeError, iso_to_epoch_ms, epoch_ms_to_iso, packb
+)
+
+class TestWireCodec(unittest.TestCase):
+    """消息编解码测试类"""
+
+    def _nested_frame(self, depth):
+        """生成data字段嵌套depth层数组的紧凑消息帧"""
+        data = []
+        for _ in range(depth):
+            data = [data]
+        return packb([1, None, None, data, None])
+
+    def test_deep_nesting_rejected(self):
+        """测试嵌套过深的消息帧报解码错误而不是RecursionError"""
+        with mock.patch.object(wire_codec, "msgpack", None):
+            COMPACT_CODEC.decode(self._nested_frame(MAX_NESTING_DEPTH - 2))
+            # 手工拼出超过递归上限的帧（编码端本身也会递归，不能直接用packb生成）
+            frame = b"\x95\x01\xc0\xc0" + b"\x91" * 5000 + b"\x90\xc0"
+            with self.assertRaises(FrameDecodeError):
+                COMPACT_CODEC.decode(frame)
+            with self.assertRaises(FrameDecodeError):
+                COMPACT_CODEC.decode(self._nested_frame(MAX_NESTING_DEPTH + 1))
+
+    def test_deep_json_rejected(self):
+        """测试嵌套过深的JSON帧报解码错误"""
+        with self.assertRaises(FrameDecodeError):
+            JSON_CODEC.decode("[" * 100000 + "]" * 100000)
+
+    def test_invalid_timestamp_rejected(self):
+        """测试超出范围的时间戳报解码错误"""
+        with self.assertRaises(FrameDecodeError):
+            COMPACT_CODEC.decode(packb([1, None, 2 ** 62, None, None]))
+
+    @unittest.skipUnless(hasattr(time, "tzset"), "需要time.tzset")
+    def test_timestamps_independent_of_timezone(self):
+        """测试时间戳按UTC编码，不同时区的服务器编码结果相同"""
+        original = os.environ.get("TZ")
+        results = []
+        try:
+            for zone in ("UTC", "Asia/Shanghai", "America/New_York"):
+                os.environ["TZ"] = zone
+                time.tzset()
+                results.append((iso_to_epoch_ms("2026-01-01T12:00:00.250000"), epoch_ms_to_iso(1767268800250)))
+        finally:
+            if original is None:
+                os.environ.pop("TZ", None)
+            else:
+                os.environ["TZ"] = original
+            time.tzset()
+
+        self.assertEqual(set(results), {(1767268800250, "2026-01-01T12:00:00.250000")})
+        self.assertEqual(iso_to_epoch_ms("2026-01-01T20:00:00.250000+08:00"), 1767268800250)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+写回缓存单元测试
+测试WriteBehindCache的合并写回、淘汰、脏数据时间上限和PlayerDAO的写回行为
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+# 添加项目路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(ROOT_DIR)
+
+from server.utils.write_behind_cache import WriteBehindCache
+from server.backend.dao import PlayerDAO
+
+class MemoryStore:
+    """测试用存储，记录每次写入"""
+
+    def __init__(self, data=None):
+        self.data = dict(data or {})
+        self.writes = []
+
+    async def load(self, key):
+        return self.data.get(key)
+
+    async def write(self, key, value):
+        self.writes.append((key, value))
+        self.data[key] = value
+        return True
+
+class TestWriteBehindCache(unittest.TestCase):
+    """写回缓存测试类"""
+
+    def test_mutations_coalesced(self):
+        """测试多次修改合并为一次写入"""
+        async def run():
+            store = MemoryStore({"p1": {"exp": 0}})
+            cache = WriteBehindCache(store.load, store.write, flush_interval=60)
+            for _ in range(10):
+                player = await cache.get("p1")
+                player["exp"] += 5
+                await cache.put("p1", player)
+            self.assertEqual(store.writes, [])
+            self.assertTrue(cache.is_dirty("p1"))
+            failed = await cache.close()
+            return store, cache, failed
+
+        store, cache, failed = asyncio.run(run())
+
+        self.assertEqual(failed, 0)
+        self.assertEqual(store.writes, [("p1", {"exp": 50})])
+        self.assertEqual(cache.get_stats()["coalesced"], 9)
+
+    def test_background_flush(self):
+        """测试后台任务按间隔写回"""
+        async def run():
+            store = MemoryStore()
+            cache = WriteBehindCache(store.load, store.write, flush_interval=0.05)
+            await cache.put("p1", {"exp": 1})
+            await cache.put("p1", {"exp": 2})
+            await asyncio.sleep(0.15)
+            dirty = cache.is_dirty("p1")
+            await cache.close()
+            return store, dirty
+
+        store, dirty = asyncio.run(run())
+
+        self.assertFalse(dirty)
+        self.assertEqual(store.writes, [("p1", {"exp": 2})])
+
+    def test_eviction_flushes_dirty_entry(self):
+        """测试淘汰脏条目前先写回"""
+        async def run():
+            store = MemoryStore({"p2": {"exp": 0}})
+            cache = WriteBehindCache(store.load, store.write, flush_interval=60, max_entries=1)
+            await cache.put("p1", {"exp": 7})
+            await cache.get("p2")
+            await cache.close()
+            return store, cache
+
+        store, cache = asyncio.run(run())
+
+        self.assertEqual(store.writes, [("p1", {"exp": 7})])
+        self.assertEqual(list(cache.entries), ["p2"])
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_dirty_age_bound(self):
+        """测试脏数据超过时间上限时在put中同步写回"""
+        async def run():
+            store = MemoryStore()
+            cache = WriteBehindCache(store.load, store.write, flush_interval=60, max_dirty_age=0)
+            await cache.put("p1", {"exp": 1})
+            writes = list(store.writes)
+            await cache.close()
+            return writes
+
+        self.assertEqual(asyncio.run(run()), [("p1", {"exp": 1})])
+
+    def test_partial_flush_recomputes_dirty_since(self):
+        """测试部分条目写回失败后，dirty_since按剩余脏条目中最早的修改时间重新计算"""
+        async def run():
+            store = MemoryStore()
+            cache = WriteBehindCache(store.load, store.write, flush_interval=60)
+            await cache.put("p1", {"exp": 1})
+            await asyncio.sleep(0.05)
+            await cache.put("p2", {"exp": 2})
+            p2_dirty_since = cache.entries["p2"].dirty_since
+
+            async def write_all_but_p2(key, value):
+                return key != "p2" and await store.write(key, value)
+
+            cache.writer = write_all_but_p2
+            failed = await cache.flush_all()
+            state = (failed, cache.is_dirty("p1"), cache.is_dirty("p2"), cache.dirty_since == p2_dirty_since)
+            cache.writer = store.write
+            await cache.close()
+            return state, cache.dirty_since
+
+        (failed, p1_dirty, p2_dirty, recomputed), final_dirty_since = asyncio.run(run())
+
+        self.assertEqual(failed, 1)
+        self.assertFalse(p1_dirty)
+        self.assertTrue(p2_dirty)
+        self.assertTrue(recomputed)
+        self.assertIsNone(final_dirty_since)
+
+    def test_mutation_during_write_restarts_dirty_age(self):
+        """测试写回期间的新修改在写回完成后从自己的修改时间开始计算脏数据存在时间"""
+        async def run():
+            store = MemoryStore()
+            cache = WriteBehindCache(store.load, store.write, flush_interval=60)
+            await cache.put("p1", {"exp": 1})
+            first_dirty_since = cache.entries["p1"].dirty_since
+            release = asyncio.Event()
+
+            async def slow_write(key, value):
+                await release.wait()
+                return await store.write(key, value)
+
+            cache.writer = slow_write
+            flush = asyncio.ensure_future(cache.flush("p1"))
+            await asyncio.sleep(0.01)
+            await cache.put("p1", {"exp": 2})
+            redirtied_at = cache.entries["p1"].redirtied_at
+            release.set()
+            await flush
+            state = (cache.is_dirty("p1"), cache.entries["p1"].dirty_since, first_dirty_since, redirtied_at)
+            cache.writer = store.write
+            await cache.close()
+            return state
+
+        dirty, dirty_since, first_dirty_since, redirtied_at = asyncio.run(run())
+
+        self.assertTrue(dirty)
+        self.assertGreater(dirty_since, first_dirty_since)
+        self.assertEqual(dirty_since, redirtied_at)
+
+    def test_cached_copy_isolated(self):
+        """测试未保存的修改不会影响缓存"""
+        async def run():
+            store = MemoryStore({"p1": {"exp": 0}})
+            cache = WriteBehindCache(store.load, store.write, flush_interval=60)
+            player = await cache.get("p1")
+            player["exp"] = 100
+            return await cache.get("p1")
+
+        self.assertEqual(asyncio.run(run()), {"exp": 0})
+
+    def test_player_dao_flush_all(self):
+        """测试PlayerDAO保存后只有flush_all才写入文件"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            async def run():
+                player_dao = PlayerDAO(temp_dir, flush_interval=60)
+                await player_dao.create_player("p1", {"level": 1})
+                player = await player_dao.get_player("p1")
+                player["level"] = 2
+                await player_dao.save_player("p1", player)
+                written_before_flush = os.path.exists(os.path.join(temp_dir, "player_p1.json"))
+                await player_dao.flush_all()
+                return written_before_flush
+
+            written_before_flush = asyncio.run(run())
+            with open(os.path.join(temp_dir, "player_p1.json"), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+
+        self.assertFalse(written_before_flush)
+        self.assertEqual((saved["id"], saved["level"]), ("p1", 2))
+        self.assertIn("created_at", saved)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ import json
 import os
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+from server.utils.path_router import PathRouter
 
 class APIInterface:
     """API接口类，定义所有API端点"""
@@ -10,24 +11,31 @@ class APIInterface:
     def __init__(self, base_url: str = "/api"):
         self.base_url = base_url
         self.routes = {}
+        self.router = PathRouter()
         
     def register_route(self, method: str, path: str, handler):
-        """注册API路由"""
+        """注册API路由，路径参数写作 {name} 或 {name:int}"""
         route_key = f"{method.upper()}:{self.base_url}{path}"
         self.routes[route_key] = handler
+        self.router.add(method, f"{self.base_url}{path}", handler)
         
     def get_route(self, method: str, path: str):
         """获取路由处理器"""
-        route_key = f"{method.upper()}:{self.base_url}{path}"
-        return self.routes.get(route_key)
+        match = self.router.match(method, f"{self.base_url}{path}")
+        return match.handler if match else None
         
     async def handle_request(self, method: str, path: str, data: Optional[Dict] = None):
-        """处理API请求"""
-        handler = self.get_route(method, path)
-        if handler:
-            return await handler(data) if data else await handler()
-        else:
+        """处理API请求（path不含base_url）"""
+        return await self.dispatch(method, f"{self.base_url}{path}", data)
+        
+    async def dispatch(self, method: str, full_path: str, data: Optional[Dict] = None):
+        """按完整路径分发API请求，路径参数按名称传给处理器，请求体作为处理器的剩余参数传入"""
+        match = self.router.match(method, full_path)
+        if match is None:
+            if self.router.allowed_methods(full_path):
+                return {"error": "Method not allowed", "status": 405}
             return {"error": "Route not found", "status": 404}
+        return await match.handler(**match.build_kwargs(data))
 
 # 创建全局API实例
 api_interface = APIInterface()
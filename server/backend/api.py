@@ -1,8 +1,12 @@
 # 后端API接口模块
-import json
-import os
+# 所有文件读写都通过DAO在executor中执行，处理器不会阻塞事件循环
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+from server.utils.path_router import PathRouter
+from server.backend.dao import player_dao, recipe_dao, ingredient_dao, quest_dao, catalog_cache, CATALOG_QUERIES
+from server.utils.versioning import compute_version, is_not_modified
+from server.utils.catalog_cache import CatalogEntry
+from server.utils.catalog_query import CatalogQueryError
 
 class APIInterface:
     """API接口类，定义所有API端点"""
@@ -10,24 +14,31 @@ class APIInterface:
     def __init__(self, base_url: str = "/api"):
         self.base_url = base_url
         self.routes = {}
+        self.router = PathRouter()
         
     def register_route(self, method: str, path: str, handler):
-        """注册API路由"""
+        """注册API路由，路径参数写作 {name} 或 {name:int}"""
         route_key = f"{method.upper()}:{self.base_url}{path}"
         self.routes[route_key] = handler
+        self.router.add(method, f"{self.base_url}{path}", handler)
         
     def get_route(self, method: str, path: str):
         """获取路由处理器"""
-        route_key = f"{method.upper()}:{self.base_url}{path}"
-        return self.routes.get(route_key)
+        match = self.router.match(method, f"{self.base_url}{path}")
+        return match.handler if match else None
         
     async def handle_request(self, method: str, path: str, data: Optional[Dict] = None):
-        """处理API请求"""
-        handler = self.get_route(method, path)
-        if handler:
-            return await handler(data) if data else await handler()
-        else:
+        """处理API请求（path不含base_url）"""
+        return await self.dispatch(method, f"{self.base_url}{path}", data)
+        
+    async def dispatch(self, method: str, full_path: str, data: Optional[Dict] = None):
+        """按完整路径分发API请求，路径参数按名称传给处理器，请求体作为处理器的剩余参数传入"""
+        match = self.router.match(method, full_path)
+        if match is None:
+            if self.router.allowed_methods(full_path):
+                return {"error": "Method not allowed", "status": 405}
             return {"error": "Route not found", "status": 404}
+        return await match.handler(**match.build_kwargs(data))
 
 # 创建全局API实例
 api_interface = APIInterface()
@@ -37,6 +48,18 @@ class RESTfulAPIManager:
     
     def __init__(self):
         self.api_interface = api_interface
+        # 静态目录缓存，REST、WebSocket和DAO共用，配置文件变化时才重新读取并计算版本号
+        self.catalog_cache = catalog_cache
+        self.catalog_daos = {"recipes": recipe_dao, "ingredients": ingredient_dao, "quests": quest_dao}
+        # 可缓存资源 {资源名称: 获取方法}，支持按版本号条件获取
+        self.cacheable_resources = {
+            "player": self.get_player,
+            "recipes": self.get_recipes,
+            "ingredients": self.get_ingredients,
+            "quests": self.get_quests,
+            "business": self.get_business,
+            "inventory": self.get_inventory
+        }
         self._register_routes()
         
     def _register_routes(self):
@@ -70,132 +93,122 @@ class RESTfulAPIManager:
         # 排行榜相关路由
         self.api_interface.register_route("GET", "/leaderboard", self.get_leaderboard)
         
+    async def get_versioned(self, resource: str, *args, if_version: Optional[str] = None) -> Dict:
+        """
+        按版本号条件获取可缓存资源
+        :param resource: 资源名称（见cacheable_resources）
+        :param args: 获取方法的参数（如玩家ID）
+        :param if_version: 客户端持有的版本号
+        :return: {"status": 200, "version": 版本号, "data": 资源内容}，
+                 版本一致时返回 {"status": 304, "version": 版本号}，出错时返回原错误
+        """
+        getter = self.cacheable_resources.get(resource)
+        if getter is None:
+            return {"error": "Resource not found", "status": 404}
+            
+        result = await getter(*args)
+        if isinstance(result, dict) and "error" in result:
+            return result
+            
+        if isinstance(result, CatalogEntry):
+            # 目录条目自带版本号，无需重新计算
+            version, result = result.version, result.data
+        else:
+            version = compute_version(result)
+        if is_not_modified(if_version, version):
+            return {"version": version, "status": 304}
+        return {"data": result, "version": version, "status": 200}
+        
     async def get_player(self, player_id: str):
         """获取玩家信息"""
-        # 这里应该从数据库获取玩家数据
-        # 暂时从文件系统读取
-        try:
-            file_path = os.path.join("saves", f"player_{player_id}.json")
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+        # 通过DAO在executor中读取，不阻塞事件循环
+        player = await player_dao.get_player(player_id)
+        if player is None:
             return {"error": "Player not found", "status": 404}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        return player
             
     async def update_player(self, player_id: str, data: Dict):
         """更新玩家信息"""
-        try:
-            file_path = os.path.join("saves", f"player_{player_id}.json")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return {"message": "Player updated successfully", "status": 200}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        if await player_dao.save_player(player_id, data):
+            # DAO保存时可能补充字段，返回保存后的文档及其版本号，不能直接用提交的数据计算
+            stored = await player_dao.get_player(player_id)
+            return {"message": "Player updated successfully", "data": stored, "version": compute_version(stored), "status": 200}
+        return {"error": "Failed to update player", "status": 500}
             
     async def create_player(self, data: Dict):
         """创建新玩家"""
-        try:
-            player_id = data.get("id") or str(int(datetime.now().timestamp()))
-            file_path = os.path.join("saves", f"player_{player_id}.json")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+        player_id = data.get("id") or str(int(datetime.now().timestamp()))
+        if await player_dao.create_player(player_id, data):
             return {"message": "Player created successfully", "player_id": player_id, "status": 201}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        return {"error": "Failed to create player", "status": 500}
             
-    async def get_recipes(self):
-        """获取所有菜谱"""
+    async def query_catalog(self, name: str, query: Optional[Dict] = None):
+        """
+        查询目录列表
+        :param query: 分页（cursor、limit）、过滤和投影（fields）参数
+        :return: 不带查询参数时返回完整的目录条目，否则返回
+                 {"items": [...], "next_cursor": ..., "total": ..., "version": ...}
+        """
+        entry = await self.catalog_daos[name].get_catalog()
+        if entry is None:
+            return None
+        spec = CATALOG_QUERIES[name]
+        if not spec.is_query(query):
+            return entry
         try:
-            file_path = os.path.join("assets", "config", "recipes.json")
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            page = entry.get_index(spec).query(query)
+        except CatalogQueryError as e:
+            return {"error": str(e), "status": 400}
+        page["version"] = entry.version
+        return page
+        
+    async def get_recipes(self, query: Optional[Dict] = None):
+        """获取菜谱列表（无查询参数时返回带版本号的目录条目，HTTP前端据此生成ETag）"""
+        result = await self.query_catalog("recipes", query)
+        if result is None:
             return {"error": "Recipes not found", "status": 404}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        return result
             
     async def get_recipe(self, recipe_id: str):
         """获取特定菜谱"""
-        try:
-            file_path = os.path.join("assets", "config", "recipes.json")
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    recipes = json.load(f)
-                    for recipe in recipes:
-                        if str(recipe.get("id")) == recipe_id:
-                            return recipe
+        recipe = await recipe_dao.get_recipe(recipe_id)
+        if recipe is None:
             return {"error": "Recipe not found", "status": 404}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        return recipe
             
     async def create_recipe(self, data: Dict):
         """创建新菜谱"""
-        try:
-            file_path = os.path.join("assets", "config", "recipes.json")
-            recipes = []
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    recipes = json.load(f)
-                    
-            recipes.append(data)
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(recipes, f, indent=2, ensure_ascii=False)
-                
+        if await recipe_dao.add_recipe(data):
             return {"message": "Recipe created successfully", "status": 201}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        return {"error": "Failed to create recipe", "status": 500}
             
-    async def get_ingredients(self):
-        """获取所有食材"""
-        try:
-            file_path = os.path.join("assets", "config", "ingredients.json")
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+    async def get_ingredients(self, query: Optional[Dict] = None):
+        """获取食材列表（无查询参数时返回带版本号的目录条目）"""
+        result = await self.query_catalog("ingredients", query)
+        if result is None:
             return {"error": "Ingredients not found", "status": 404}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        return result
             
     async def get_ingredient(self, ingredient_id: str):
         """获取特定食材"""
-        try:
-            file_path = os.path.join("assets", "config", "ingredients.json")
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    ingredients = json.load(f)
-                    for ingredient in ingredients:
-                        if str(ingredient.get("id")) == ingredient_id:
-                            return ingredient
+        ingredient = await ingredient_dao.get_ingredient(ingredient_id)
+        if ingredient is None:
             return {"error": "Ingredient not found", "status": 404}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        return ingredient
             
-    async def get_quests(self):
-        """获取所有任务"""
-        try:
-            file_path = os.path.join("assets", "config", "main_quests.json")
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+    async def get_quests(self, query: Optional[Dict] = None):
+        """获取任务列表（无查询参数时返回带版本号的目录条目）"""
+        result = await self.query_catalog("quests", query)
+        if result is None:
             return {"error": "Quests not found", "status": 404}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        return result
             
     async def get_quest(self, quest_id: str):
         """获取特定任务"""
-        try:
-            file_path = os.path.join("assets", "config", "main_quests.json")
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    quests = json.load(f)
-                    for quest in quests:
-                        if quest.get("id") == quest_id:
-                            return quest
+        quest = await quest_dao.get_quest(quest_id)
+        if quest is None:
             return {"error": "Quest not found", "status": 404}
-        except Exception as e:
-            return {"error": str(e), "status": 500}
+        return quest
             
     async def get_business(self, player_id: str):
         """获取玩家经营信息"""
@@ -1,144 +1,174 @@
 # 数据访问对象模块，实现业务逻辑与数据访问的分离
-import json
 import os
 from typing import Dict, Any, Optional, List
-from datetime import datetime
-import asyncio
+from server.utils.io_executor import StorageIOExecutor, get_io_executor
+from server.utils.save_codec import SAVE_JSON, set_save_encoding
+from server.dao.file_dao import BaseDAO, PlayerDAO
+from server.dao.storage_config import get_storage_config, STORAGE_SQLITE
+from server.utils.catalog_cache import CatalogResponseCache, CatalogEntry
+from server.utils.catalog_query import CatalogQuerySpec, field_getter
+from server.dao.sqlite_backend import SQLiteStorage, SQLitePlayerDAO, SQLiteBusinessDAO, SQLiteInventoryDAO
 
-class BaseDAO:
-    """基础数据访问对象"""
-    
-    def __init__(self, data_dir: str = "saves"):
-        self.data_dir = data_dir
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
-            
-    async def _read_file(self, file_path: str) -> Optional[Dict]:
-        """异步读取文件"""
-        loop = asyncio.get_event_loop()
-        try:
-            # 使用run_in_executor避免阻塞
-            data = await loop.run_in_executor(None, self._sync_read_file, file_path)
-            return data
-        except Exception as e:
-            print(f"读取文件失败 {file_path}: {e}")
-            return None
-            
-    def _sync_read_file(self, file_path: str) -> Optional[Dict]:
-        """同步读取文件（在executor中运行）"""
-        if os.path.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return None
-        
-    async def _write_file(self, file_path: str, data: Dict) -> bool:
-        """异步写入文件"""
-        loop = asyncio.get_event_loop()
-        try:
-            # 使用run_in_executor避免阻塞
-            await loop.run_in_executor(None, self._sync_write_file, file_path, data)
-            return True
-        except Exception as e:
-            print(f"写入文件失败 {file_path}: {e}")
-            return False
-            
-    def _sync_write_file(self, file_path: str, data: Dict):
-        """同步写入文件（在executor中运行）"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+def _level_condition(conditions) -> int:
+    """从解锁条件或任务要求中取出等级要求，没有等级要求时视为1级"""
+    if isinstance(conditions, dict):
+        conditions = [conditions]
+    for condition in conditions or []:
+        if isinstance(condition, dict) and condition.get("type") == "level":
+            return condition.get("value", 1)
+    return 1
+
+# 目录的二级索引，同时用于列表接口的分页、过滤和投影参数
+CATALOG_QUERIES = {
+    "recipes": CatalogQuerySpec(
+        "recipes",
+        equality_fields={"category": field_getter("category"), "difficulty": field_getter("difficulty")},
+        range_fields={"level": lambda recipe: _level_condition(recipe.get("unlock_conditions"))}
+    ),
+    "ingredients": CatalogQuerySpec(
+        "ingredients",
+        equality_fields={"category": field_getter("category"), "season": field_getter("season")},
+        range_fields={"price": field_getter("base_price")}
+    ),
+    "quests": CatalogQuerySpec(
+        "quests",
+        equality_fields={"type": field_getter("type")},
+        range_fields={"level": lambda quest: _level_condition(quest.get("requirements"))}
+    )
+}
 
-class PlayerDAO(BaseDAO):
-    """玩家数据访问对象"""
+# 静态目录缓存（REST、WebSocket和DAO共用），配置文件变化时才重新读取并整体替换快照
+catalog_cache = CatalogResponseCache()
+
+class CatalogDAO(BaseDAO):
+    """
+    配置目录数据访问对象基类
+    目录只在配置文件变化时重新加载，按ID查找和按分类、等级过滤都走内存索引，不访问文件。
+    返回的记录属于共享快照，调用方不能修改
+    """
     
-    async def get_player(self, player_id: str) -> Optional[Dict]:
-        """获取玩家数据"""
-        file_path = os.path.join(self.data_dir, f"player_{player_id}.json")
-        return await self._read_file(file_path)
+    catalog_name = ""
+    file_name = ""
+    response_type = ""
+    # 配置文件与仓库中的版本保持相同的缩进JSON格式，目录缓存直接按JSON读取
+    save_encoding = SAVE_JSON
+    
+    def __init__(self, data_dir: str = "assets/config", cache: Optional[CatalogResponseCache] = None,
+                 io_executor: Optional[StorageIOExecutor] = None):
+        """
+        :param cache: 目录缓存，默认使用全局共享的catalog_cache
+        :param io_executor: 重新加载配置文件的线程池，默认使用共享的存储I/O线程池
+        """
+        self.cache = cache if cache is not None else catalog_cache
+        super().__init__(data_dir, io_executor=io_executor)
+        
+    @property
+    def data_dir(self) -> str:
+        return self._data_dir
         
-    async def save_player(self, player_id: str, player_data: Dict) -> bool:
-        """保存玩家数据"""
-        file_path = os.path.join(self.data_dir, f"player_{player_id}.json")
-        return await self._write_file(file_path, player_data)
+    @data_dir.setter
+    def data_dir(self, value: str):
+        # 目录位置变化时重新注册，旧快照随之失效
+        self._data_dir = value
+        self.cache.register(
+            self.catalog_name, os.path.join(value, self.file_name), self.response_type, self.io, self.io_metrics
+        )
         
-    async def create_player(self, player_id: str, player_data: Dict) -> bool:
-        """创建玩家数据"""
-        # 确保玩家ID在数据中
-        player_data["id"] = player_id
-        return await self.save_player(player_id, player_data)
+    async def get_catalog(self) -> Optional[CatalogEntry]:
+        """获取当前目录快照，配置文件不存在或无法解析时返回None"""
+        return await self.cache.get_entry(self.catalog_name)
+        
+    async def _get_all(self) -> Optional[List[Dict]]:
+        entry = await self.get_catalog()
+        if entry is None or not isinstance(entry.data, list):
+            return None
+        return entry.data
+        
+    async def _get_index(self):
+        entry = await self.get_catalog()
+        if entry is None:
+            return None
+        return entry.get_index(CATALOG_QUERIES[self.catalog_name])
+        
+    async def _get_by_id(self, record_id) -> Optional[Dict]:
+        index = await self._get_index()
+        return index.get(record_id) if index is not None else None
+        
+    async def _find(self, **filters) -> List[Dict]:
+        index = await self._get_index()
+        return index.filter(filters) if index is not None else []
 
-class RecipeDAO(BaseDAO):
+class RecipeDAO(CatalogDAO):
     """菜谱数据访问对象"""
     
-    def __init__(self, data_dir: str = "assets/config"):
-        super().__init__(data_dir)
+    catalog_name = "recipes"
+    file_name = "recipes.json"
+    response_type = "recipe_list"
         
     async def get_recipes(self) -> Optional[List[Dict]]:
         """获取所有菜谱"""
-        file_path = os.path.join(self.data_dir, "recipes.json")
-        data = await self._read_file(file_path)
-        return data if isinstance(data, list) else None
+        return await self._get_all()
         
     async def get_recipe(self, recipe_id: int) -> Optional[Dict]:
         """获取特定菜谱"""
-        recipes = await self.get_recipes()
-        if recipes:
-            for recipe in recipes:
-                if recipe.get("id") == recipe_id:
-                    return recipe
-        return None
+        return await self._get_by_id(recipe_id)
+        
+    async def get_recipes_by_category(self, category: str) -> List[Dict]:
+        """获取指定分类的菜谱"""
+        return await self._find(category=category)
+        
+    async def get_recipes_unlocked_at(self, level: int) -> List[Dict]:
+        """获取指定等级已解锁的菜谱"""
+        return await self._find(max_level=level)
         
     async def add_recipe(self, recipe_data: Dict) -> bool:
         """添加新菜谱"""
-        recipes = await self.get_recipes()
-        if recipes is None:
-            recipes = []
-            
+        recipes = list(await self.get_recipes() or [])
         recipes.append(recipe_data)
         
-        file_path = os.path.join(self.data_dir, "recipes.json")
-        return await self._write_file(file_path, recipes)
+        file_path = os.path.join(self.data_dir, self.file_name)
+        success = await self._write_file(file_path, recipes)
+        if success:
+            self.cache.invalidate(self.catalog_name)
+        return success
 
-class IngredientDAO(BaseDAO):
+class IngredientDAO(CatalogDAO):
     """食材数据访问对象"""
     
-    def __init__(self, data_dir: str = "assets/config"):
-        super().__init__(data_dir)
+    catalog_name = "ingredients"
+    file_name = "ingredients.json"
+    response_type = "ingredient_list"
         
     async def get_ingredients(self) -> Optional[List[Dict]]:
         """获取所有食材"""
-        file_path = os.path.join(self.data_dir, "ingredients.json")
-        data = await self._read_file(file_path)
-        return data if isinstance(data, list) else None
+        return await self._get_all()
         
     async def get_ingredient(self, ingredient_id: int) -> Optional[Dict]:
         """获取特定食材"""
-        ingredients = await self.get_ingredients()
-        if ingredients:
-            for ingredient in ingredients:
-                if ingredient.get("id") == ingredient_id:
-                    return ingredient
-        return None
+        return await self._get_by_id(ingredient_id)
+        
+    async def get_ingredients_by_category(self, category: str) -> List[Dict]:
+        """获取指定分类的食材"""
+        return await self._find(category=category)
 
-class QuestDAO(BaseDAO):
+class QuestDAO(CatalogDAO):
     """任务数据访问对象"""
     
-    def __init__(self, data_dir: str = "assets/config"):
-        super().__init__(data_dir)
+    catalog_name = "quests"
+    file_name = "main_quests.json"
+    response_type = "quest_list"
         
     async def get_quests(self) -> Optional[List[Dict]]:
         """获取所有任务"""
-        file_path = os.path.join(self.data_dir, "main_quests.json")
-        data = await self._read_file(file_path)
-        return data if isinstance(data, list) else None
+        return await self._get_all()
         
     async def get_quest(self, quest_id: str) -> Optional[Dict]:
         """获取特定任务"""
-        quests = await self.get_quests()
-        if quests:
-            for quest in quests:
-                if quest.get("id") == quest_id:
-                    return quest
-        return None
+        return await self._get_by_id(quest_id)
+        
+    async def get_quests_for_level(self, level: int) -> List[Dict]:
+        """获取指定等级可以接受的任务"""
+        return await self._find(max_level=level)
 
 class BusinessDAO(BaseDAO):
     """经营数据访问对象"""
@@ -166,10 +196,21 @@ class InventoryDAO(BaseDAO):
         file_path = os.path.join(self.data_dir, f"inventory_{player_id}.json")
         return await self._write_file(file_path, inventory_data)
 
-# 创建全局DAO实例
-player_dao = PlayerDAO()
+# 创建全局DAO实例，玩家、经营和背包数据的存储后端由配置选择（见server/dao/storage_config.py），
+# 菜谱、食材和任务目录始终读取配置文件
+storage_config = get_storage_config()
+# 按配置的线程数创建共享的存储I/O线程池（之后创建的DAO默认使用它）
+get_io_executor(storage_config["io_threads"])
+set_save_encoding(storage_config["save_encoding"])
+if storage_config["backend"] == STORAGE_SQLITE:
+    sqlite_storage = SQLiteStorage.shared(storage_config["sqlite_path"], storage_config["pool_size"])
+    player_dao = SQLitePlayerDAO(sqlite_storage)
+    business_dao = SQLiteBusinessDAO(sqlite_storage)
+    inventory_dao = SQLiteInventoryDAO(sqlite_storage)
+else:
+    player_dao = PlayerDAO()
+    business_dao = BusinessDAO()
+    inventory_dao = InventoryDAO()
 recipe_dao = RecipeDAO()
 ingredient_dao = IngredientDAO()
-quest_dao = QuestDAO()
-business_dao = BusinessDAO()
-inventory_dao = InventoryDAO()
\ No newline at end of file
+quest_dao = QuestDAO()
\ No newline at end of file
@@ -1,73 +1,104 @@
 # 后端服务器入口文件
 import asyncio
 import websockets
-import json
 from datetime import datetime
-from typing import Dict, Any
-from backend.api import RESTfulAPIManager
+from typing import Dict, Any, Optional
+from server.backend.api import RESTfulAPIManager
+from server.backend.dao import player_dao, CATALOG_QUERIES
+from server.utils.message_dispatcher import MessageDispatcher, message_handler
+from server.utils.connection_pipeline import ConnectionPipeline
+from server.utils.keyed_lock import player_locks
+from server.utils.io_executor import get_io_executor
+from server.utils.channel_index import ChannelSubscriptionIndex, CHAT_CHANNELS
+from server.utils.send_queue import ClientSendQueue, OVERFLOW_DROP_OLDEST
+from server.utils.catalog_cache import CachedResponse
+from server.utils.versioning import versioned_response, not_modified_response
+from server.utils.market_feed import MarketFeed
+from server.utils.http_frontend import HTTPFrontend
+from server.services.shop_service import shop_service
+from shared.utils.wire_codec import JSON_CODEC, FrameDecodeError, decode_frame, negotiate_codec
 
 class GameServer:
     """游戏服务器类"""
     
-    def __init__(self, host: str = "localhost", port: int = 8765):
+    def __init__(self, host: str = "localhost", port: int = 8765, max_in_flight: int = 8,
+                 send_queue_size: int = 256, send_overflow_policy: str = OVERFLOW_DROP_OLDEST,
+                 market_push_interval: float = 1.0, http_port: Optional[int] = 8766):
         self.host = host
         self.port = port
+        self.max_in_flight = max_in_flight  # 每个连接同时处理的最大请求数
+        self.send_queue_size = send_queue_size  # 每个连接发送队列的最大长度
+        self.send_overflow_policy = send_overflow_policy  # 发送队列溢出策略
+        self.max_batch_size = 32  # 单个批次请求允许的最大子请求数
         self.clients = {}  # 存储连接的客户端 {websocket: player_id}
+        self.send_queues = {}  # 每个连接的发送队列 {websocket: ClientSendQueue}
+        self.client_codecs = {}  # 每个连接协商的编解码器 {websocket: codec}，未协商时使用JSON
+        self.closed_queue_totals = {"dropped": 0, "coalesced": 0, "evicted": 0}  # 已关闭队列的累计统计
+        self.chat_channels = ChannelSubscriptionIndex()  # 聊天频道订阅索引
         self.api_manager = RESTfulAPIManager()
-        
-    async def handle_client(self, websocket, path):
+        # REST API的HTTP前端，http_port为None时不启动
+        self.http_frontend = None
+        if http_port is not None:
+            self.http_frontend = HTTPFrontend(self.api_manager.api_interface, host, http_port)
+        self.dispatcher = MessageDispatcher(self)
+        
+        # 静态目录响应缓存（与REST API共用），配置文件变化时自动失效
+        self.catalog_cache = self.api_manager.catalog_cache
+        
+        # 市场价格推送，推送间隔内的价格变化合并为一条增量
+        self.market_feed = MarketFeed(
+            shop_service.get_shop_items,
+            tick=shop_service.simulate_market_activity,
+            interval=market_push_interval
+        )
+        
+    async def handle_client(self, websocket, path=None):
         """处理客户端连接"""
         print(f"新客户端连接: {websocket.remote_address}")
+        pipeline = ConnectionPipeline(self.max_in_flight)
+        self.open_send_queue(websocket)
         
         try:
             async for message in websocket:
-                await self.process_message(websocket, message)
+                decoded = self._decode_message(message)
+                await pipeline.submit(
+                    self.process_message(websocket, message, decoded),
+                    ordered=self._is_ordered_message(decoded)
+                )
         except websockets.exceptions.ConnectionClosed:
             print(f"客户端断开连接: {websocket.remote_address}")
         finally:
+            # 等待在途请求完成（例如尚未写完的玩家数据）
+            await pipeline.drain()
+            
             # 清理客户端连接
-            if websocket in self.clients:
-                player_id = self.clients.pop(websocket)
+            player_id = self._remove_client(websocket)
+            if player_id is not None:
                 print(f"玩家 {player_id} 断开连接")
                 
-    async def process_message(self, websocket, message):
+    def _decode_message(self, message) -> Optional[Dict]:
+        """解析消息（文本帧为JSON，二进制帧为紧凑格式），格式无效时返回None（由process_message返回错误）"""
+        try:
+            return decode_frame(message)
+        except FrameDecodeError:
+            return None
+            
+    def _is_ordered_message(self, decoded: Optional[Dict]) -> bool:
+        """判断消息是否需要在该连接上按顺序处理"""
+        if not isinstance(decoded, dict):
+            return False
+        return bool(decoded.get("ordered")) or self.dispatcher.is_ordered(decoded.get("type"))
+        
+    async def process_message(self, websocket, message, decoded: Optional[Dict] = None):
         """处理客户端消息"""
         try:
-            data = json.loads(message)
+            data = decoded if decoded is not None else decode_frame(message)
             message_type = data.get("type")
-            message_data = data.get("data", {})
+            message_data = data.get("data") or {}
             request_id = data.get("request_id")
             
-            response = None
-            
-            if message_type == "authenticate":
-                response = await self.authenticate_player(websocket, message_data)
-            elif message_type == "get_player_data":
-                response = await self.get_player_data(message_data)
-            elif message_type == "update_player_data":
-                response = await self.update_player_data(message_data)
-            elif message_type == "get_recipe_list":
-                response = await self.get_recipe_list()
-            elif message_type == "get_market_data":
-                response = await self.get_market_data()
-            elif message_type == "get_quest_list":
-                response = await self.get_quest_list(message_data)
-            elif message_type == "accept_quest":
-                response = await self.accept_quest(message_data)
-            elif message_type == "complete_quest":
-                response = await self.complete_quest(message_data)
-            elif message_type == "chat_message":
-                response = await self.handle_chat_message(websocket, message_data)
-            elif message_type == "get_leaderboard":
-                response = await self.get_leaderboard(message_data)
-            elif message_type == "buy_item":
-                response = await self.buy_item(message_data)
-            elif message_type == "sell_item":
-                response = await self.sell_item(message_data)
-            elif message_type == "craft_dish":
-                response = await self.craft_dish(message_data)
-            elif message_type == "taste_dish":
-                response = await self.taste_dish(message_data)
+            if self.dispatcher.has_handler(message_type):
+                response = await self.dispatcher.dispatch(message_type, websocket, message_data)
             else:
                 response = {
                     "type": "error",
@@ -82,9 +113,9 @@ class GameServer:
             if response:
                 response["request_id"] = request_id
                 response["timestamp"] = datetime.now().isoformat()
-                await websocket.send(json.dumps(response))
+                self.send_frame(websocket, self.encode_for(websocket, response))
                 
-        except json.JSONDecodeError:
+        except FrameDecodeError:
             error_response = {
                 "type": "error",
                 "data": {
@@ -94,7 +125,7 @@ class GameServer:
                 "request_id": data.get("request_id") if 'data' in locals() else None,
                 "timestamp": datetime.now().isoformat()
             }
-            await websocket.send(json.dumps(error_response))
+            self.send_frame(websocket, self.encode_for(websocket, error_response))
         except Exception as e:
             error_response = {
                 "type": "error",
@@ -105,8 +136,9 @@ class GameServer:
                 "request_id": data.get("request_id") if 'data' in locals() else None,
                 "timestamp": datetime.now().isoformat()
             }
-            await websocket.send(json.dumps(error_response))
+            self.send_frame(websocket, self.encode_for(websocket, error_response))
             
+    @message_handler("authenticate", pass_websocket=True)
     async def authenticate_player(self, websocket, data: Dict) -> Dict:
         """玩家身份验证"""
         player_id = data.get("player_id")
@@ -116,15 +148,26 @@ class GameServer:
         # 暂时接受所有验证请求
         self.clients[websocket] = player_id
         
+        # 自动订阅全局频道和自己的私聊频道（重复验证时先清除旧订阅）
+        self.chat_channels.remove_client(websocket)
+        self.chat_channels.subscribe(websocket, "global")
+        self.chat_channels.subscribe(websocket, "whisper", player_id)
+        
+        # 协商后续消息使用的编码格式（客户端按帧类型自动识别，验证结果本身也可直接使用新格式）
+        codec = negotiate_codec(data.get("encodings"))
+        self.client_codecs[websocket] = codec
+        
         return {
             "type": "authentication_result",
             "data": {
                 "success": True,
                 "player_id": player_id,
+                "encoding": codec.name,
                 "message": "身份验证成功"
             }
         }
         
+    @message_handler("get_player_data")
     async def get_player_data(self, data: Dict) -> Dict:
         """获取玩家数据"""
         player_id = data.get("player_id")
@@ -137,14 +180,19 @@ class GameServer:
                 }
             }
             
-        # 调用API管理器获取玩家数据
-        player_data = await self.api_manager.get_player(player_id)
-        
-        return {
-            "type": "player_data",
-            "data": player_data
-        }
+        # 调用API管理器获取玩家数据，客户端副本仍是最新版本时只返回not_modified
+        result = await self.api_manager.get_versioned("player", player_id, if_version=data.get("if_version"))
+        if result.get("status") == 304:
+            return not_modified_response("player_data", result["version"])
+        if "error" in result:
+            return {
+                "type": "player_data",
+                "data": result
+            }
+            
+        return versioned_response("player_data", result["data"], result["version"])
         
+    @message_handler("update_player_data", ordered=True)
     async def update_player_data(self, data: Dict) -> Dict:
         """更新玩家数据"""
         player_id = data.get("player_id")
@@ -159,7 +207,7 @@ class GameServer:
                 }
             }
             
-        # 调用API管理器更新玩家数据
+        # 调用API管理器更新玩家数据，成功时结果带有保存后文档的版本号
         result = await self.api_manager.update_player(player_id, player_data)
         
         return {
@@ -167,47 +215,94 @@ class GameServer:
             "data": result
         }
         
-    async def get_recipe_list(self) -> Dict:
+    @message_handler("get_recipe_list")
+    async def get_recipe_list(self, data: Dict = None) -> Dict:
         """获取菜谱列表"""
-        # 调用API管理器获取菜谱列表
-        recipes = await self.api_manager.get_recipes()
+        return await self._get_catalog_response("recipes", "菜谱列表", data)
+        
+    @message_handler("get_ingredients")
+    async def get_ingredients(self, data: Dict = None) -> Dict:
+        """获取食材列表"""
+        return await self._get_catalog_response("ingredients", "食材列表", data)
+        
+    async def _get_catalog_response(self, name: str, label: str, data: Optional[Dict] = None) -> Dict:
+        """
+        从目录缓存获取响应，请求携带的if_version与当前版本一致时返回not_modified，
+        带分页、过滤或投影参数时只返回一页记录
+        """
+        if CATALOG_QUERIES[name].is_query(data):
+            return await self._get_catalog_page(name, label, data)
+        response = await self.catalog_cache.get_response(name, (data or {}).get("if_version"))
+        if response is None:
+            return {
+                "type": "error",
+                "data": {
+                    "code": "CATALOG_NOT_FOUND",
+                    "message": f"{label}不可用"
+                }
+            }
+        return response
+        
+    async def _get_catalog_page(self, name: str, label: str, data: Dict) -> Dict:
+        """查询目录的一页记录"""
+        page = await self.api_manager.query_catalog(name, data)
+        if page is None:
+            return {
+                "type": "error",
+                "data": {
+                    "code": "CATALOG_NOT_FOUND",
+                    "message": f"{label}不可用"
+                }
+            }
+        if "error" in page:
+            return {
+                "type": "error",
+                "data": {
+                    "code": "INVALID_QUERY",
+                    "message": page["error"]
+                }
+            }
+        return {"type": self.catalog_cache.catalogs[name]["response_type"], "data": page}
+        
+    @message_handler("get_market_data")
+    async def get_market_data(self, data: Dict = None) -> Dict:
+        """获取市场数据（需要持续获取价格的客户端应使用subscribe_market）"""
+        market_data = self.market_feed.snapshot()
+        market_data["updated_at"] = datetime.now().isoformat()
         
         return {
-            "type": "recipe_list",
-            "data": recipes
+            "type": "market_data",
+            "data": market_data
         }
         
-    async def get_market_data(self) -> Dict:
-        """获取市场数据"""
-        # 这里应该实现实际的市场数据获取逻辑
-        # 暂时返回示例数据
-        market_data = {
-            "items": [
-                {"id": 1, "name": "优质面粉", "price": 50, "stock": 100},
-                {"id": 2, "name": "新鲜草莓", "price": 30, "stock": 200}
-            ],
-            "updated_at": datetime.now().isoformat()
+    @message_handler("subscribe_market", pass_websocket=True)
+    async def subscribe_market(self, websocket, data: Dict = None) -> Dict:
+        """订阅市场价格推送，返回快照，之后推送market_delta增量"""
+        return {
+            "type": "market_snapshot",
+            "data": self.market_feed.subscribe(websocket)
         }
         
+    @message_handler("unsubscribe_market", pass_websocket=True)
+    async def unsubscribe_market(self, websocket, data: Dict = None) -> Dict:
+        """取消订阅市场价格推送"""
         return {
-            "type": "market_data",
-            "data": market_data
+            "type": "market_unsubscribed",
+            "data": {
+                "removed": self.market_feed.unsubscribe(websocket)
+            }
         }
         
+    @message_handler("get_quest_list")
     async def get_quest_list(self, data: Dict) -> Dict:
         """获取任务列表"""
         player_id = data.get("player_id")
         # 这里应该根据玩家ID获取适合的任务列表
         # 暂时返回所有任务
         
-        # 调用API管理器获取任务列表
-        quests = await self.api_manager.get_quests()
-        
-        return {
-            "type": "quest_list",
-            "data": quests
-        }
+        return await self._get_catalog_response("quests", "任务列表", data)
         
+    @message_handler("accept_quest", ordered=True)
     async def accept_quest(self, data: Dict) -> Dict:
         """接受任务"""
         player_id = data.get("player_id")
@@ -234,6 +329,7 @@ class GameServer:
             }
         }
         
+    @message_handler("complete_quest", ordered=True)
     async def complete_quest(self, data: Dict) -> Dict:
         """完成任务"""
         player_id = data.get("player_id")
@@ -264,53 +360,294 @@ class GameServer:
             }
         }
         
+    @message_handler("chat_message", pass_websocket=True)
     async def handle_chat_message(self, websocket, data: Dict) -> Dict:
-        """处理聊天消息"""
-        player_id = data.get("player_id")
+        """处理聊天消息（发送者取连接验证时的玩家ID，不信任消息中的player_id）"""
+        player_id = self.clients.get(websocket)
         message = data.get("message")
         channel = data.get("channel", "global")
+        channel_id = data.get("channel_id")
         
-        if not player_id or not message:
+        if not player_id:
+            return self._not_authenticated_error()
+            
+        if not message:
             return {
                 "type": "error",
                 "data": {
                     "code": "MISSING_DATA",
-                    "message": "缺少玩家ID或消息内容"
+                    "message": "缺少消息内容"
+                }
+            }
+            
+        if channel not in CHAT_CHANNELS:
+            return {
+                "type": "error",
+                "data": {
+                    "code": "INVALID_CHANNEL",
+                    "message": f"未知聊天频道: {channel}"
                 }
             }
             
-        # 广播消息给所有客户端
+        # 根据频道确定接收者
+        if channel == "global":
+            recipients = self.chat_channels.get_subscribers("global")
+        elif channel == "guild":
+            if not channel_id:
+                return {
+                    "type": "error",
+                    "data": {
+                        "code": "MISSING_DATA",
+                        "message": "缺少公会ID"
+                    }
+                }
+            if not await self._is_guild_member(player_id, channel_id):
+                return self._channel_forbidden_error(channel, channel_id)
+            recipients = self.chat_channels.get_subscribers("guild", channel_id)
+        elif channel == "friends":
+            # 好友频道发送到发送者每个好友自己的好友频道
+            recipients = set()
+            for friend_id in await self._get_friend_ids(player_id):
+                recipients |= self.chat_channels.get_subscribers("friends", friend_id)
+        else:
+            target_id = data.get("target_id")
+            if not target_id:
+                return {
+                    "type": "error",
+                    "data": {
+                        "code": "MISSING_DATA",
+                        "message": "缺少私聊对象ID"
+                    }
+                }
+            recipients = self.chat_channels.get_subscribers("whisper", target_id)
+            
+        # 发送者也能在自己的聊天窗口看到消息
+        recipients.add(websocket)
+        
         broadcast_message = {
             "type": "chat_message",
             "data": {
                 "player_id": player_id,
                 "message": message,
                 "channel": channel,
+                "channel_id": channel_id,
+                "target_id": data.get("target_id"),
                 "timestamp": datetime.now().isoformat()
             }
         }
+        self.broadcast(recipients, broadcast_message)
         
-        # 发送给所有连接的客户端
-        if self.clients:
-            disconnected_clients = []
-            for client_websocket in self.clients:
-                try:
-                    await client_websocket.send(json.dumps(broadcast_message))
-                except websockets.exceptions.ConnectionClosed:
-                    disconnected_clients.append(client_websocket)
-                    
-            # 清理断开连接的客户端
-            for client in disconnected_clients:
-                self.clients.pop(client, None)
-                
         # 返回确认消息给发送者
         return {
             "type": "message_sent",
             "data": {
-                "message": "消息发送成功"
+                "message": "消息发送成功",
+                "recipients": len(recipients)
             }
         }
         
+    @message_handler("join_chat_channel", pass_websocket=True)
+    async def join_chat_channel(self, websocket, data: Dict) -> Dict:
+        """订阅聊天频道，只能订阅自己的好友频道或自己所属公会的频道"""
+        player_id = self.clients.get(websocket)
+        channel = data.get("channel")
+        channel_id = data.get("channel_id")
+        
+        if not player_id:
+            return self._not_authenticated_error()
+            
+        if channel not in ("guild", "friends") or not channel_id:
+            return {
+                "type": "error",
+                "data": {
+                    "code": "INVALID_CHANNEL",
+                    "message": "只能订阅指定ID的公会或好友频道"
+                }
+            }
+            
+        if channel == "friends":
+            allowed = str(channel_id) == str(player_id)
+        else:
+            allowed = await self._is_guild_member(player_id, channel_id)
+        if not allowed:
+            return self._channel_forbidden_error(channel, channel_id)
+            
+        self.chat_channels.subscribe(websocket, channel, channel_id)
+        return {
+            "type": "chat_channel_joined",
+            "data": {
+                "channel": channel,
+                "channel_id": channel_id
+            }
+        }
+        
+    @message_handler("leave_chat_channel", pass_websocket=True)
+    async def leave_chat_channel(self, websocket, data: Dict) -> Dict:
+        """取消订阅聊天频道"""
+        channel = data.get("channel")
+        channel_id = data.get("channel_id")
+        
+        if channel not in ("guild", "friends"):
+            return {
+                "type": "error",
+                "data": {
+                    "code": "INVALID_CHANNEL",
+                    "message": "只能取消订阅公会或好友频道"
+                }
+            }
+            
+        removed = self.chat_channels.unsubscribe(websocket, channel, channel_id)
+        return {
+            "type": "chat_channel_left",
+            "data": {
+                "channel": channel,
+                "channel_id": channel_id,
+                "removed": removed
+            }
+        }
+        
+    async def _is_guild_member(self, player_id: str, guild_id) -> bool:
+        """玩家是否属于指定公会（以玩家数据中的guild_id为准）"""
+        player = await player_dao.get_player(player_id)
+        return player is not None and player.get("guild_id") is not None and str(player["guild_id"]) == str(guild_id)
+        
+    async def _get_friend_ids(self, player_id: str) -> list:
+        """获取玩家数据中的好友ID列表"""
+        player = await player_dao.get_player(player_id)
+        return list((player or {}).get("friends") or [])
+        
+    @staticmethod
+    def _not_authenticated_error() -> Dict:
+        """连接尚未通过身份验证"""
+        return {
+            "type": "error",
+            "data": {
+                "code": "NOT_AUTHENTICATED",
+                "message": "请先完成身份验证"
+            }
+        }
+        
+    @staticmethod
+    def _channel_forbidden_error(channel: str, channel_id) -> Dict:
+        """玩家无权使用该频道"""
+        return {
+            "type": "error",
+            "data": {
+                "code": "CHANNEL_FORBIDDEN",
+                "message": f"无权使用频道: {channel}:{channel_id}"
+            }
+        }
+        
+    def send_frame(self, websocket, payload, droppable: bool = False, coalesce_key: Optional[str] = None) -> bool:
+        """
+        把已编码的消息帧放入客户端的发送队列
+        :param websocket: 客户端连接
+        :param payload: 已编码的消息帧
+        :param droppable: 是否为可丢弃的推送（聊天、行情等）
+        :param coalesce_key: 推送合并键
+        :return: 连接是否仍然可用
+        """
+        send_queue = self.send_queues.get(websocket)
+        if send_queue is None:
+            return False
+        send_queue.put(payload, droppable, coalesce_key)
+        return not send_queue.closed
+        
+    def encode_for(self, websocket, message: Dict):
+        """使用连接协商的编码格式编码消息（目录缓存响应直接复用预先编码的data片段）"""
+        codec = self.client_codecs.get(websocket, JSON_CODEC)
+        if isinstance(message, CachedResponse):
+            return self.catalog_cache.encode_response(codec, message)
+        return codec.encode(message)
+        
+    def open_send_queue(self, websocket) -> ClientSendQueue:
+        """为新连接创建发送队列并启动写协程"""
+        send_queue = ClientSendQueue(websocket, self.send_queue_size, self.send_overflow_policy)
+        send_queue.start()
+        self.send_queues[websocket] = send_queue
+        return send_queue
+        
+    def broadcast(self, recipients, message: Dict, coalesce_key: Optional[str] = None):
+        """
+        向一组连接广播推送消息
+        消息按编码格式各序列化一次后放入各连接的发送队列，之后再统一清理已断开的连接
+        """
+        if not recipients:
+            return
+            
+        payloads = {}  # 每种编码只序列化一次 {codec_name: payload}
+        disconnected_clients = []
+        for client_websocket in recipients:
+            codec = self.client_codecs.get(client_websocket, JSON_CODEC)
+            payload = payloads.get(codec.name)
+            if payload is None:
+                payload = codec.encode(message)
+                payloads[codec.name] = payload
+            if not self.send_frame(client_websocket, payload, droppable=True, coalesce_key=coalesce_key):
+                disconnected_clients.append(client_websocket)
+        
+        # 清理断开连接的客户端
+        for client_websocket in disconnected_clients:
+            self._remove_client(client_websocket)
+            
+    def _remove_client(self, websocket):
+        """移除客户端连接、频道和市场订阅、编解码器及发送队列"""
+        self.chat_channels.remove_client(websocket)
+        self.market_feed.unsubscribe(websocket)
+        self.client_codecs.pop(websocket, None)
+        send_queue = self.send_queues.pop(websocket, None)
+        if send_queue is not None:
+            send_queue.close()
+            stats = send_queue.get_stats()
+            self.closed_queue_totals["dropped"] += stats["dropped"]
+            self.closed_queue_totals["coalesced"] += stats["coalesced"]
+            self.closed_queue_totals["evicted"] += 1 if stats["evicted"] else 0
+        return self.clients.pop(websocket, None)
+        
+    def get_send_queue_stats(self) -> Dict[str, Any]:
+        """获取发送队列的深度与丢弃统计"""
+        queue_stats = [send_queue.get_stats() for send_queue in self.send_queues.values()]
+        return {
+            "connections": len(queue_stats),
+            "total_depth": sum(stats["depth"] for stats in queue_stats),
+            "max_depth": max((stats["depth"] for stats in queue_stats), default=0),
+            "peak_depth": max((stats["peak_depth"] for stats in queue_stats), default=0),
+            "dropped": self.closed_queue_totals["dropped"] + sum(stats["dropped"] for stats in queue_stats),
+            "coalesced": self.closed_queue_totals["coalesced"] + sum(stats["coalesced"] for stats in queue_stats),
+            "evicted": self.closed_queue_totals["evicted"] + sum(1 for stats in queue_stats if stats["evicted"])
+        }
+        
+    @message_handler("batch", pass_websocket=True)
+    async def handle_batch(self, websocket, data: Dict) -> Dict:
+        """批量处理多个子请求，合并为一个响应帧返回"""
+        requests = data.get("requests")
+        if not isinstance(requests, list) or not requests:
+            return {
+                "type": "error",
+                "data": {
+                    "code": "MISSING_DATA",
+                    "message": "缺少子请求列表"
+                }
+            }
+            
+        if len(requests) > self.max_batch_size:
+            return {
+                "type": "error",
+                "data": {
+                    "code": "BATCH_TOO_LARGE",
+                    "message": f"单个批次最多包含{self.max_batch_size}个子请求"
+                }
+            }
+            
+        results = await self.dispatcher.dispatch_batch(websocket, requests)
+        return {
+            "type": "batch_result",
+            "data": {
+                "results": results
+            }
+        }
+        
+    @message_handler("get_leaderboard")
     async def get_leaderboard(self, data: Dict) -> Dict:
         """获取排行榜"""
         category = data.get("category", "level")
@@ -332,6 +669,7 @@ class GameServer:
             "data": leaderboard
         }
         
+    @message_handler("buy_item", ordered=True)
     async def buy_item(self, data: Dict) -> Dict:
         """购买物品"""
         player_id = data.get("player_id")
@@ -360,6 +698,7 @@ class GameServer:
             }
         }
         
+    @message_handler("sell_item", ordered=True)
     async def sell_item(self, data: Dict) -> Dict:
         """出售物品"""
         player_id = data.get("player_id")
@@ -388,6 +727,7 @@ class GameServer:
             }
         }
         
+    @message_handler("craft_dish", ordered=True)
     async def craft_dish(self, data: Dict) -> Dict:
         """制作菜肴"""
         player_id = data.get("player_id")
@@ -416,6 +756,7 @@ class GameServer:
             }
         }
         
+    @message_handler("taste_dish")
     async def taste_dish(self, data: Dict) -> Dict:
         """品尝菜肴"""
         player_id = data.get("player_id")
@@ -443,20 +784,41 @@ class GameServer:
             }
         }
         
+    def get_message_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取每种消息类型的延迟直方图与错误数"""
+        return self.dispatcher.get_stats()
+        
+    def get_lock_stats(self) -> Dict[str, Any]:
+        """获取玩家级锁的等待时间直方图与争用统计"""
+        return player_locks.get_stats()
+        
+    def get_io_stats(self) -> Dict[str, Any]:
+        """获取存储I/O线程池状态，以及每个DAO的读写字节数、排队等待和执行时间直方图"""
+        return get_io_executor().get_stats()
+        
     async def start(self):
         """启动服务器"""
         print(f"游戏服务器启动中... {self.host}:{self.port}")
         
         server = await websockets.serve(self.handle_client, self.host, self.port)
+        self.market_feed.start(self.broadcast)
         print(f"游戏服务器已启动: {self.host}:{self.port}")
+        if self.http_frontend is not None:
+            await self.http_frontend.start()
+            print(f"HTTP API已启动: http://{self.host}:{self.http_frontend.port}{self.api_manager.api_interface.base_url}")
         
         try:
             await server.wait_closed()
         except KeyboardInterrupt:
             print("服务器关闭中...")
         finally:
+            self.market_feed.stop()
+            if self.http_frontend is not None:
+                await self.http_frontend.stop()
             server.close()
             await server.wait_closed()
+            # 写回缓存中尚未落盘的玩家数据
+            await player_dao.flush_all()
             print("服务器已关闭")
 
 # 服务器入口点
@@ -2,10 +2,11 @@
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 import asyncio
-from backend.dao import (
+from server.backend.dao import (
     player_dao, recipe_dao, ingredient_dao, 
     quest_dao, business_dao, inventory_dao
 )
+from server.utils.keyed_lock import player_locks
 
 class PlayerService:
     """玩家服务类"""
@@ -35,25 +36,27 @@ class PlayerService:
             
     async def add_experience(self, player_id: str, exp: int) -> Dict:
         """为玩家添加经验"""
-        player = await self.get_player(player_id)
-        if not player:
-            return {"status": "error", "message": "Player not found"}
+        # 同一玩家的读-改-写串行执行，避免并发请求丢失更新
+        async with player_locks.lock(player_id):
+            player = await self.get_player(player_id)
+            if not player:
+                return {"status": "error", "message": "Player not found"}
+                
+            current_exp = player.get("experience", 0)
+            player["experience"] = current_exp + exp
             
-        current_exp = player.get("experience", 0)
-        player["experience"] = current_exp + exp
-        
-        success = await self.update_player(player_id, player)
-        if success:
-            return {
-                "status": "success",
-                "message": f"Added {exp} experience",
-                "total_experience": player["experience"]
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "Failed to update player experience"
-            }
+            success = await self.update_player(player_id, player)
+            if success:
+                return {
+                    "status": "success",
+                    "message": f"Added {exp} experience",
+                    "total_experience": player["experience"]
+                }
+            else:
+                return {
+                    "status": "error",
+                    "message": "Failed to update player experience"
+                }
 
 class RecipeService:
     """菜谱服务类"""
@@ -104,36 +107,38 @@ class QuestService:
         
     async def accept_quest(self, player_id: str, quest_id: str) -> Dict:
         """接受任务"""
-        player = await player_service.get_player(player_id)
-        if not player:
-            return {"status": "error", "message": "Player not found"}
+        # 同一玩家的读-改-写串行执行，避免并发请求丢失更新
+        async with player_locks.lock(player_id):
+            player = await player_service.get_player(player_id)
+            if not player:
+                return {"status": "error", "message": "Player not found"}
+                
+            quest = await self.get_quest(quest_id)
+            if not quest:
+                return {"status": "error", "message": "Quest not found"}
+                
+            # 添加任务到玩家活跃任务列表
+            if "active_quests" not in player:
+                player["active_quests"] = []
+                
+            player["active_quests"].append({
+                "id": quest_id,
+                "status": "active",
+                "accept_time": datetime.now().isoformat(),
+                "progress": 0
+            })
             
-        quest = await self.get_quest(quest_id)
-        if not quest:
-            return {"status": "error", "message": "Quest not found"}
-            
-        # 添加任务到玩家活跃任务列表
-        if "active_quests" not in player:
-            player["active_quests"] = []
-            
-        player["active_quests"].append({
-            "id": quest_id,
-            "status": "active",
-            "accept_time": datetime.now().isoformat(),
-            "progress": 0
-        })
-        
-        success = await player_service.update_player(player_id, player)
-        if success:
-            return {
-                "status": "success",
-                "message": f"Quest {quest_id} accepted"
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "Failed to accept quest"
-            }
+            success = await player_service.update_player(player_id, player)
+            if success:
+                return {
+                    "status": "success",
+                    "message": f"Quest {quest_id} accepted"
+                }
+            else:
+                return {
+                    "status": "error",
+                    "message": "Failed to accept quest"
+                }
 
 class BusinessService:
     """经营服务类"""
@@ -158,81 +163,83 @@ class BusinessService:
             
     async def serve_customers(self, player_id: str, customer_count: int, dish_quality: int = 50) -> Dict:
         """服务顾客"""
-        business = await self.get_business_info(player_id)
-        if not business:
-            # 创建新的经营数据
-            business = {
-                "player_id": player_id,
-                "restaurant_level": 1,
-                "reputation": 50,
-                "customer_satisfaction": 50,
-                "daily_revenue": 0,
-                "total_revenue": 0,
-                "staff_count": 1,
-                "daily_customer_count": 0,
-                "total_customer_count": 0
-            }
+        # 同一玩家的读-改-写串行执行，避免并发请求丢失更新
+        async with player_locks.lock(player_id):
+            business = await self.get_business_info(player_id)
+            if not business:
+                # 创建新的经营数据
+                business = {
+                    "player_id": player_id,
+                    "restaurant_level": 1,
+                    "reputation": 50,
+                    "customer_satisfaction": 50,
+                    "daily_revenue": 0,
+                    "total_revenue": 0,
+                    "staff_count": 1,
+                    "daily_customer_count": 0,
+                    "total_customer_count": 0
+                }
+                
+            # 计算餐厅容量
+            capacities = [10, 25, 50, 100, 200, 500, 1000, 5000]  # 对应8个等级
+            level_index = max(0, min(business["restaurant_level"] - 1, len(capacities) - 1))
+            max_capacity = capacities[level_index]
             
-        # 计算餐厅容量
-        capacities = [10, 25, 50, 100, 200, 500, 1000, 5000]  # 对应8个等级
-        level_index = max(0, min(business["restaurant_level"] - 1, len(capacities) - 1))
-        max_capacity = capacities[level_index]
-        
-        # 实际服务的顾客数不能超过餐厅容量
-        actual_served = min(customer_count, max_capacity - business["daily_customer_count"])
-        if actual_served <= 0:
-            return {"status": "error", "message": "Restaurant is full"}
+            # 实际服务的顾客数不能超过餐厅容量
+            actual_served = min(customer_count, max_capacity - business["daily_customer_count"])
+            if actual_served <= 0:
+                return {"status": "error", "message": "Restaurant is full"}
+                
+            # 增加顾客数
+            business["daily_customer_count"] += actual_served
+            business["total_customer_count"] += actual_served
             
-        # 增加顾客数
-        business["daily_customer_count"] += actual_served
-        business["total_customer_count"] += actual_served
-        
-        # 根据菜肴质量和顾客满意度计算收入
-        quality_factor = dish_quality / 100.0
-        satisfaction_factor = business["customer_satisfaction"] / 100.0
-        reputation_factor = business["reputation"] / 100.0
-        
-        # 基础收入
-        base_revenue = actual_served * 10
-        
-        # 计算总收入
-        multipliers = [1.0, 1.2, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0]  # 对应8个等级
-        level_multiplier = multipliers[level_index]
-        
-        total_revenue = (base_revenue * 
-                        quality_factor * 
-                        satisfaction_factor * 
-                        reputation_factor * 
-                        level_multiplier)
-        
-        # 更新收入统计
-        business["daily_revenue"] += total_revenue
-        business["total_revenue"] += total_revenue
-        
-        # 根据服务质量调整声誉和满意度
-        if dish_quality >= 80:
-            business["reputation"] = min(100, business["reputation"] + 0.5)
-            business["customer_satisfaction"] = min(100, business["customer_satisfaction"] + 0.3)
-        elif dish_quality >= 60:
-            business["reputation"] = min(100, business["reputation"] + 0.2)
-            business["customer_satisfaction"] = min(100, business["customer_satisfaction"] + 0.1)
-        elif dish_quality >= 40:
-            business["reputation"] = max(0, business["reputation"] - 0.1)
-            business["customer_satisfaction"] = max(0, business["customer_satisfaction"] - 0.2)
-        else:
-            business["reputation"] = max(0, business["reputation"] - 0.3)
-            business["customer_satisfaction"] = max(0, business["customer_satisfaction"] - 0.5)
+            # 根据菜肴质量和顾客满意度计算收入
+            quality_factor = dish_quality / 100.0
+            satisfaction_factor = business["customer_satisfaction"] / 100.0
+            reputation_factor = business["reputation"] / 100.0
+            
+            # 基础收入
+            base_revenue = actual_served * 10
+            
+            # 计算总收入
+            multipliers = [1.0, 1.2, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0]  # 对应8个等级
+            level_multiplier = multipliers[level_index]
             
-        # 保存更新后的经营数据
-        await self.update_business_info(player_id, business)
+            total_revenue = (base_revenue * 
+                            quality_factor * 
+                            satisfaction_factor * 
+                            reputation_factor * 
+                            level_multiplier)
             
-        return {
-            "status": "success",
-            "message": f"Served {actual_served} customers",
-            "revenue": total_revenue,
-            "daily_customer_count": business["daily_customer_count"],
-            "total_revenue": business["total_revenue"]
-        }
+            # 更新收入统计
+            business["daily_revenue"] += total_revenue
+            business["total_revenue"] += total_revenue
+            
+            # 根据服务质量调整声誉和满意度
+            if dish_quality >= 80:
+                business["reputation"] = min(100, business["reputation"] + 0.5)
+                business["customer_satisfaction"] = min(100, business["customer_satisfaction"] + 0.3)
+            elif dish_quality >= 60:
+                business["reputation"] = min(100, business["reputation"] + 0.2)
+                business["customer_satisfaction"] = min(100, business["customer_satisfaction"] + 0.1)
+            elif dish_quality >= 40:
+                business["reputation"] = max(0, business["reputation"] - 0.1)
+                business["customer_satisfaction"] = max(0, business["customer_satisfaction"] - 0.2)
+            else:
+                business["reputation"] = max(0, business["reputation"] - 0.3)
+                business["customer_satisfaction"] = max(0, business["customer_satisfaction"] - 0.5)
+                
+            # 保存更新后的经营数据
+            await self.update_business_info(player_id, business)
+                
+            return {
+                "status": "success",
+                "message": f"Served {actual_served} customers",
+                "revenue": total_revenue,
+                "daily_customer_count": business["daily_customer_count"],
+                "total_revenue": business["total_revenue"]
+            }
 
 class InventoryService:
     """背包服务类"""
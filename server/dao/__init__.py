@@ -3,6 +3,7 @@
 # 导入数据访问对象模块
 from .data_access import (
     BaseDAO, 
+    CollectionDAO, 
     PlayerDAO, 
     RecipeDAO, 
     IngredientDAO, 
@@ -16,10 +17,14 @@ from .data_access import (
     business_dao,
     inventory_dao
 )
+from .sqlite_backend import SQLiteStorage
+from .collection_manifest import CollectionManifest
+from .storage_config import get_storage_config
 
 # 定义公开接口
 __all__ = [
     "BaseDAO",
+    "CollectionDAO",
     "PlayerDAO",
     "RecipeDAO",
     "IngredientDAO",
@@ -31,5 +36,8 @@ __all__ = [
     "ingredient_dao",
     "quest_dao",
     "business_dao",
-    "inventory_dao"
+    "inventory_dao",
+    "SQLiteStorage",
+    "CollectionManifest",
+    "get_storage_config"
 ]
\ No newline at end of file
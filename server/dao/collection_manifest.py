@@ -0,0 +1,122 @@
+# 服务端集合清单模块
+# 每个按ID一个文件存放的集合（菜谱、食材、任务）维护一个清单文件，记录 ID -> 文件名、mtime、大小，
+# 列出集合时直接读清单，不再扫描目录做文件名匹配。
+# 可选的段文件把集合中的所有记录合并到一个文件里，冷启动时一次读取代替逐个打开小文件；
+# 段中记录的mtime和大小与清单不一致时视为过期，改为读取单独的文件。
+# 清单和段文件与集合记录一样属于配置数据，始终写成紧凑JSON，不使用存档编码
+import os
+from typing import Dict, Any, Tuple
+from server.utils.atomic_write import atomic_write_json
+from server.utils.save_codec import SAVE_COMPACT, decode_save
+
+MANIFEST_VERSION = 1
+
+def _entry_order(record_id: str) -> Tuple[int, Any]:
+    """清单中记录的排列顺序：数字ID按数值排在前面，其他ID按字符串排序"""
+    return (0, int(record_id)) if record_id.isdigit() else (1, record_id)
+
+class CollectionManifest:
+    """集合清单（同步方法，在executor中调用）"""
+
+    def __init__(self, data_dir: str, collection: str, file_prefix: str):
+        """
+        :param data_dir: 数据目录
+        :param collection: 集合名称，如recipes
+        :param file_prefix: 记录文件名前缀，如recipe_（文件名为 前缀+ID.json）
+        """
+        self.data_dir = data_dir
+        self.collection = collection
+        self.file_prefix = file_prefix
+        self.manifest_path = os.path.join(data_dir, f"{collection}.manifest.json")
+        self.segment_path = os.path.join(data_dir, f"{collection}.segment.json")
+        self.entries: Dict[str, Dict[str, Any]] = {}  # {ID: {"file": 文件名, "mtime": ..., "size": ...}}，始终按ID排序
+
+    def file_name(self, record_id: Any) -> str:
+        return f"{self.file_prefix}{record_id}.json"
+
+    def load(self):
+        """加载清单，清单不存在或无法解析时扫描目录重建"""
+        try:
+            with open(self.manifest_path, 'rb') as f:
+                manifest = decode_save(f.read())
+            if manifest.get("version") == MANIFEST_VERSION and isinstance(manifest.get("entries"), dict):
+                self.entries = self._sorted(manifest["entries"])
+                return
+        except (OSError, ValueError):
+            pass
+        self.rebuild()
+
+    def rebuild(self):
+        """扫描目录重建清单（只在清单缺失或数据目录被外部修改后需要）"""
+        entries = {}
+        suffix = ".json"
+        with os.scandir(self.data_dir) as scanner:
+            for item in scanner:
+                name = item.name
+                if name.startswith(self.file_prefix) and name.endswith(suffix) and item.is_file():
+                    stat = item.stat()
+                    record_id = name[len(self.file_prefix):-len(suffix)]
+                    entries[record_id] = {"file": name, "mtime": stat.st_mtime, "size": stat.st_size}
+        self.entries = self._sorted(entries)
+        self.save()
+
+    @staticmethod
+    def _sorted(entries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return dict(sorted(entries.items(), key=lambda item: _entry_order(item[0])))
+
+    def save(self):
+        """原子写入清单文件"""
+        atomic_write_json(self.manifest_path, {
+            "version": MANIFEST_VERSION,
+            "collection": self.collection,
+            "entries": self.entries
+        }, encoding=SAVE_COMPACT)
+
+    def record(self, record_id: Any) -> bool:
+        """记录文件写入后的状态，返回清单是否变化"""
+        name = self.file_name(record_id)
+        try:
+            stat = os.stat(os.path.join(self.data_dir, name))
+        except OSError:
+            return self.remove(record_id)
+        entry = {"file": name, "mtime": stat.st_mtime, "size": stat.st_size}
+        key = str(record_id)
+        if self.entries.get(key) == entry:
+            return False
+        is_new = key not in self.entries
+        self.entries[key] = entry
+        if is_new:
+            # 新记录插入到排序后的位置，与重建后的顺序一致
+            self.entries = self._sorted(self.entries)
+        return True
+
+    def remove(self, record_id: Any) -> bool:
+        """从清单中删除记录，返回清单是否变化"""
+        return self.entries.pop(str(record_id), None) is not None
+
+    def load_segment(self) -> Dict[str, Any]:
+        """
+        读取段文件中仍然有效的记录
+        :return: {ID: 记录}，段文件不存在时返回空字典
+        """
+        try:
+            with open(self.segment_path, 'rb') as f:
+                segment = decode_save(f.read())
+        except (OSError, ValueError):
+            return {}
+        records = {}
+        for record_id, item in segment.get("entries", {}).items():
+            entry = self.entries.get(record_id)
+            if entry is not None and entry["mtime"] == item.get("mtime") and entry["size"] == item.get("size"):
+                records[record_id] = item.get("data")
+        return records
+
+    def write_segment(self, records: Dict[str, Any]) -> int:
+        """把记录合并写入段文件，返回写入的记录数"""
+        entries = {}
+        for record_id, data in records.items():
+            entry = self.entries.get(record_id)
+            if entry is not None:
+                entries[record_id] = {"mtime": entry["mtime"], "size": entry["size"], "data": data}
+        atomic_write_json(self.segment_path, {"version": MANIFEST_VERSION, "entries": entries}, encoding=SAVE_COMPACT)
+        return len(entries)
@@ -1,147 +1,199 @@
 # 服务端数据访问对象模块，实现业务逻辑与数据访问的分离
-import json
 import os
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 import asyncio
+from server.utils.single_flight import file_reads
+from server.utils.io_executor import StorageIOExecutor, get_io_executor
+from server.utils.save_codec import SAVE_JSON, set_save_encoding
+from server.utils.atomic_write import GroupCommitWriter
+from server.dao.file_dao import BaseDAO, PlayerDAO
+from server.dao.collection_manifest import CollectionManifest
+from server.dao.storage_config import get_storage_config, STORAGE_SQLITE
+from server.dao.sqlite_backend import (
+    SQLiteStorage, SQLitePlayerDAO, SQLiteRecipeDAO, SQLiteIngredientDAO,
+    SQLiteQuestDAO, SQLiteBusinessDAO, SQLiteInventoryDAO
+)
 
-class BaseDAO:
-    """基础数据访问对象"""
+class CollectionDAO(BaseDAO):
+    """
+    按ID一个文件存放的集合（菜谱、食材、任务）的数据访问对象
+    列出集合时读取清单而不是扫描目录，批量加载时并发读取文件，并发数受信号量限制；
+    开启段文件后，冷启动时先从合并的段文件读取记录，只有过期或缺失的记录才逐个读文件
+    """
     
-    def __init__(self, data_dir: str = "saves"):
-        self.data_dir = data_dir
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
-            
-    async def _read_file(self, file_path: str) -> Optional[Dict]:
-        """异步读取文件"""
-        loop = asyncio.get_event_loop()
-        try:
-            # 使用run_in_executor避免阻塞
-            data = await loop.run_in_executor(None, self._sync_read_file, file_path)
-            return data
-        except Exception as e:
-            print(f"读取文件失败 {file_path}: {e}")
-            return None
-            
-    def _sync_read_file(self, file_path: str) -> Optional[Dict]:
-        """同步读取文件（在executor中运行）"""
-        if os.path.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return None
-        
-    async def _write_file(self, file_path: str, data: Dict) -> bool:
-        """异步写入文件"""
+    collection = ""
+    file_prefix = ""
+    # 菜谱、食材、任务属于配置数据，始终写成缩进的JSON，不使用存档编码
+    save_encoding = SAVE_JSON
+    
+    def __init__(self, data_dir: str = "saves", group_commit: Optional[GroupCommitWriter] = None,
+                 max_concurrent_reads: int = 16, use_segment: bool = False,
+                 io_executor: Optional[StorageIOExecutor] = None):
+        """
+        :param max_concurrent_reads: 批量加载时同时进行的文件读取数上限
+        :param use_segment: 批量加载时是否优先读取段文件（由consolidate()生成）
+        :param io_executor: 执行文件读写的线程池，默认使用共享的存储I/O线程池
+        """
+        super().__init__(data_dir, group_commit, io_executor)
+        self.max_concurrent_reads = max(1, max_concurrent_reads)
+        self.use_segment = use_segment
+        self._manifest: Optional[CollectionManifest] = None
+        self._manifest_lock: Optional[asyncio.Lock] = None
+        self._manifest_lock_loop = None
+        
+    def _get_manifest_lock(self) -> asyncio.Lock:
+        """
+        获取清单锁，在协程中首次使用时创建：全局DAO在导入时创建，此时创建的锁在Python 3.8/3.9上
+        会绑定到导入时的事件循环，并发使用时报错。事件循环变化时重新创建
+        """
         loop = asyncio.get_event_loop()
-        try:
-            # 使用run_in_executor避免阻塞
-            await loop.run_in_executor(None, self._sync_write_file, file_path, data)
-            return True
-        except Exception as e:
-            print(f"写入文件失败 {file_path}: {e}")
-            return False
+        if self._manifest_lock is None or self._manifest_lock_loop is not loop:
+            self._manifest_lock = asyncio.Lock()
+            self._manifest_lock_loop = loop
+        return self._manifest_lock
+        
+    def _record_path(self, record_id: Any) -> str:
+        return os.path.join(self.data_dir, f"{self.file_prefix}{record_id}.json")
+        
+    async def _get_manifest(self) -> CollectionManifest:
+        """获取清单，首次使用或data_dir变化时在存储I/O线程池中加载"""
+        manifest = self._manifest
+        if manifest is not None and manifest.data_dir == self.data_dir:
+            return manifest
+        async with self._get_manifest_lock():
+            if self._manifest is None or self._manifest.data_dir != self.data_dir:
+                manifest = CollectionManifest(self.data_dir, self.collection, self.file_prefix)
+                await self.io.run(self.io_metrics, "manifest_load", manifest.load)
+                self._manifest = manifest
+            return self._manifest
             
-    def _sync_write_file(self, file_path: str, data: Dict):
-        """同步写入文件（在executor中运行）"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-
-class PlayerDAO(BaseDAO):
-    """玩家数据访问对象"""
-    
-    async def get_player(self, player_id: str) -> Optional[Dict]:
-        """获取玩家数据"""
-        file_path = os.path.join(self.data_dir, f"player_{player_id}.json")
-        return await self._read_file(file_path)
+    async def _update_manifest(self, update, *args) -> bool:
+        """在存储I/O线程池中修改清单，有变化时原子写回清单文件"""
+        manifest = await self._get_manifest()
         
-    async def save_player(self, player_id: str, player_data: Dict) -> bool:
-        """保存玩家数据"""
-        file_path = os.path.join(self.data_dir, f"player_{player_id}.json")
-        player_data["last_updated"] = datetime.now().isoformat()
-        return await self._write_file(file_path, player_data)
-        
-    async def create_player(self, player_id: str, player_data: Dict) -> bool:
-        """创建玩家数据"""
-        # 检查玩家是否已存在
-        existing_player = await self.get_player(player_id)
-        if existing_player:
-            return False
+        def apply():
+            changed = update(manifest, *args)
+            if changed:
+                manifest.save()
+            return changed
+            
+        async with self._get_manifest_lock():
+            return await self.io.run(self.io_metrics, "manifest_save", apply)
             
-        # 添加创建时间
-        player_data["created_at"] = datetime.now().isoformat()
-        player_data["last_updated"] = datetime.now().isoformat()
+    async def _get_record(self, record_id: Any) -> Optional[Dict]:
+        """获取单条记录"""
+        return await self._read_file(self._record_path(record_id))
         
-        return await self.save_player(player_id, player_data)
+    async def _load_records(self, manifest: CollectionManifest, record_ids: List[str]) -> Dict[str, Dict]:
+        """并发读取记录文件（同时进行的读取数不超过max_concurrent_reads）"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_reads)
         
-    async def delete_player(self, player_id: str) -> bool:
-        """删除玩家数据"""
-        file_path = os.path.join(self.data_dir, f"player_{player_id}.json")
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
+        async def load(record_id: str):
+            async with semaphore:
+                return record_id, await self._read_file(os.path.join(self.data_dir, manifest.entries[record_id]["file"]))
+                
+        results = await asyncio.gather(*(load(record_id) for record_id in record_ids))
+        return {record_id: data for record_id, data in results if data}
+        
+    async def _get_all_records(self) -> List[Dict]:
+        """按清单顺序获取集合中的所有记录"""
+        manifest = await self._get_manifest()
+        records = {}
+        if self.use_segment:
+            records = await self.io.run(self.io_metrics, "segment_read", manifest.load_segment)
+        missing = [record_id for record_id in manifest.entries if record_id not in records]
+        if missing:
+            records.update(await self._load_records(manifest, missing))
+        return [records[record_id] for record_id in manifest.entries if records.get(record_id)]
+        
+    async def _save_record(self, record_id: Any, data: Dict) -> bool:
+        """保存单条记录并更新清单"""
+        if not await self._write_file(self._record_path(record_id), data):
             return False
+        await self._update_manifest(CollectionManifest.record, record_id)
+        return True
+        
+    async def _delete_record(self, record_id: Any) -> bool:
+        """删除单条记录并从清单中移除"""
+        file_path = self._record_path(record_id)
+        try:
+            existed = await self.io.run(self.io_metrics, "delete", self._sync_delete_file, file_path)
         except Exception as e:
-            print(f"删除玩家数据失败 {player_id}: {e}")
+            print(f"删除文件失败 {file_path}: {e}")
+            return False
+        file_reads.forget(file_path)
+        await self._update_manifest(CollectionManifest.remove, record_id)
+        return existed
+        
+    @staticmethod
+    def _sync_delete_file(file_path: str) -> bool:
+        """删除文件（在存储I/O线程池中运行），返回文件原来是否存在"""
+        try:
+            os.remove(file_path)
+            return True
+        except FileNotFoundError:
             return False
+            
+    async def rebuild_manifest(self) -> int:
+        """扫描目录重建清单（数据目录被外部修改后调用），返回记录数"""
+        manifest = await self._get_manifest()
+        async with self._get_manifest_lock():
+            await self.io.run(self.io_metrics, "manifest_rebuild", manifest.rebuild)
+        return len(manifest.entries)
+        
+    async def consolidate(self) -> int:
+        """把集合中的所有记录合并写入段文件（用于加快冷启动），返回写入的记录数"""
+        manifest = await self._get_manifest()
+        records = await self._load_records(manifest, list(manifest.entries))
+        async with self._get_manifest_lock():
+            return await self.io.run(self.io_metrics, "segment_write", manifest.write_segment, records)
 
-class RecipeDAO(BaseDAO):
+class RecipeDAO(CollectionDAO):
     """菜谱数据访问对象"""
     
+    collection = "recipes"
+    file_prefix = "recipe_"
+    
     async def get_recipe(self, recipe_id: str) -> Optional[Dict]:
         """获取菜谱数据"""
-        file_path = os.path.join(self.data_dir, f"recipe_{recipe_id}.json")
-        return await self._read_file(file_path)
+        return await self._get_record(recipe_id)
         
     async def get_all_recipes(self) -> List[Dict]:
         """获取所有菜谱数据"""
-        recipes = []
-        for file_name in os.listdir(self.data_dir):
-            if file_name.startswith("recipe_") and file_name.endswith(".json"):
-                file_path = os.path.join(self.data_dir, file_name)
-                recipe = await self._read_file(file_path)
-                if recipe:
-                    recipes.append(recipe)
-        return recipes
+        return await self._get_all_records()
+        
+    async def save_recipe(self, recipe_data: Dict) -> bool:
+        """保存菜谱数据（以id为键）"""
+        return await self._save_record(recipe_data["id"], recipe_data)
 
-class IngredientDAO(BaseDAO):
+class IngredientDAO(CollectionDAO):
     """食材数据访问对象"""
     
+    collection = "ingredients"
+    file_prefix = "ingredient_"
+    
     async def get_ingredient(self, ingredient_id: str) -> Optional[Dict]:
         """获取食材数据"""
-        file_path = os.path.join(self.data_dir, f"ingredient_{ingredient_id}.json")
-        return await self._read_file(file_path)
+        return await self._get_record(ingredient_id)
         
     async def get_all_ingredients(self) -> List[Dict]:
         """获取所有食材数据"""
-        ingredients = []
-        for file_name in os.listdir(self.data_dir):
-            if file_name.startswith("ingredient_") and file_name.endswith(".json"):
-                file_path = os.path.join(self.data_dir, file_name)
-                ingredient = await self._read_file(file_path)
-                if ingredient:
-                    ingredients.append(ingredient)
-        return ingredients
+        return await self._get_all_records()
 
-class QuestDAO(BaseDAO):
+class QuestDAO(CollectionDAO):
     """任务数据访问对象"""
     
+    collection = "quests"
+    file_prefix = "quest_"
+    
     async def get_quest(self, quest_id: str) -> Optional[Dict]:
         """获取任务数据"""
-        file_path = os.path.join(self.data_dir, f"quest_{quest_id}.json")
-        return await self._read_file(file_path)
+        return await self._get_record(quest_id)
         
     async def get_all_quests(self) -> List[Dict]:
         """获取所有任务数据"""
-        quests = []
-        for file_name in os.listdir(self.data_dir):
-            if file_name.startswith("quest_") and file_name.endswith(".json"):
-                file_path = os.path.join(self.data_dir, file_name)
-                quest = await self._read_file(file_path)
-                if quest:
-                    quests.append(quest)
-        return quests
+        return await self._get_all_records()
 
 class BusinessDAO(BaseDAO):
     """经营数据访问对象"""
@@ -171,10 +223,24 @@ class InventoryDAO(BaseDAO):
         inventory_data["last_updated"] = datetime.now().isoformat()
         return await self._write_file(file_path, inventory_data)
 
-# 创建全局DAO实例
-player_dao = PlayerDAO()
-recipe_dao = RecipeDAO()
-ingredient_dao = IngredientDAO()
-quest_dao = QuestDAO()
-business_dao = BusinessDAO()
-inventory_dao = InventoryDAO()
\ No newline at end of file
+# 创建全局DAO实例，存储后端由配置选择（见storage_config.py）
+storage_config = get_storage_config()
+# 按配置的线程数创建共享的存储I/O线程池（之后创建的DAO默认使用它）
+get_io_executor(storage_config["io_threads"])
+set_save_encoding(storage_config["save_encoding"])
+if storage_config["backend"] == STORAGE_SQLITE:
+    sqlite_storage = SQLiteStorage.shared(storage_config["sqlite_path"], storage_config["pool_size"])
+    player_dao = SQLitePlayerDAO(sqlite_storage)
+    recipe_dao = SQLiteRecipeDAO(sqlite_storage)
+    ingredient_dao = SQLiteIngredientDAO(sqlite_storage)
+    quest_dao = SQLiteQuestDAO(sqlite_storage)
+    business_dao = SQLiteBusinessDAO(sqlite_storage)
+    inventory_dao = SQLiteInventoryDAO(sqlite_storage)
+else:
+    player_dao = PlayerDAO()
+    use_segment = storage_config["collection_segments"]
+    recipe_dao = RecipeDAO(use_segment=use_segment)
+    ingredient_dao = IngredientDAO(use_segment=use_segment)
+    quest_dao = QuestDAO(use_segment=use_segment)
+    business_dao = BusinessDAO()
+    inventory_dao = InventoryDAO()
\ No newline at end of file
@@ -0,0 +1,153 @@
+# 基于文件的数据访问对象模块
+# 服务端（server.dao.data_access）和后端（server.backend.dao）共用同一套文件存储实现：
+# 合并并发读取、原子写入、组提交，以及玩家数据的写回缓存和变更日志
+import os
+from typing import Dict, Optional
+from datetime import datetime
+from server.utils.write_behind_cache import WriteBehindCache
+from server.utils.single_flight import file_reads
+from server.utils.io_executor import StorageIOExecutor, get_io_executor
+from server.utils.save_codec import decode_save
+from server.utils.mutation_journal import MutationJournal
+from server.utils.atomic_write import GroupCommitWriter, atomic_write_json
+
+class BaseDAO:
+    """基础数据访问对象"""
+    
+    # 写入文件使用的编码，None时使用配置的存档编码（KITCHEN_SAVE_ENCODING）
+    save_encoding: Optional[str] = None
+    
+    def __init__(self, data_dir: str = "saves", group_commit: Optional[GroupCommitWriter] = None,
+                 io_executor: Optional[StorageIOExecutor] = None):
+        """
+        :param group_commit: 组提交写入器，指定时多个写入合并为一批刷盘，否则每次写入单独fsync
+        :param io_executor: 执行文件读写的线程池，默认使用共享的存储I/O线程池
+        """
+        self.io = io_executor if io_executor is not None else get_io_executor()
+        # 同类型的DAO实例共用一份统计
+        self.io_metrics = self.io.metrics_for(type(self).__name__)
+        # data_dir在io之后设置，子类的data_dir属性（如目录DAO注册配置文件）可以使用线程池和统计
+        self.data_dir = data_dir
+        self.group_commit = group_commit
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+            
+    async def _read_file(self, file_path: str) -> Optional[Dict]:
+        """异步读取文件，同一文件的并发读取合并为一次"""
+        return await file_reads.do(file_path, lambda: self._read_file_once(file_path))
+        
+    async def _read_file_once(self, file_path: str) -> Optional[Dict]:
+        """在存储I/O线程池中读取文件"""
+        try:
+            return await self.io.run(self.io_metrics, "read", self._sync_read_file, file_path)
+        except Exception as e:
+            print(f"读取文件失败 {file_path}: {e}")
+            return None
+            
+    def _sync_read_file(self, file_path: str) -> Optional[Dict]:
+        """同步读取文件（在存储I/O线程池中运行）"""
+        if os.path.exists(file_path):
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+            self.io_metrics.add_bytes_read(len(raw))
+            return decode_save(raw)
+        return None
+        
+    async def _write_file(self, file_path: str, data: Dict) -> bool:
+        """异步写入文件"""
+        try:
+            return await self._write_file_once(file_path, data)
+        finally:
+            # 写入完成前开始的读取可能返回旧内容，之后的读取不再加入它，重新发起
+            file_reads.forget(file_path)
+            
+    async def _write_file_once(self, file_path: str, data: Dict) -> bool:
+        """写入文件，指定组提交写入器时由它合并刷盘"""
+        if self.group_commit is not None:
+            return await self.group_commit.write(file_path, data, self.save_encoding)
+        try:
+            await self.io.run(self.io_metrics, "write", self._sync_write_file, file_path, data)
+            return True
+        except Exception as e:
+            print(f"写入文件失败 {file_path}: {e}")
+            return False
+            
+    def _sync_write_file(self, file_path: str, data: Dict):
+        """同步写入文件（在存储I/O线程池中运行），先写临时文件并fsync再rename，崩溃时不会留下截断的文件"""
+        self.io_metrics.add_bytes_written(atomic_write_json(file_path, data, encoding=self.save_encoding))
+
+class PlayerDAO(BaseDAO):
+    """
+    玩家数据访问对象
+    玩家数据经过写回缓存：保存只更新内存，由后台任务合并写回。写回时只把与上次持久化版本的差异
+    追加到分片变更日志，日志定期折叠进存档文件，关闭前需要调用flush_all()
+    """
+    
+    def __init__(self, data_dir: str = "saves", flush_interval: float = 5.0,
+                 max_dirty_age: float = 30.0, max_cached_players: int = 1000,
+                 group_commit: Optional[GroupCommitWriter] = None,
+                 journal_shards: int = 16, compact_interval: float = 60.0,
+                 io_executor: Optional[StorageIOExecutor] = None):
+        """
+        :param flush_interval: 脏数据写回间隔（秒）
+        :param max_dirty_age: 脏数据最长存在时间（秒）
+        :param max_cached_players: 最多缓存的玩家数
+        :param group_commit: 组提交写入器，变更日志压缩时由它写入玩家存档，同时压缩的分片合并为一批刷盘；
+                             默认为该DAO创建一个
+        :param journal_shards: 变更日志分片数
+        :param compact_interval: 变更日志折叠进存档文件的间隔（秒）
+        :param io_executor: 执行文件读写的线程池，默认使用共享的存储I/O线程池
+        """
+        super().__init__(data_dir, group_commit, io_executor)
+        if self.group_commit is None:
+            self.group_commit = GroupCommitWriter(io_executor=self.io)
+        self.journal = MutationJournal(
+            shards=journal_shards, compact_interval=compact_interval, max_baselines=max_cached_players,
+            io_executor=self.io, io_metrics=self.io_metrics, group_commit=self.group_commit
+        )
+        # 以文件路径为键，data_dir变化时不会读到其他目录的数据
+        self.cache = WriteBehindCache(
+            self.journal.load, self.journal.write,
+            flush_interval=flush_interval, max_dirty_age=max_dirty_age, max_entries=max_cached_players
+        )
+        
+    def _player_path(self, player_id: str) -> str:
+        return os.path.join(self.data_dir, f"player_{player_id}.json")
+        
+    async def get_player(self, player_id: str) -> Optional[Dict]:
+        """获取玩家数据（返回副本，修改后需要调用save_player）"""
+        return await self.cache.get(self._player_path(player_id))
+        
+    async def save_player(self, player_id: str, player_data: Dict) -> bool:
+        """保存玩家数据（写入缓存，稍后合并写回文件）"""
+        player_data["last_updated"] = datetime.now().isoformat()
+        return await self.cache.put(self._player_path(player_id), player_data)
+        
+    async def create_player(self, player_id: str, player_data: Dict) -> bool:
+        """创建玩家数据，玩家已存在时返回False"""
+        # 检查玩家是否已存在
+        existing_player = await self.get_player(player_id)
+        if existing_player:
+            return False
+            
+        # 确保玩家ID在数据中，并添加创建时间
+        player_data["id"] = player_id
+        player_data["created_at"] = datetime.now().isoformat()
+        
+        return await self.save_player(player_id, player_data)
+        
+    async def delete_player(self, player_id: str) -> bool:
+        """删除玩家数据"""
+        file_path = self._player_path(player_id)
+        self.cache.discard(file_path)
+        try:
+            return await self.journal.delete(file_path)
+        except Exception as e:
+            print(f"删除玩家数据失败 {player_id}: {e}")
+            return False
+            
+    async def flush_all(self) -> int:
+        """把所有未写回的玩家数据写入文件（正常关闭时调用），返回写回失败的玩家数"""
+        failed = await self.cache.close()
+        await self.journal.close()
+        return failed
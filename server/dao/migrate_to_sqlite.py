@@ -0,0 +1,87 @@
+# 存档迁移工具：把saves/目录中的JSON存档导入SQLite数据库
+# 用法: python -m server.dao.migrate_to_sqlite [--saves-dir saves] [--db saves/game.db]
+# 导入按 (集合, 键) 覆盖写入，可以重复执行
+import argparse
+import asyncio
+import os
+from typing import Dict, Any, List, Optional, Tuple
+from server.dao.sqlite_backend import SQLiteStorage
+from server.dao.storage_config import get_storage_config
+from server.utils.mutation_journal import MutationJournal
+from server.utils.save_codec import decode_save
+
+# 文件名前缀与集合的对应关系，如 player_1001.json -> players/1001
+FILE_COLLECTIONS = {
+    "player_": "players",
+    "business_": "business",
+    "inventory_": "inventory",
+    "recipe_": "recipes",
+    "ingredient_": "ingredients",
+    "quest_": "quests"
+}
+
+BATCH_SIZE = 500  # 每个事务写入的记录数
+
+def scan_saves(saves_dir: str) -> Tuple[Dict[str, List[Tuple[str, Any]]], List[str]]:
+    """
+    扫描存档目录
+    :return: ({集合: [(键, 数据)]}, 无法解析的文件列表)
+    """
+    collections: Dict[str, List[Tuple[str, Any]]] = {name: [] for name in FILE_COLLECTIONS.values()}
+    failed = []
+    for file_name in sorted(os.listdir(saves_dir)):
+        if not file_name.endswith(".json"):
+            continue
+        for prefix, collection in FILE_COLLECTIONS.items():
+            if file_name.startswith(prefix):
+                key = file_name[len(prefix):-len(".json")]
+                file_path = os.path.join(saves_dir, file_name)
+                try:
+                    with open(file_path, 'rb') as f:
+                        collections[collection].append((key, decode_save(f.read())))
+                except (OSError, ValueError) as e:
+                    print(f"无法读取存档 {file_path}: {e}")
+                    failed.append(file_path)
+                break
+    return collections, failed
+
+async def migrate(saves_dir: str, db_path: str) -> Dict[str, Any]:
+    """
+    导入存档
+    :return: {"imported": {集合: 条数}, "failed": [文件路径]}
+    """
+    # 玩家存档的修改可能还在变更日志中，先折叠进存档文件
+    await MutationJournal().compact_directory(saves_dir)
+    collections, failed = scan_saves(saves_dir)
+    storage = SQLiteStorage(db_path, pool_size=1)
+    imported = {}
+    try:
+        for collection, items in collections.items():
+            count = 0
+            for start in range(0, len(items), BATCH_SIZE):
+                count += await storage.put_many(collection, items[start:start + BATCH_SIZE])
+            imported[collection] = count
+    finally:
+        storage.close()
+    return {"imported": imported, "failed": failed}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    config = get_storage_config()
+    parser = argparse.ArgumentParser(description="把JSON存档导入SQLite数据库")
+    parser.add_argument("--saves-dir", default="saves", help="JSON存档目录")
+    parser.add_argument("--db", default=config["sqlite_path"], help="SQLite数据库文件路径")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.saves_dir):
+        print(f"存档目录不存在: {args.saves_dir}")
+        return 1
+
+    result = asyncio.run(migrate(args.saves_dir, args.db))
+    for collection, count in result["imported"].items():
+        print(f"{collection:<12}{count:>8}")
+    print(f"已导入到 {args.db}，失败 {len(result['failed'])} 个文件")
+    return 1 if result["failed"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,349 @@
+# 服务端SQLite存储后端模块
+# 与JSON文件后端实现相同的DAO方法，记录按 (集合, 键) 存放在一张文档表中。
+# 数据库使用WAL模式，语句均为固定的参数化SQL（由sqlite3按连接缓存预编译语句），
+# 所有数据库操作在专用线程池中执行，每个线程从连接池借用连接
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+from server.utils.write_behind_cache import WriteBehindCache
+
+SCHEMA_VERSION = 1
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (collection, key)
+) WITHOUT ROWID
+"""
+
+SELECT_SQL = "SELECT data FROM documents WHERE collection = ? AND key = ?"
+SELECT_ALL_SQL = "SELECT data FROM documents WHERE collection = ? ORDER BY key"
+COUNT_SQL = "SELECT COUNT(*) FROM documents WHERE collection = ?"
+UPSERT_SQL = (
+    "INSERT INTO documents (collection, key, data, updated_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(collection, key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at"
+)
+INSERT_SQL = "INSERT OR IGNORE INTO documents (collection, key, data, updated_at) VALUES (?, ?, ?, ?)"
+DELETE_SQL = "DELETE FROM documents WHERE collection = ? AND key = ?"
+
+class SQLiteStorage:
+    """SQLite文档存储，带连接池和专用线程池"""
+
+    _shared: Dict[str, "SQLiteStorage"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: str, pool_size: int = 4, busy_timeout: float = 5.0):
+        """
+        :param db_path: 数据库文件路径
+        :param pool_size: 连接池大小，同时也是专用线程池的线程数
+        :param busy_timeout: 等待数据库锁的超时时间（秒）
+        """
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="sqlite-dao")
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        self._initialize_schema()
+
+    @classmethod
+    def shared(cls, db_path: str, pool_size: int = 4) -> "SQLiteStorage":
+        """获取指定数据库文件的共享存储实例（多个DAO模块共用同一个连接池）"""
+        key = os.path.abspath(db_path)
+        with cls._shared_lock:
+            storage = cls._shared.get(key)
+            if storage is None:
+                storage = cls(db_path, pool_size)
+                cls._shared[key] = storage
+            return storage
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建连接：WAL模式，自动提交，批量写入时显式开启事务"""
+        connection = sqlite3.connect(
+            self.db_path, timeout=self.busy_timeout, check_same_thread=False,
+            isolation_level=None, cached_statements=64
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WAL模式下NORMAL只在检查点时fsync，提交仍然是原子的
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _initialize_schema(self):
+        connection = self._acquire()
+        try:
+            connection.execute(SCHEMA_SQL)
+            connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        finally:
+            self._release(connection)
+
+    def _acquire(self) -> sqlite3.Connection:
+        """从连接池借用连接，连接数未达上限时新建"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if len(self._connections) < self.pool_size:
+                connection = self._connect()
+                self._connections.append(connection)
+                return connection
+        return self._pool.get()
+
+    def _release(self, connection: sqlite3.Connection):
+        self._pool.put(connection)
+
+    def _with_connection(self, operation, *args):
+        connection = self._acquire()
+        try:
+            return operation(connection, *args)
+        finally:
+            self._release(connection)
+
+    async def _call(self, operation, *args):
+        """在专用线程池中执行数据库操作"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self._with_connection, operation, *args)
+
+    @staticmethod
+    def _encode(data: Any) -> str:
+        return json.dumps(data, ensure_ascii=False)
+
+    @staticmethod
+    def _sync_get(connection, collection: str, key: str) -> Optional[Any]:
+        row = connection.execute(SELECT_SQL, (collection, key)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    @staticmethod
+    def _sync_get_all(connection, collection: str) -> List[Any]:
+        return [json.loads(row[0]) for row in connection.execute(SELECT_ALL_SQL, (collection,))]
+
+    @staticmethod
+    def _sync_count(connection, collection: str) -> int:
+        return connection.execute(COUNT_SQL, (collection,)).fetchone()[0]
+
+    def _sync_put(self, connection, collection: str, key: str, data: Any) -> bool:
+        connection.execute(UPSERT_SQL, (collection, key, self._encode(data), datetime.now().isoformat()))
+        return True
+
+    def _sync_insert(self, connection, collection: str, key: str, data: Any) -> bool:
+        cursor = connection.execute(INSERT_SQL, (collection, key, self._encode(data), datetime.now().isoformat()))
+        return cursor.rowcount == 1
+
+    def _sync_put_many(self, connection, collection: str, items: List[Tuple[str, Any]]) -> int:
+        """在一个事务中写入多条记录"""
+        now = datetime.now().isoformat()
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(UPSERT_SQL, [(collection, key, self._encode(data), now) for key, data in items])
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return len(items)
+
+    @staticmethod
+    def _sync_delete(connection, collection: str, key: str) -> bool:
+        return connection.execute(DELETE_SQL, (collection, key)).rowcount > 0
+
+    async def get(self, collection: str, key: Any) -> Optional[Any]:
+        """读取记录，不存在或出错时返回None"""
+        try:
+            return await self._call(self._sync_get, collection, str(key))
+        except Exception as e:
+            print(f"读取数据失败 {collection}/{key}: {e}")
+            return None
+
+    async def get_all(self, collection: str) -> List[Any]:
+        """读取集合中的所有记录（按键排序）"""
+        try:
+            return await self._call(self._sync_get_all, collection)
+        except Exception as e:
+            print(f"读取数据失败 {collection}: {e}")
+            return []
+
+    async def count(self, collection: str) -> int:
+        """集合中的记录数"""
+        return await self._call(self._sync_count, collection)
+
+    async def put(self, collection: str, key: Any, data: Any) -> bool:
+        """写入记录（存在时覆盖）"""
+        try:
+            return await self._call(self._sync_put, collection, str(key), data)
+        except Exception as e:
+            print(f"写入数据失败 {collection}/{key}: {e}")
+            return False
+
+    async def insert(self, collection: str, key: Any, data: Any) -> bool:
+        """插入记录，记录已存在时返回False"""
+        try:
+            return await self._call(self._sync_insert, collection, str(key), data)
+        except Exception as e:
+            print(f"写入数据失败 {collection}/{key}: {e}")
+            return False
+
+    async def put_many(self, collection: str, items: Iterable[Tuple[Any, Any]]) -> int:
+        """在一个事务中写入多条记录，返回写入条数"""
+        items = [(str(key), data) for key, data in items]
+        if not items:
+            return 0
+        return await self._call(self._sync_put_many, collection, items)
+
+    async def delete(self, collection: str, key: Any) -> bool:
+        """删除记录，返回记录是否存在"""
+        try:
+            return await self._call(self._sync_delete, collection, str(key))
+        except Exception as e:
+            print(f"删除数据失败 {collection}/{key}: {e}")
+            return False
+
+    def close(self):
+        """关闭线程池和所有连接"""
+        self.executor.shutdown(wait=True)
+        with self._pool_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        with SQLiteStorage._shared_lock:
+            if SQLiteStorage._shared.get(os.path.abspath(self.db_path)) is self:
+                del SQLiteStorage._shared[os.path.abspath(self.db_path)]
+
+class SQLiteDAO:
+    """SQLite数据访问对象基类，每个DAO对应一个集合"""
+
+    collection = ""
+
+    def __init__(self, storage: SQLiteStorage):
+        self.storage = storage
+
+class SQLitePlayerDAO(SQLiteDAO):
+    """玩家数据访问对象（SQLite），与JSON后端一样经过写回缓存"""
+
+    collection = "players"
+
+    def __init__(self, storage: SQLiteStorage, flush_interval: float = 5.0,
+                 max_dirty_age: float = 30.0, max_cached_players: int = 1000):
+        super().__init__(storage)
+        self.cache = WriteBehindCache(
+            self._load_player, self._write_player,
+            flush_interval=flush_interval, max_dirty_age=max_dirty_age, max_entries=max_cached_players
+        )
+
+    async def _load_player(self, player_id: str) -> Optional[Dict]:
+        return await self.storage.get(self.collection, player_id)
+
+    async def _write_player(self, player_id: str, player_data: Dict) -> bool:
+        return await self.storage.put(self.collection, player_id, player_data)
+
+    async def get_player(self, player_id: str) -> Optional[Dict]:
+        """获取玩家数据（返回副本，修改后需要调用save_player）"""
+        return await self.cache.get(player_id)
+
+    async def save_player(self, player_id: str, player_data: Dict) -> bool:
+        """保存玩家数据（写入缓存，稍后合并写回数据库）"""
+        player_data["last_updated"] = datetime.now().isoformat()
+        return await self.cache.put(player_id, player_data)
+
+    async def create_player(self, player_id: str, player_data: Dict) -> bool:
+        """创建玩家数据，玩家已存在时返回False"""
+        if await self.get_player(player_id):
+            return False
+        player_data["id"] = player_id
+        player_data["created_at"] = datetime.now().isoformat()
+        return await self.save_player(player_id, player_data)
+
+    async def delete_player(self, player_id: str) -> bool:
+        """删除玩家数据"""
+        self.cache.discard(player_id)
+        return await self.storage.delete(self.collection, player_id)
+
+    async def flush_all(self) -> int:
+        """把所有未写回的玩家数据写入数据库（正常关闭时调用），返回写回失败的玩家数"""
+        return await self.cache.close()
+
+class SQLiteBusinessDAO(SQLiteDAO):
+    """经营数据访问对象（SQLite）"""
+
+    collection = "business"
+
+    async def get_business(self, player_id: str) -> Optional[Dict]:
+        """获取玩家经营数据"""
+        return await self.storage.get(self.collection, player_id)
+
+    async def save_business(self, player_id: str, business_data: Dict) -> bool:
+        """保存玩家经营数据"""
+        business_data["last_updated"] = datetime.now().isoformat()
+        return await self.storage.put(self.collection, player_id, business_data)
+
+    # server.dao模块中的方法名
+    get_business_data = get_business
+    save_business_data = save_business
+
+class SQLiteInventoryDAO(SQLiteDAO):
+    """背包数据访问对象（SQLite）"""
+
+    collection = "inventory"
+
+    async def get_inventory(self, player_id: str) -> Optional[Dict]:
+        """获取玩家背包数据"""
+        return await self.storage.get(self.collection, player_id)
+
+    async def save_inventory(self, player_id: str, inventory_data: Dict) -> bool:
+        """保存玩家背包数据"""
+        inventory_data["last_updated"] = datetime.now().isoformat()
+        return await self.storage.put(self.collection, player_id, inventory_data)
+
+class SQLiteRecipeDAO(SQLiteDAO):
+    """菜谱数据访问对象（SQLite），列出全部菜谱不再需要扫描目录"""
+
+    collection = "recipes"
+
+    async def get_recipe(self, recipe_id: str) -> Optional[Dict]:
+        """获取菜谱数据"""
+        return await self.storage.get(self.collection, recipe_id)
+
+    async def get_all_recipes(self) -> List[Dict]:
+        """获取所有菜谱数据"""
+        return await self.storage.get_all(self.collection)
+
+    async def save_recipe(self, recipe_data: Dict) -> bool:
+        """保存菜谱数据（以id为键）"""
+        return await self.storage.put(self.collection, recipe_data["id"], recipe_data)
+
+class SQLiteIngredientDAO(SQLiteDAO):
+    """食材数据访问对象（SQLite）"""
+
+    collection = "ingredients"
+
+    async def get_ingredient(self, ingredient_id: str) -> Optional[Dict]:
+        """获取食材数据"""
+        return await self.storage.get(self.collection, ingredient_id)
+
+    async def get_all_ingredients(self) -> List[Dict]:
+        """获取所有食材数据"""
+        return await self.storage.get_all(self.collection)
+
+class SQLiteQuestDAO(SQLiteDAO):
+    """任务数据访问对象（SQLite）"""
+
+    collection = "quests"
+
+    async def get_quest(self, quest_id: str) -> Optional[Dict]:
+        """获取任务数据"""
+        return await self.storage.get(self.collection, quest_id)
+
+    async def get_all_quests(self) -> List[Dict]:
+        """获取所有任务数据"""
+        return await self.storage.get_all(self.collection)
@@ -0,0 +1,44 @@
+# 服务端存储后端配置模块
+# 通过环境变量选择DAO的存储后端，便于在同一环境下对比两种后端：
+#   KITCHEN_STORAGE_BACKEND  json（默认，每条记录一个JSON文件）或 sqlite
+#   KITCHEN_SQLITE_PATH      SQLite数据库文件路径，默认 saves/game.db
+#   KITCHEN_SQLITE_POOL_SIZE SQLite连接池大小（同时也是专用线程池的线程数），默认 4
+#   KITCHEN_IO_THREADS       JSON后端文件读写专用线程池的线程数，默认 8
+#   KITCHEN_SAVE_ENCODING    存档编码：json（缩进）、compact（默认）、zlib 或 gzip，读取时自动识别（见server/utils/save_codec.py）
+#   KITCHEN_COLLECTION_SEGMENTS 设为1时，JSON后端批量加载菜谱、食材、任务时优先读取合并的段文件（见collection_manifest.py）
+import os
+from typing import Dict, Any
+from server.utils.save_codec import SAVE_ENCODINGS, DEFAULT_SAVE_ENCODING
+
+STORAGE_JSON = "json"
+STORAGE_SQLITE = "sqlite"
+STORAGE_BACKENDS = (STORAGE_JSON, STORAGE_SQLITE)
+
+DEFAULT_SQLITE_PATH = os.path.join("saves", "game.db")
+DEFAULT_SQLITE_POOL_SIZE = 4
+DEFAULT_IO_THREADS = 8
+
+def get_storage_config() -> Dict[str, Any]:
+    """读取存储后端配置"""
+    backend = os.environ.get("KITCHEN_STORAGE_BACKEND", STORAGE_JSON).strip().lower() or STORAGE_JSON
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"未知的存储后端: {backend}，可选值: {', '.join(STORAGE_BACKENDS)}")
+    try:
+        pool_size = int(os.environ.get("KITCHEN_SQLITE_POOL_SIZE", DEFAULT_SQLITE_POOL_SIZE))
+    except ValueError:
+        raise ValueError("KITCHEN_SQLITE_POOL_SIZE必须是整数")
+    save_encoding = os.environ.get("KITCHEN_SAVE_ENCODING", DEFAULT_SAVE_ENCODING).strip().lower() or DEFAULT_SAVE_ENCODING
+    if save_encoding not in SAVE_ENCODINGS:
+        raise ValueError(f"未知的存档编码: {save_encoding}，可选值: {', '.join(SAVE_ENCODINGS)}")
+    try:
+        io_threads = int(os.environ.get("KITCHEN_IO_THREADS", DEFAULT_IO_THREADS))
+    except ValueError:
+        raise ValueError("KITCHEN_IO_THREADS必须是整数")
+    return {
+        "backend": backend,
+        "sqlite_path": os.environ.get("KITCHEN_SQLITE_PATH", DEFAULT_SQLITE_PATH),
+        "pool_size": max(1, pool_size),
+        "io_threads": max(1, io_threads),
+        "save_encoding": save_encoding,
+        "collection_segments": os.environ.get("KITCHEN_COLLECTION_SEGMENTS", "").strip().lower() in ("1", "true", "yes")
+    }
@@ -3,59 +3,72 @@ import asyncio
 import websockets
 import json
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from server.api.api_interface import RESTfulAPIManager
+from server.utils.message_dispatcher import MessageDispatcher, message_handler
+from server.utils.connection_pipeline import ConnectionPipeline
+from server.utils.keyed_lock import player_locks
+from server.utils.io_executor import get_io_executor
+from server.dao import player_dao
 
 class GameServer:
     """游戏服务器类"""
     
-    def __init__(self, host: str = "localhost", port: int = 8765):
+    def __init__(self, host: str = "localhost", port: int = 8765, max_in_flight: int = 8):
         self.host = host
         self.port = port
+        self.max_in_flight = max_in_flight  # 每个连接同时处理的最大请求数
+        self.max_batch_size = 32  # 单个批次请求允许的最大子请求数
         self.clients = {}  # 存储连接的客户端 {websocket: player_id}
         self.api_manager = RESTfulAPIManager()
+        self.dispatcher = MessageDispatcher(self)
         
     async def handle_client(self, websocket, path):
         """处理客户端连接"""
         print(f"新客户端连接: {websocket.remote_address}")
+        pipeline = ConnectionPipeline(self.max_in_flight)
         
         try:
             async for message in websocket:
-                await self.process_message(websocket, message)
+                decoded = self._decode_message(message)
+                await pipeline.submit(
+                    self.process_message(websocket, message, decoded),
+                    ordered=self._is_ordered_message(decoded)
+                )
         except websockets.exceptions.ConnectionClosed:
             print(f"客户端断开连接: {websocket.remote_address}")
         finally:
+            # 等待在途请求完成（例如尚未写完的玩家数据）
+            await pipeline.drain()
+            
             # 清理客户端连接
             if websocket in self.clients:
                 player_id = self.clients.pop(websocket)
                 print(f"玩家 {player_id} 断开连接")
                 
-    async def process_message(self, websocket, message):
+    def _decode_message(self, message) -> Optional[Dict]:
+        """解析消息，格式无效时返回None（由process_message返回错误）"""
+        try:
+            return json.loads(message)
+        except json.JSONDecodeError:
+            return None
+            
+    def _is_ordered_message(self, decoded: Optional[Dict]) -> bool:
+        """判断消息是否需要在该连接上按顺序处理"""
+        if not isinstance(decoded, dict):
+            return False
+        return bool(decoded.get("ordered")) or self.dispatcher.is_ordered(decoded.get("type"))
+        
+    async def process_message(self, websocket, message, decoded: Optional[Dict] = None):
         """处理客户端消息"""
         try:
-            data = json.loads(message)
+            data = decoded if decoded is not None else json.loads(message)
             message_type = data.get("type")
-            message_data = data.get("data", {})
+            message_data = data.get("data") or {}
             request_id = data.get("request_id")
             
-            response = None
-            
-            if message_type == "authenticate":
-                response = await self.authenticate_player(websocket, message_data)
-            elif message_type == "get_player_data":
-                response = await self.get_player_data(message_data)
-            elif message_type == "update_player_data":
-                response = await self.update_player_data(message_data)
-            elif message_type == "get_recipe_list":
-                response = await self.get_recipe_list()
-            elif message_type == "get_market_data":
-                response = await self.get_market_data()
-            elif message_type == "purchase_item":
-                response = await self.purchase_item(message_data)
-            elif message_type == "complete_quest":
-                response = await self.complete_quest(message_data)
-            elif message_type == "upgrade_business":
-                response = await self.upgrade_business(message_data)
+            if self.dispatcher.has_handler(message_type):
+                response = await self.dispatcher.dispatch(message_type, websocket, message_data)
             else:
                 # 尝试通过API管理器处理
                 response = await self.api_manager.api_interface.handle_request(
@@ -83,6 +96,7 @@ class GameServer:
             }
             await websocket.send(json.dumps(error_response))
             
+    @message_handler("authenticate", pass_websocket=True)
     async def authenticate_player(self, websocket, auth_data: Dict) -> Dict:
         """验证玩家身份"""
         player_id = auth_data.get("player_id")
@@ -103,6 +117,7 @@ class GameServer:
                 "message": "Authentication failed"
             }
             
+    @message_handler("get_player_data")
     async def get_player_data(self, request_data: Dict) -> Dict:
         """获取玩家数据"""
         player_id = request_data.get("player_id")
@@ -121,6 +136,7 @@ class GameServer:
             }
         }
         
+    @message_handler("update_player_data", ordered=True)
     async def update_player_data(self, update_data: Dict) -> Dict:
         """更新玩家数据"""
         player_id = update_data.get("player_id")
@@ -133,7 +149,8 @@ class GameServer:
             "message": "Player data updated"
         }
         
-    async def get_recipe_list(self) -> Dict:
+    @message_handler("get_recipe_list")
+    async def get_recipe_list(self, request_data: Dict = None) -> Dict:
         """获取菜谱列表"""
         # 这里应该调用服务层获取实际的菜谱数据
         return {
@@ -141,7 +158,8 @@ class GameServer:
             "recipes": []
         }
         
-    async def get_market_data(self) -> Dict:
+    @message_handler("get_market_data")
+    async def get_market_data(self, request_data: Dict = None) -> Dict:
         """获取市场数据"""
         # 这里应该调用服务层获取实际的市场数据
         return {
@@ -149,6 +167,7 @@ class GameServer:
             "items": []
         }
         
+    @message_handler("purchase_item", ordered=True)
     async def purchase_item(self, purchase_data: Dict) -> Dict:
         """购买物品"""
         # 这里应该调用服务层处理购买逻辑
@@ -158,6 +177,7 @@ class GameServer:
             "message": "Item purchased"
         }
         
+    @message_handler("complete_quest", ordered=True)
     async def complete_quest(self, quest_data: Dict) -> Dict:
         """完成任务"""
         # 这里应该调用服务层处理任务完成逻辑
@@ -167,6 +187,7 @@ class GameServer:
             "message": "Quest completed"
         }
         
+    @message_handler("upgrade_business", ordered=True)
     async def upgrade_business(self, upgrade_data: Dict) -> Dict:
         """升级经营"""
         # 这里应该调用服务层处理升级逻辑
@@ -176,6 +197,34 @@ class GameServer:
             "message": "Business upgraded"
         }
         
+    @message_handler("batch", pass_websocket=True)
+    async def handle_batch(self, websocket, batch_data: Dict) -> Dict:
+        """批量处理多个子请求，合并为一个响应帧返回"""
+        requests = batch_data.get("requests")
+        if not isinstance(requests, list) or not requests or len(requests) > self.max_batch_size:
+            return {
+                "type": "error",
+                "message": f"Batch must contain 1-{self.max_batch_size} requests"
+            }
+            
+        results = await self.dispatcher.dispatch_batch(websocket, requests)
+        return {
+            "type": "batch_result",
+            "results": results
+        }
+        
+    def get_message_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取每种消息类型的延迟直方图与错误数"""
+        return self.dispatcher.get_stats()
+        
+    def get_lock_stats(self) -> Dict[str, Any]:
+        """获取玩家级锁的等待时间直方图与争用统计"""
+        return player_locks.get_stats()
+        
+    def get_io_stats(self) -> Dict[str, Any]:
+        """获取存储I/O线程池状态，以及每个DAO的读写字节数、排队等待和执行时间直方图"""
+        return get_io_executor().get_stats()
+        
     async def start(self):
         """启动服务器"""
         print(f"游戏服务器启动中: {self.host}:{self.port}")
@@ -198,6 +247,8 @@ async def main():
         print("服务器被中断")
     finally:
         server.stop()
+        # 写回缓存中尚未落盘的玩家数据
+        await player_dao.flush_all()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
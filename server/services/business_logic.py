@@ -5,6 +5,8 @@ from server.dao.data_access import (
     player_dao, recipe_dao, ingredient_dao, 
     quest_dao, business_dao, inventory_dao
 )
+from server.services.shop_service import ShopService
+from server.utils.keyed_lock import player_locks
 
 class PlayerService:
     """玩家服务类"""
@@ -34,25 +36,27 @@ class PlayerService:
             
     async def add_experience(self, player_id: str, exp: int) -> Dict:
         """为玩家添加经验"""
-        player = await self.get_player(player_id)
-        if not player:
-            return {"status": "error", "message": "Player not found"}
+        # 同一玩家的读-改-写串行执行，避免并发请求丢失更新
+        async with player_locks.lock(player_id):
+            player = await self.get_player(player_id)
+            if not player:
+                return {"status": "error", "message": "Player not found"}
+                
+            current_exp = player.get("experience", 0)
+            player["experience"] = current_exp + exp
             
-        current_exp = player.get("experience", 0)
-        player["experience"] = current_exp + exp
-        
-        success = await self.update_player(player_id, player)
-        if success:
-            return {
-                "status": "success",
-                "message": f"Added {exp} experience",
-                "total_experience": player["experience"]
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "Failed to update player experience"
-            }
+            success = await self.update_player(player_id, player)
+            if success:
+                return {
+                    "status": "success",
+                    "message": f"Added {exp} experience",
+                    "total_experience": player["experience"]
+                }
+            else:
+                return {
+                    "status": "error",
+                    "message": "Failed to update player experience"
+                }
 
 class RecipeService:
     """菜谱服务类"""
@@ -103,36 +107,38 @@ class QuestService:
         
     async def accept_quest(self, player_id: str, quest_id: str) -> Dict:
         """接受任务"""
-        player = await player_service.get_player(player_id)
-        if not player:
-            return {"status": "error", "message": "Player not found"}
-            
-        quest = await self.get_quest(quest_id)
-        if not quest:
-            return {"status": "error", "message": "Quest not found"}
+        # 同一玩家的读-改-写串行执行，避免并发请求丢失更新
+        async with player_locks.lock(player_id):
+            player = await player_service.get_player(player_id)
+            if not player:
+                return {"status": "error", "message": "Player not found"}
+                
+            quest = await self.get_quest(quest_id)
+            if not quest:
+                return {"status": "error", "message": "Quest not found"}
+                
+            # 添加任务到玩家活跃任务列表
+            if "active_quests" not in player:
+                player["active_quests"] = []
+                
+            player["active_quests"].append({
+                "id": quest_id,
+                "status": "active",
+                "accept_time": datetime.now().isoformat(),
+                "progress": 0
+            })
             
-        # 添加任务到玩家活跃任务列表
-        if "active_quests" not in player:
-            player["active_quests"] = []
-            
-        player["active_quests"].append({
-            "id": quest_id,
-            "status": "active",
-            "accept_time": datetime.now().isoformat(),
-            "progress": 0
-        })
-        
-        success = await player_service.update_player(player_id, player)
-        if success:
-            return {
-                "status": "success",
-                "message": f"Quest {quest_id} accepted"
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "Failed to accept quest"
-            }
+            success = await player_service.update_player(player_id, player)
+            if success:
+                return {
+                    "status": "success",
+                    "message": f"Quest {quest_id} accepted"
+                }
+            else:
+                return {
+                    "status": "error",
+                    "message": "Failed to accept quest"
+                }
 
 class BusinessService:
     """经营服务类"""
@@ -0,0 +1,20 @@
+# 服务端工具模块初始化文件
+
+# 导入工具类
+from .metrics import LatencyHistogram, OperationMetrics
+from .message_dispatcher import MessageDispatcher, message_handler
+from .versioning import compute_version, versioned_response, not_modified_response
+from .path_router import PathRouter, RouteMatch
+
+# 定义公开接口
+__all__ = [
+    "LatencyHistogram",
+    "OperationMetrics",
+    "MessageDispatcher",
+    "message_handler",
+    "compute_version",
+    "versioned_response",
+    "not_modified_response",
+    "PathRouter",
+    "RouteMatch"
+]
@@ -0,0 +1,200 @@
+# 服务端原子写入模块
+# 存档先写入同目录下的临时文件并fsync，再通过rename替换目标文件，
+# 写入中途崩溃时目标文件要么是旧版本要么是新版本，不会出现截断的存档
+import asyncio
+import os
+import tempfile
+from typing import Dict, Any, Optional, List, Tuple
+from server.utils.io_executor import StorageIOExecutor, get_io_executor
+from server.utils.save_codec import encode_save
+
+def _write_temp(file_path: str, payload: bytes, fsync: bool) -> str:
+    """把内容写入目标文件所在目录的临时文件，返回临时文件路径"""
+    directory = os.path.dirname(file_path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        # mkstemp创建的文件只有属主可读写，沿用目标文件原来的权限
+        try:
+            mode = os.stat(file_path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(temp_path, mode)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    return temp_path
+
+def _fsync_file(path: str):
+    """fsync已写入并关闭的文件"""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _fsync_directory(directory: str):
+    """fsync目录，使rename本身持久化（不支持目录fsync的平台忽略）"""
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def atomic_write_json(file_path: str, data: Any, fsync: bool = True, encoding: Optional[str] = None) -> int:
+    """
+    原子写入存档文件（同步，在executor中调用），编码格式见save_codec.py
+    :param fsync: 是否在rename前后fsync，保证掉电后数据仍然存在
+    :param encoding: 存档编码，None时使用配置的存档编码
+    :return: 写入的字节数
+    """
+    payload = encode_save(data, encoding)
+    temp_path = _write_temp(file_path, payload, fsync)
+    try:
+        os.replace(temp_path, file_path)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    if fsync:
+        _fsync_directory(os.path.dirname(file_path))
+    return len(payload)
+
+def commit_batch(writes: List[Tuple[str, Any]], encoding: Optional[str] = None) -> Dict[str, bool]:
+    """
+    一次性原子写入多个文件（同步，在executor中调用）
+    整批在同一次executor调用中完成：先写入所有临时文件（不fsync），整批数据都交给内核后再逐个fsync，
+    文件系统可以把这些数据合并到同一次日志提交中，后面的fsync通常不再需要等待磁盘；
+    然后依次rename，最后每个目录只fsync一次
+    :param encoding: 存档编码，None时使用配置的存档编码
+    :return: {文件路径: 是否成功}
+    """
+    results: Dict[str, bool] = {}
+    written: List[Tuple[str, str]] = []
+    for file_path, data in writes:
+        try:
+            written.append((file_path, _write_temp(file_path, encode_save(data, encoding), fsync=False)))
+        except Exception as e:
+            print(f"写入文件失败 {file_path}: {e}")
+            results[file_path] = False
+
+    staged: List[Tuple[str, str]] = []
+    for file_path, temp_path in written:
+        try:
+            _fsync_file(temp_path)
+            staged.append((file_path, temp_path))
+        except Exception as e:
+            print(f"写入文件失败 {file_path}: {e}")
+            _remove_quietly(temp_path)
+            results[file_path] = False
+
+    directories = set()
+    for file_path, temp_path in staged:
+        try:
+            os.replace(temp_path, file_path)
+            directories.add(os.path.dirname(file_path))
+            results[file_path] = True
+        except Exception as e:
+            print(f"写入文件失败 {file_path}: {e}")
+            _remove_quietly(temp_path)
+            results[file_path] = False
+
+    for directory in directories:
+        _fsync_directory(directory)
+    return results
+
+def _commit_groups(groups: Dict[Optional[str], List[Tuple[str, Any]]]) -> Dict[str, bool]:
+    """按编码分组调用commit_batch（同步，在executor中调用）"""
+    results: Dict[str, bool] = {}
+    for encoding, writes in groups.items():
+        results.update(commit_batch(writes, encoding))
+    return results
+
+class GroupCommitWriter:
+    """
+    组提交写入器
+    等待中的写入攒成一批，在一次executor调用中完成写入和刷盘，
+    批次进行期间到达的写入进入下一批；同一文件在一批中的多次写入只写最后一次
+    """
+
+    def __init__(self, max_delay: float = 0.002, max_batch_size: int = 256,
+                 io_executor: Optional[StorageIOExecutor] = None):
+        """
+        :param max_delay: 第一个写入到达后等待更多写入的时间（秒）
+        :param max_batch_size: 每批最多写入的文件数
+        :param io_executor: 执行批量写入的线程池，默认使用共享的存储I/O线程池
+        """
+        self.io = io_executor if io_executor is not None else get_io_executor()
+        self.io_metrics = self.io.metrics_for(type(self).__name__)
+        self.max_delay = max_delay
+        self.max_batch_size = max_batch_size
+        self.pending: Dict[str, List[Any]] = {}  # {文件路径: [数据, [等待结果的future], 存档编码]}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"writes": 0, "batches": 0, "files_written": 0, "coalesced": 0, "errors": 0}
+
+    async def write(self, file_path: str, data: Any, encoding: Optional[str] = None) -> bool:
+        """
+        提交写入并等待所在批次完成，返回是否成功
+        :param encoding: 存档编码，None时使用配置的存档编码
+        """
+        future = asyncio.get_event_loop().create_future()
+        self.stats["writes"] += 1
+        pending = self.pending.get(file_path)
+        if pending is None:
+            self.pending[file_path] = [data, [future], encoding]
+        else:
+            pending[0] = data
+            pending[1].append(future)
+            pending[2] = encoding
+            self.stats["coalesced"] += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return await future
+
+    async def _run(self):
+        """提交循环，直到没有等待中的写入"""
+        while self.pending:
+            if self.max_delay > 0 and len(self.pending) < self.max_batch_size:
+                await asyncio.sleep(self.max_delay)
+            paths = list(self.pending)[:self.max_batch_size]
+            batch = {path: self.pending.pop(path) for path in paths}
+            # 不同编码的文件分组提交，仍在同一次executor调用中完成
+            groups: Dict[Optional[str], List[Tuple[str, Any]]] = {}
+            for path, entry in batch.items():
+                groups.setdefault(entry[2], []).append((path, entry[0]))
+            try:
+                results = await self.io.run(self.io_metrics, "commit_batch", _commit_groups, groups)
+            except Exception as e:
+                print(f"组提交失败: {e}")
+                results = {}
+            self.stats["batches"] += 1
+            for path, (_, futures, _) in batch.items():
+                success = results.get(path, False)
+                if success:
+                    self.stats["files_written"] += 1
+                else:
+                    self.stats["errors"] += 1
+                for future in futures:
+                    if not future.done():
+                        future.set_result(success)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取组提交统计"""
+        stats = dict(self.stats, pending=len(self.pending))
+        files = self.stats["files_written"] + self.stats["errors"]
+        stats["avg_batch_size"] = files / self.stats["batches"] if self.stats["batches"] else 0.0
+        return stats
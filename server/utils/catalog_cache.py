@@ -0,0 +1,167 @@
+# 服务端静态目录响应缓存模块
+import asyncio
+import os
+import time
+from typing import Dict, Any, Optional
+from server.utils.versioning import compute_version, is_not_modified, not_modified_response
+from server.utils.save_codec import decode_save
+from server.utils.io_executor import StorageIOExecutor, IOMetrics, get_io_executor
+
+class CachedResponse(dict):
+    """
+    引用目录缓存的响应
+    作为普通字典时包含type、data和version，发送时可直接使用预先编码好的data片段
+    """
+
+    def __init__(self, message_type: str, entry: "CatalogEntry"):
+        super().__init__(type=message_type, data=entry.data, version=entry.version)
+        self.entry = entry
+
+class CatalogEntry:
+    """单个目录的缓存条目"""
+
+    def __init__(self, data: Any, version: str, mtime: float, size: int):
+        self.data = data
+        self.version = version  # 内容版本号
+        self.mtime = mtime
+        self.size = size
+        self.encoded_data: Dict[str, Any] = {}  # 预先编码的data片段 {codec_name: fragment}
+        self.indexes: Dict[str, Any] = {}  # 查询索引 {spec_name: index}
+
+    @property
+    def etag(self) -> str:
+        """HTTP强ETag，由内容版本号生成，每个版本只计算一次"""
+        return f'"{self.version}"'
+
+    def get_encoded_data(self, codec):
+        """获取指定编码格式的data片段（每个版本每种编码只编码一次）"""
+        fragment = self.encoded_data.get(codec.name)
+        if fragment is None:
+            fragment = codec.encode_data(self.data)
+            self.encoded_data[codec.name] = fragment
+        return fragment
+
+    def get_index(self, spec):
+        """获取指定查询规格的索引（每个版本只建立一次）"""
+        index = self.indexes.get(spec.name)
+        if index is None:
+            index = spec.build(self.data)
+            self.indexes[spec.name] = index
+        return index
+
+class CatalogResponseCache:
+    """
+    静态目录（菜谱、任务、食材等）响应缓存
+    每个目录只在配置文件变化时重新读取和解析，并按编码格式缓存已编码的data片段，
+    热路径只需一次字典查找和一次拼接
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval  # 检查配置文件变化的最小间隔（秒）
+        self.catalogs: Dict[str, Dict[str, Any]] = {}  # {name: {"path": ..., "response_type": ..., "io": ..., "io_metrics": ...}}
+        self.entries: Dict[str, CatalogEntry] = {}
+        self._last_checked: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def register(self, name: str, file_path: str, response_type: str,
+                 io_executor: Optional[StorageIOExecutor] = None, io_metrics: Optional[IOMetrics] = None):
+        """
+        注册目录
+        :param name: 目录名称
+        :param file_path: 配置文件路径
+        :param response_type: 响应消息类型
+        :param io_executor: 重新加载配置文件的线程池，默认使用共享的存储I/O线程池
+        :param io_metrics: 记录重新加载耗时和读取字节数的统计（通常为所属DAO的统计）
+        """
+        previous = self.catalogs.get(name)
+        self.catalogs[name] = {
+            "path": file_path, "response_type": response_type, "io": io_executor, "io_metrics": io_metrics
+        }
+        if previous is not None and previous["path"] != file_path:
+            self.invalidate(name)
+
+    def invalidate(self, name: Optional[str] = None):
+        """使目录缓存失效，name为空时使所有目录失效"""
+        names = [name] if name is not None else list(self.entries)
+        for catalog_name in names:
+            self.entries.pop(catalog_name, None)
+            self._last_checked.pop(catalog_name, None)
+
+    async def get_entry(self, name: str) -> Optional[CatalogEntry]:
+        """
+        获取目录缓存条目，配置文件变化时在存储I/O线程池中重新加载
+        :return: 缓存条目，配置文件不存在或无法解析时返回None
+        """
+        entry = self.entries.get(name)
+        now = time.monotonic()
+        if entry is not None and now - self._last_checked.get(name, 0.0) < self.check_interval:
+            return entry
+
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            entry = self.entries.get(name)
+            if entry is not None and now - self._last_checked.get(name, 0.0) < self.check_interval:
+                return entry
+
+            catalog = self.catalogs[name]
+            io = catalog["io"] if catalog["io"] is not None else get_io_executor()
+            try:
+                entry = await io.run(catalog["io_metrics"], "catalog_refresh", self._sync_refresh, name, entry)
+            except Exception as e:
+                # 配置文件损坏时继续使用上一个版本
+                print(f"加载目录失败 {name}: {e}")
+            self._last_checked[name] = time.monotonic()
+            if entry is None:
+                self.entries.pop(name, None)
+            else:
+                self.entries[name] = entry
+            return entry
+
+    def _sync_refresh(self, name: str, entry: Optional[CatalogEntry]) -> Optional[CatalogEntry]:
+        """检查配置文件是否变化，变化时重新加载（在存储I/O线程池中运行）"""
+        catalog = self.catalogs[name]
+        file_path = catalog["path"]
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        if entry is not None and entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+            return entry
+
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        if catalog["io_metrics"] is not None:
+            catalog["io_metrics"].add_bytes_read(len(raw))
+        data = decode_save(raw)
+
+        return CatalogEntry(data, compute_version(data), stat.st_mtime, stat.st_size)
+
+    async def get_response(self, name: str, if_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        获取目录响应
+        :param if_version: 客户端持有的版本号，与当前版本一致时返回not_modified响应
+        :return: 目录响应，目录不可用时返回None
+        """
+        entry = await self.get_entry(name)
+        if entry is None:
+            return None
+        response_type = self.catalogs[name]["response_type"]
+        if is_not_modified(if_version, entry.version):
+            return not_modified_response(response_type, entry.version)
+        return CachedResponse(response_type, entry)
+
+    @staticmethod
+    def encode_response(codec, response: CachedResponse):
+        """使用预先编码的data片段编码完整的响应帧"""
+        return codec.encode_with_data(response, response.entry.get_encoded_data(codec))
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各目录的缓存状态"""
+        return {
+            name: {
+                "version": entry.version,
+                "encodings": list(entry.encoded_data)
+            }
+            for name, entry in self.entries.items()
+        }
@@ -0,0 +1,218 @@
+# 服务端目录查询模块
+# 目录每个版本只建立一次索引（等值过滤用倒排索引，范围过滤用有序索引），
+# 列表请求按游标分页、在服务端过滤并只返回需要的字段，响应大小取决于页大小而不是目录大小
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, Optional, List, Callable
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# 与过滤条件无关的查询参数
+PAGING_PARAMS = ("fields", "cursor", "limit")
+
+class CatalogQueryError(ValueError):
+    """查询参数无效"""
+
+def field_getter(name: str) -> Callable[[Dict[str, Any]], Any]:
+    """按字段名取值的提取函数"""
+    return lambda record: record.get(name)
+
+def encode_cursor(key: Any) -> str:
+    """把上一页最后一条记录的主键编码为不透明的游标"""
+    raw = json.dumps(key, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Any:
+    """解析游标，返回上一页最后一条记录的主键"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        raise CatalogQueryError("无效的游标")
+    # 主键只能是字符串或整数，构造的游标可能解析出列表、字典等其他类型
+    if not isinstance(key, (str, int)) or isinstance(key, bool):
+        raise CatalogQueryError("无效的游标")
+    return key
+
+class CatalogQuerySpec:
+    """目录支持的查询：主键、等值过滤字段和范围过滤字段"""
+
+    def __init__(self, name: str, key_field: str = "id",
+                 equality_fields: Optional[Dict[str, Callable[[Dict[str, Any]], Any]]] = None,
+                 range_fields: Optional[Dict[str, Callable[[Dict[str, Any]], Any]]] = None):
+        """
+        :param name: 目录名称
+        :param key_field: 记录主键字段，游标按主键定位
+        :param equality_fields: 等值过滤 {参数名: 取值函数}，参数值可用逗号分隔多个候选值
+        :param range_fields: 范围过滤 {字段名: 取值函数}，对应参数 min_<字段名> 和 max_<字段名>
+        """
+        self.name = f"query:{name}"
+        self.key_field = key_field
+        self.equality_fields = equality_fields or {}
+        self.range_fields = range_fields or {}
+        self.query_params = set(PAGING_PARAMS) | set(self.equality_fields)
+        for field in self.range_fields:
+            self.query_params.update((f"min_{field}", f"max_{field}"))
+
+    def is_query(self, params: Optional[Dict[str, Any]]) -> bool:
+        """请求参数中是否包含分页、过滤或投影参数"""
+        return bool(params) and any(name in params for name in self.query_params)
+
+    def build(self, records: Any) -> "CatalogIndex":
+        """为目录数据建立索引"""
+        return CatalogIndex(self, records)
+
+class CatalogIndex:
+    """
+    单个目录版本的查询索引，记录按配置文件中的顺序分页
+    主键重复的记录只保留第一条（与按ID查找一致），每个游标唯一对应一个位置，翻页不会回到前面的页
+    """
+
+    def __init__(self, spec: CatalogQuerySpec, records: Any):
+        self.spec = spec
+        self.records: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}  # {主键字符串: 位置}
+        self.by_key: Dict[str, Dict[str, Any]] = {}  # {主键字符串: 记录}，按ID查找时不区分整数和字符串ID
+        self.equality: Dict[str, Dict[str, List[int]]] = {}  # {参数名: {值: [位置]}}
+        self.ranges: Dict[str, tuple] = {}  # {字段名: (有序值列表, 对应的位置列表)}
+
+        for record in records if isinstance(records, list) else ():
+            if not isinstance(record, dict):
+                continue
+            key = str(record.get(spec.key_field))
+            if key in self.by_key:
+                continue
+            self.positions[key] = len(self.records)
+            self.by_key[key] = record
+            self.records.append(record)
+
+        for name, getter in spec.equality_fields.items():
+            postings: Dict[str, List[int]] = {}
+            for position, record in enumerate(self.records):
+                value = getter(record)
+                if value is not None:
+                    postings.setdefault(str(value), []).append(position)
+            self.equality[name] = postings
+
+        for name, getter in spec.range_fields.items():
+            pairs = []
+            for position, record in enumerate(self.records):
+                value = getter(record)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    pairs.append((value, position))
+            pairs.sort()
+            self.ranges[name] = ([value for value, _ in pairs], [position for _, position in pairs])
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        """按主键查找记录"""
+        return self.by_key.get(str(key))
+
+    def filter(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """返回符合过滤条件的全部记录（不分页）"""
+        positions = self._filter(params)
+        if positions is None:
+            return list(self.records)
+        return [self.records[position] for position in positions]
+
+    def query(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        查询一页记录
+        :param params: 查询参数，值可以是字符串（REST查询字符串）或对应类型
+        :return: {"items": [...], "next_cursor": 下一页游标或None, "total": 符合条件的记录数}
+        """
+        params = params or {}
+        candidates = self._filter(params)
+        limit = self._parse_limit(params.get("limit"))
+
+        start = 0
+        cursor = params.get("cursor")
+        if cursor:
+            position = self.positions.get(str(decode_cursor(str(cursor))))
+            if position is None:
+                raise CatalogQueryError("游标对应的记录不存在")
+            start = position + 1
+
+        if candidates is None:
+            total = len(self.records)
+            page = list(range(start, min(start + limit, total)))
+            has_more = start + limit < total
+        else:
+            total = len(candidates)
+            offset = bisect_left(candidates, start)
+            page = candidates[offset:offset + limit]
+            has_more = offset + limit < total
+
+        fields = self._parse_fields(params.get("fields"))
+        items = [self._project(self.records[position], fields) for position in page]
+        next_cursor = None
+        if has_more and page:
+            next_cursor = encode_cursor(self.records[page[-1]].get(self.spec.key_field))
+        return {"items": items, "next_cursor": next_cursor, "total": total}
+
+    def _filter(self, params: Dict[str, Any]) -> Optional[List[int]]:
+        """按过滤条件求出符合条件的有序位置列表，没有过滤条件时返回None"""
+        matched: Optional[set] = None
+
+        for name, postings in self.equality.items():
+            value = params.get(name)
+            if value is None or value == "":
+                continue
+            values = value if isinstance(value, (list, tuple)) else str(value).split(",")
+            positions = set()
+            for candidate in values:
+                positions.update(postings.get(str(candidate).strip(), ()))
+            matched = positions if matched is None else matched & positions
+
+        for name, (values, positions) in self.ranges.items():
+            low = self._parse_number(params, f"min_{name}")
+            high = self._parse_number(params, f"max_{name}")
+            if low is None and high is None:
+                continue
+            begin = bisect_left(values, low) if low is not None else 0
+            end = bisect_right(values, high) if high is not None else len(values)
+            in_range = set(positions[begin:end])
+            matched = in_range if matched is None else matched & in_range
+
+        return sorted(matched) if matched is not None else None
+
+    @staticmethod
+    def _parse_number(params: Dict[str, Any], name: str) -> Optional[float]:
+        value = params.get(name)
+        if value is None or value == "":
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise CatalogQueryError(f"参数{name}必须是数字")
+
+    @staticmethod
+    def _parse_limit(value: Any) -> int:
+        if value is None or value == "":
+            return DEFAULT_PAGE_SIZE
+        try:
+            limit = int(value)
+        except (TypeError, ValueError):
+            raise CatalogQueryError("参数limit必须是整数")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise CatalogQueryError(f"参数limit必须在1到{MAX_PAGE_SIZE}之间")
+        return limit
+
+    def _parse_fields(self, value: Any) -> Optional[List[str]]:
+        """解析投影字段，主键字段总是返回"""
+        if value is None or value == "":
+            return None
+        names = value if isinstance(value, (list, tuple)) else str(value).split(",")
+        fields = [self.spec.key_field]
+        for name in names:
+            name = str(name).strip()
+            if name and name not in fields:
+                fields.append(name)
+        return fields
+
+    @staticmethod
+    def _project(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        if fields is None:
+            return record
+        return {name: record[name] for name in fields if name in record}
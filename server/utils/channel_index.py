@@ -0,0 +1,71 @@
+# 服务端频道订阅索引模块
+from typing import Dict, Any, Optional, Set
+
+# 支持的聊天频道
+CHAT_CHANNELS = ("global", "guild", "friends", "whisper")
+
+class ChannelSubscriptionIndex:
+    """频道订阅索引，维护 频道 -> 订阅连接 以及 连接 -> 频道 的双向映射"""
+    
+    def __init__(self):
+        self.subscribers: Dict[str, Set[Any]] = {}  # {channel_key: {websocket}}
+        self.client_channels: Dict[Any, Set[str]] = {}  # {websocket: {channel_key}}
+        
+    @staticmethod
+    def channel_key(channel: str, channel_id: Optional[str] = None) -> str:
+        """
+        生成频道键
+        :param channel: 频道类型（global/guild/friends/whisper）
+        :param channel_id: 频道ID（公会ID、玩家ID等），全局频道为空
+        :return: 频道键，例如 "guild:123"
+        """
+        if channel_id is None or channel_id == "":
+            return channel
+        return f"{channel}:{channel_id}"
+        
+    def subscribe(self, websocket, channel: str, channel_id: Optional[str] = None) -> str:
+        """订阅频道"""
+        key = self.channel_key(channel, channel_id)
+        self.subscribers.setdefault(key, set()).add(websocket)
+        self.client_channels.setdefault(websocket, set()).add(key)
+        return key
+        
+    def unsubscribe(self, websocket, channel: str, channel_id: Optional[str] = None) -> bool:
+        """取消订阅频道"""
+        key = self.channel_key(channel, channel_id)
+        members = self.subscribers.get(key)
+        if not members or websocket not in members:
+            return False
+            
+        members.discard(websocket)
+        if not members:
+            del self.subscribers[key]
+            
+        channels = self.client_channels.get(websocket)
+        if channels is not None:
+            channels.discard(key)
+            if not channels:
+                del self.client_channels[websocket]
+        return True
+        
+    def remove_client(self, websocket):
+        """移除连接的所有订阅（断开连接时调用）"""
+        for key in self.client_channels.pop(websocket, set()):
+            members = self.subscribers.get(key)
+            if members is None:
+                continue
+            members.discard(websocket)
+            if not members:
+                del self.subscribers[key]
+                
+    def get_subscribers(self, channel: str, channel_id: Optional[str] = None) -> Set[Any]:
+        """获取频道的订阅连接（返回副本，便于在发送过程中修改索引）"""
+        return set(self.subscribers.get(self.channel_key(channel, channel_id), ()))
+        
+    def get_client_channels(self, websocket) -> Set[str]:
+        """获取连接订阅的所有频道键"""
+        return set(self.client_channels.get(websocket, ()))
+        
+    def subscriber_count(self, channel: str, channel_id: Optional[str] = None) -> int:
+        """获取频道订阅数"""
+        return len(self.subscribers.get(self.channel_key(channel, channel_id), ()))
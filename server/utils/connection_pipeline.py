@@ -0,0 +1,61 @@
+# 服务端连接请求流水线模块
+import asyncio
+import functools
+from typing import Optional, Set
+
+class ConnectionPipeline:
+    """单个连接的请求流水线，限制同时处理的请求数，并按需保证部分请求的顺序"""
+    
+    def __init__(self, max_in_flight: int = 8):
+        self.max_in_flight = max(1, max_in_flight)
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.tasks: Set[asyncio.Task] = set()
+        self._ordered_tail: Optional[asyncio.Task] = None
+        
+    async def submit(self, coro, ordered: bool = False):
+        """
+        提交一个请求协程
+        在途请求达到上限时会等待，从而对读取循环形成背压
+        :param coro: 处理请求的协程
+        :param ordered: 是否严格有序（在之前提交的有序请求完成后才开始执行）
+        """
+        await self.semaphore.acquire()
+        previous = self._ordered_tail if ordered else None
+        task = asyncio.ensure_future(self._run(coro, previous))
+        if ordered:
+            self._ordered_tail = task
+        self.tasks.add(task)
+        # 在完成回调中释放名额：任务在开始执行前被取消（例如连接断开）时_run不会运行
+        task.add_done_callback(functools.partial(self._on_task_done, coro))
+        
+    async def _run(self, coro, previous: Optional[asyncio.Task]):
+        """执行请求，有序请求先等待前一个有序请求结束"""
+        if previous is not None and not previous.done():
+            await asyncio.wait({previous})
+        await coro
+            
+    def _on_task_done(self, coro, task: asyncio.Task):
+        """请求完成回调，释放在途名额"""
+        self.semaphore.release()
+        # 请求协程未开始执行就被取消时关闭它，避免"never awaited"警告
+        coro.close()
+        self.tasks.discard(task)
+        if task is self._ordered_tail:
+            self._ordered_tail = None
+        if not task.cancelled() and task.exception() is not None:
+            print(f"处理请求时出错: {task.exception()}")
+            
+    @property
+    def in_flight(self) -> int:
+        """当前在途请求数"""
+        return len(self.tasks)
+        
+    async def drain(self):
+        """等待所有在途请求完成"""
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
+            
+    def cancel(self):
+        """取消所有在途请求"""
+        for task in list(self.tasks):
+            task.cancel()
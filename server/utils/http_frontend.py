@@ -0,0 +1,449 @@
+# 服务端HTTP/1.1前端模块
+# 基于asyncio.Protocol的轻量HTTP服务器，把请求直接映射到APIInterface的路由，
+# 支持keep-alive、请求流水线（同一连接上的请求按顺序处理和响应）、分块响应和gzip压缩，
+# 带ETag的结果（如目录缓存条目）支持If-None-Match条件请求和Cache-Control
+import asyncio
+import json
+import zlib
+from collections import deque
+from urllib.parse import urlsplit, parse_qsl
+from typing import Dict, Any, Optional, Tuple
+
+# 常用状态码说明
+HTTP_REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified",
+    400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+    413: "Payload Too Large", 431: "Request Header Fields Too Large",
+    500: "Internal Server Error", 501: "Not Implemented", 505: "HTTP Version Not Supported"
+}
+
+class HTTPRequest:
+    """已解析的HTTP请求"""
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers  # 头部名称均为小写
+        self.body = body
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = dict(parse_qsl(parts.query, keep_blank_values=True))
+
+    @property
+    def keep_alive(self) -> bool:
+        """响应后是否保持连接"""
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return "keep-alive" in connection
+        return "close" not in connection
+
+    def accepts_gzip(self) -> bool:
+        """客户端是否接受gzip编码"""
+        for item in self.headers.get("accept-encoding", "").split(","):
+            coding, _, params = item.strip().partition(";")
+            if coding.strip().lower() in ("gzip", "*"):
+                return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+        return False
+
+class HTTPResponse:
+    """HTTP响应"""
+
+    def __init__(self, status: int = 200, body: bytes = b"", headers: Optional[Dict[str, str]] = None,
+                 content_type: str = "application/json; charset=utf-8"):
+        self.status = status
+        self.body = body
+        self.headers = dict(headers or {})
+        if body or status not in (204, 304):
+            self.headers.setdefault("Content-Type", content_type)
+
+class _BadRequest(Exception):
+    """请求格式错误，返回错误响应后关闭连接"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _parse_chunked_body(buffer: bytearray, offset: int, max_body_size: int) -> Optional[Tuple[bytes, int]]:
+    """
+    解析分块编码的请求体
+    :return: (请求体, 结束位置)，数据不完整时返回None
+    """
+    body = bytearray()
+    while True:
+        line_end = buffer.find(b"\r\n", offset)
+        if line_end < 0:
+            return None
+        size_text = bytes(buffer[offset:line_end]).split(b";", 1)[0].strip()
+        try:
+            size = int(size_text, 16)
+        except ValueError:
+            raise _BadRequest(400, "无效的分块长度")
+        offset = line_end + 2
+        if size == 0:
+            # 跳过trailer直到空行
+            while True:
+                line_end = buffer.find(b"\r\n", offset)
+                if line_end < 0:
+                    return None
+                if line_end == offset:
+                    return bytes(body), line_end + 2
+                offset = line_end + 2
+        if len(body) + size > max_body_size:
+            raise _BadRequest(413, "请求体过大")
+        if len(buffer) < offset + size + 2:
+            return None
+        body += buffer[offset:offset + size]
+        offset += size + 2
+
+class HTTPProtocol(asyncio.Protocol):
+    """单个HTTP连接的协议实现"""
+
+    def __init__(self, frontend: "HTTPFrontend"):
+        self.frontend = frontend
+        self.transport = None
+        self.buffer = bytearray()
+        self.requests: deque = deque()  # 已解析、等待处理的请求（流水线）
+        self._worker: Optional[asyncio.Task] = None
+        self._paused = False
+        self._drain_waiter: Optional[asyncio.Future] = None
+        self._idle_handle = None
+        self._closing = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.frontend.connections.add(self)
+        self.frontend.stats["connections"] += 1
+        self._reset_idle_timer()
+
+    def connection_lost(self, exc):
+        self.frontend.connections.discard(self)
+        self._closing = True
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.cancel()
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.set_result(None)
+
+    def data_received(self, data: bytes):
+        if self._closing:
+            return
+        self.buffer += data
+        self._reset_idle_timer()
+        try:
+            self._parse_requests()
+        except _BadRequest as e:
+            # 错误响应排在已解析的请求之后，发送后关闭连接
+            self.requests.append(e)
+            self._closing = True
+        if self.requests and (self._worker is None or self._worker.done()):
+            self._worker = asyncio.ensure_future(self._process_requests())
+
+    def _reset_idle_timer(self):
+        """keep-alive连接空闲超时后关闭"""
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        loop = asyncio.get_event_loop()
+        self._idle_handle = loop.call_later(self.frontend.keep_alive_timeout, self._on_idle_timeout)
+
+    def _on_idle_timeout(self):
+        if not self.requests and (self._worker is None or self._worker.done()) and self.transport is not None:
+            self.transport.close()
+        else:
+            self._reset_idle_timer()
+
+    def _parse_requests(self):
+        """从缓冲区中解析所有完整的请求"""
+        frontend = self.frontend
+        while self.buffer:
+            header_end = self.buffer.find(b"\r\n\r\n")
+            if header_end < 0:
+                if len(self.buffer) > frontend.max_header_size:
+                    raise _BadRequest(431, "请求头过大")
+                return
+            if header_end > frontend.max_header_size:
+                raise _BadRequest(431, "请求头过大")
+
+            lines = bytes(self.buffer[:header_end]).decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ")
+            except ValueError:
+                raise _BadRequest(400, "无效的请求行")
+            if version not in ("HTTP/1.1", "HTTP/1.0"):
+                raise _BadRequest(505, "不支持的HTTP版本")
+
+            headers = {}
+            for line in lines[1:]:
+                name, separator, value = line.partition(":")
+                if not separator:
+                    raise _BadRequest(400, "无效的请求头")
+                headers[name.strip().lower()] = value.strip()
+
+            body_start = header_end + 4
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                parsed = _parse_chunked_body(self.buffer, body_start, frontend.max_body_size)
+                if parsed is None:
+                    return
+                body, body_end = parsed
+            else:
+                try:
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    raise _BadRequest(400, "无效的Content-Length")
+                if length < 0:
+                    raise _BadRequest(400, "无效的Content-Length")
+                if length > frontend.max_body_size:
+                    raise _BadRequest(413, "请求体过大")
+                if len(self.buffer) < body_start + length:
+                    return
+                body = bytes(self.buffer[body_start:body_start + length])
+                body_end = body_start + length
+
+            del self.buffer[:body_end]
+            self.requests.append(HTTPRequest(method.upper(), target, version, headers, body))
+
+    async def _process_requests(self):
+        """按顺序处理流水线中的请求并写出响应"""
+        while self.requests and self.transport is not None and not self.transport.is_closing():
+            request = self.requests.popleft()
+            if isinstance(request, _BadRequest):
+                response = self.frontend.error_response(request.status, str(request))
+                await self._write_response(None, response, keep_alive=False)
+                self.transport.close()
+                return
+
+            response = await self.frontend.handle_request(request)
+            keep_alive = request.keep_alive and not self._closing
+            await self._write_response(request, response, keep_alive)
+            if not keep_alive:
+                self.transport.close()
+                return
+
+    async def _drain(self):
+        """等待传输层缓冲区低于高水位"""
+        if self._paused and self.transport is not None and not self.transport.is_closing():
+            self._drain_waiter = asyncio.get_event_loop().create_future()
+            await self._drain_waiter
+
+    async def _write_response(self, request: Optional[HTTPRequest], response: HTTPResponse, keep_alive: bool):
+        """写出响应，按需使用gzip压缩和分块传输"""
+        frontend = self.frontend
+        version = request.version if request is not None else "HTTP/1.1"
+        head_only = request is not None and request.method == "HEAD"
+        headers = response.headers
+        body = response.body
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+
+        compress = False
+        # 已带Content-Encoding的响应体是预先压缩好的，不再压缩
+        if "Content-Encoding" not in headers and len(body) >= frontend.gzip_min_size and response.status not in (204, 304):
+            headers["Vary"] = "Accept-Encoding"
+            compress = request is not None and request.accepts_gzip()
+        chunked = version == "HTTP/1.1" and len(body) > frontend.chunk_size and not head_only
+
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        if chunked:
+            headers["Transfer-Encoding"] = "chunked"
+        else:
+            if compress:
+                body = _gzip_bytes(body, frontend.gzip_level)
+            if response.status not in (204, 304):
+                headers["Content-Length"] = str(len(body))
+
+        status_line = f"{version} {response.status} {HTTP_REASONS.get(response.status, 'Unknown')}\r\n"
+        head = status_line + "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+        self.transport.write(head.encode("latin-1"))
+        frontend.stats["responses"] += 1
+        if head_only or response.status in (204, 304):
+            return
+
+        if not chunked:
+            self.transport.write(body)
+            await self._drain()
+            return
+
+        # 分块发送大响应，每块写出后遵循传输层的流量控制
+        compressor = zlib.compressobj(frontend.gzip_level, zlib.DEFLATED, 31) if compress else None
+        for start in range(0, len(body), frontend.chunk_size):
+            piece = body[start:start + frontend.chunk_size]
+            if compressor is not None:
+                piece = compressor.compress(piece)
+            if piece:
+                self.transport.write(b"%x\r\n%b\r\n" % (len(piece), piece))
+                await self._drain()
+        if compressor is not None:
+            piece = compressor.flush()
+            if piece:
+                self.transport.write(b"%x\r\n%b\r\n" % (len(piece), piece))
+        self.transport.write(b"0\r\n\r\n")
+        frontend.stats["chunked_responses"] += 1
+        await self._drain()
+
+def _gzip_bytes(data: bytes, level: int) -> bytes:
+    """gzip压缩"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+class _JSONBodyEncoder:
+    """把目录数据编码为HTTP响应体，结果缓存在目录条目中"""
+
+    name = "http_json"
+
+    def encode_data(self, data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+class _GzipJSONBodyEncoder:
+    """把目录数据编码为gzip压缩的HTTP响应体，结果缓存在目录条目中"""
+
+    name = "http_json_gzip"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def encode_data(self, data: Any) -> bytes:
+        return _gzip_bytes(_JSONBodyEncoder().encode_data(data), self.level)
+
+GZIP_ETAG_SUFFIX = "-gzip"
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match是否命中（弱比较，忽略W/前缀和gzip表示的后缀）
+    :param etag: 未压缩表示的ETag
+    """
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.endswith(GZIP_ETAG_SUFFIX + '"'):
+            candidate = candidate[:-len(GZIP_ETAG_SUFFIX) - 1] + '"'
+        if candidate == etag:
+            return True
+    return False
+
+class HTTPFrontend:
+    """REST API的HTTP/1.1前端"""
+
+    def __init__(self, api_interface, host: str = "localhost", port: int = 8766,
+                 keep_alive_timeout: float = 15.0, max_header_size: int = 16 * 1024,
+                 max_body_size: int = 1024 * 1024, chunk_size: int = 64 * 1024,
+                 gzip_min_size: int = 1024, gzip_level: int = 6, cache_max_age: int = 60):
+        """
+        :param api_interface: 提供dispatch(method, full_path, data)的API接口
+        :param keep_alive_timeout: keep-alive连接的空闲超时（秒）
+        :param max_header_size: 请求头最大字节数
+        :param max_body_size: 请求体最大字节数
+        :param chunk_size: 响应体超过该大小时使用分块传输，同时也是每块的大小
+        :param gzip_min_size: 响应体达到该大小且客户端接受时使用gzip压缩
+        :param gzip_level: gzip压缩级别
+        :param cache_max_age: 带ETag的响应允许客户端缓存的时间（秒），过期后用If-None-Match重新验证
+        """
+        self.api_interface = api_interface
+        self.host = host
+        self.port = port
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.chunk_size = chunk_size
+        self.gzip_min_size = gzip_min_size
+        self.gzip_level = gzip_level
+        self.cache_control = f"public, max-age={cache_max_age}"
+        self._gzip_encoder = _GzipJSONBodyEncoder(gzip_level)
+        self._json_encoder = _JSONBodyEncoder()
+        self.connections = set()
+        self.stats = {"connections": 0, "requests": 0, "responses": 0, "chunked_responses": 0, "errors": 0,
+                      "not_modified": 0}
+        self.server = None
+
+    async def start(self):
+        """开始监听"""
+        loop = asyncio.get_event_loop()
+        self.server = await loop.create_server(lambda: HTTPProtocol(self), self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def stop(self):
+        """停止监听并关闭所有连接"""
+        if self.server is not None:
+            self.server.close()
+            for connection in list(self.connections):
+                if connection.transport is not None:
+                    connection.transport.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def handle_request(self, request: HTTPRequest) -> HTTPResponse:
+        """把HTTP请求映射到API路由"""
+        self.stats["requests"] += 1
+        method = "GET" if request.method == "HEAD" else request.method
+        try:
+            data = self._request_data(request)
+        except ValueError:
+            return self.error_response(400, "Invalid JSON body")
+
+        try:
+            result = await self.api_interface.dispatch(method, request.path, data)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"处理HTTP请求失败 {request.method} {request.path}: {e}")
+            return self.error_response(500, "Internal server error")
+        if method == "GET" and getattr(result, "etag", None) is not None:
+            return self.cacheable_response(request, result)
+        return self.json_response(result)
+
+    def cacheable_response(self, request: HTTPRequest, entry) -> HTTPResponse:
+        """
+        带ETag的响应：If-None-Match命中时返回304，否则返回缓存的（压缩）响应体
+        :param entry: 提供etag、data和get_encoded_data(encoder)的缓存条目
+        """
+        body = entry.get_encoded_data(self._json_encoder)
+        use_gzip = len(body) >= self.gzip_min_size and request.accepts_gzip()
+        # gzip表示与原始表示字节不同，强ETag需要区分
+        etag = entry.etag[:-1] + GZIP_ETAG_SUFFIX + '"' if use_gzip else entry.etag
+        headers = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, entry.etag):
+            self.stats["not_modified"] += 1
+            return HTTPResponse(304, b"", headers)
+        if use_gzip:
+            body = entry.get_encoded_data(self._gzip_encoder)
+            headers["Content-Encoding"] = "gzip"
+        return HTTPResponse(200, body, headers)
+
+    @staticmethod
+    def _request_data(request: HTTPRequest) -> Optional[Dict[str, Any]]:
+        """请求数据：JSON请求体，GET和HEAD请求使用查询参数"""
+        if request.body:
+            return json.loads(request.body)
+        if request.query and request.method in ("GET", "HEAD"):
+            return dict(request.query)
+        return None
+
+    @staticmethod
+    def json_response(result: Any) -> HTTPResponse:
+        """把处理器返回值转换为JSON响应，字典中的整数status字段作为HTTP状态码"""
+        status = 200
+        if isinstance(result, dict) and isinstance(result.get("status"), int) and 100 <= result["status"] < 600:
+            status = result["status"]
+        body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        return HTTPResponse(status, body)
+
+    def error_response(self, status: int, message: str) -> HTTPResponse:
+        """生成错误响应"""
+        return self.json_response({"error": message, "status": status})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取HTTP前端统计"""
+        return dict(self.stats, open_connections=len(self.connections))
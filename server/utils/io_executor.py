@@ -0,0 +1,120 @@
+# 服务端存储I/O线程池模块
+# DAO的文件读写在专用线程池中执行，不与事件循环默认executor中的其他任务抢线程。
+# 每个DAO类型记录操作次数、读写字节数、排队等待时间和执行时间的分布，
+# 用于区分慢请求是磁盘本身慢还是在线程池中排队
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+from server.utils.metrics import LatencyHistogram, OperationMetrics
+from server.dao.storage_config import DEFAULT_IO_THREADS
+
+class IOMetrics:
+    """单个DAO类型的I/O统计（在线程池线程中更新，加锁保护）"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.queue_wait = LatencyHistogram()
+        self.service = OperationMetrics()  # 按操作名称记录执行时间和错误数
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, queue_ms: float, service_ms: float, error: bool = False):
+        """记录一次操作的排队时间和执行时间（毫秒）"""
+        with self._lock:
+            self.queue_wait.observe(queue_ms)
+            self.service.record(operation, service_ms, error)
+
+    def add_bytes_read(self, count: int):
+        with self._lock:
+            self.bytes_read += count
+
+    def add_bytes_written(self, count: int):
+        with self._lock:
+            self.bytes_written += count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计，service为每种操作的执行时间直方图"""
+        with self._lock:
+            return {
+                "bytes_read": self.bytes_read,
+                "bytes_written": self.bytes_written,
+                "queue_wait": self.queue_wait.to_dict(),
+                "service": self.service.snapshot()
+            }
+
+class StorageIOExecutor:
+    """存储I/O专用线程池"""
+
+    def __init__(self, max_workers: int = DEFAULT_IO_THREADS):
+        """
+        :param max_workers: 线程数
+        """
+        self.max_workers = max(1, max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="storage-io")
+        self.metrics: Dict[str, IOMetrics] = {}
+        self.in_flight = 0  # 已提交未完成的操作数（排队中和执行中）
+        self.peak_in_flight = 0
+
+    def metrics_for(self, name: str) -> IOMetrics:
+        """获取指定名称（通常为DAO类名）的统计，同名的DAO实例共用"""
+        metrics = self.metrics.get(name)
+        if metrics is None:
+            metrics = IOMetrics(name)
+            self.metrics[name] = metrics
+        return metrics
+
+    async def run(self, metrics: Optional[IOMetrics], operation: str, function: Callable, *args) -> Any:
+        """
+        在线程池中执行同步I/O函数
+        :param metrics: 记录到的统计，None时不记录
+        :param operation: 操作名称，如read、write
+        """
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            error = True
+            try:
+                result = function(*args)
+                error = False
+                return result
+            finally:
+                if metrics is not None:
+                    finished = time.perf_counter()
+                    metrics.record(operation, (started - submitted) * 1000, (finished - started) * 1000, error)
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await asyncio.get_event_loop().run_in_executor(self.executor, task)
+        finally:
+            self.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取线程池状态和每个DAO类型的I/O统计"""
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "daos": {name: metrics.get_stats() for name, metrics in self.metrics.items()}
+        }
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+_shared_executor: Optional[StorageIOExecutor] = None
+_shared_lock = threading.Lock()
+
+def get_io_executor(max_workers: Optional[int] = None) -> StorageIOExecutor:
+    """
+    获取共享的存储I/O线程池（多个DAO模块共用）
+    :param max_workers: 线程数，只在第一次调用创建线程池时生效
+    """
+    global _shared_executor
+    with _shared_lock:
+        if _shared_executor is None:
+            _shared_executor = StorageIOExecutor(max_workers or DEFAULT_IO_THREADS)
+        return _shared_executor
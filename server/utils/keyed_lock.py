@@ -0,0 +1,84 @@
+# 服务端按键加锁模块
+# 读-改-写的业务操作（加经验、接任务、服务顾客）按玩家加锁：同一玩家的操作串行执行，避免丢失更新，
+# 不同玩家的操作互不等待。锁按键的哈希分散在多个分片表中，没有持有者和等待者的键立即清理，
+# 锁表大小只与当前正在操作的玩家数有关
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, AsyncIterator
+from server.utils.metrics import LatencyHistogram
+
+class _KeyLock:
+    """单个键的锁，users为持有者和等待者的数量"""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+class KeyedLockManager:
+    """按键加锁管理器，记录等待时间分布"""
+
+    def __init__(self, stripes: int = 64, buckets_ms: Optional[List[float]] = None):
+        """
+        :param stripes: 锁表分片数
+        :param buckets_ms: 等待时间直方图的分桶上界（毫秒）
+        """
+        self.stripes: List[Dict[Any, _KeyLock]] = [{} for _ in range(max(1, stripes))]
+        self.wait_times = LatencyHistogram(buckets_ms)
+        self.stats = {"acquisitions": 0, "contended": 0, "cleaned": 0}
+
+    def _stripe(self, key: Any) -> Dict[Any, _KeyLock]:
+        return self.stripes[hash(key) % len(self.stripes)]
+
+    @asynccontextmanager
+    async def lock(self, key: Any) -> AsyncIterator[None]:
+        """
+        获取键的锁
+        用法: async with player_locks.lock(player_id): ...
+        """
+        stripe = self._stripe(key)
+        entry = stripe.get(key)
+        if entry is None:
+            entry = _KeyLock()
+            stripe[key] = entry
+        entry.users += 1
+        if entry.lock.locked():
+            self.stats["contended"] += 1
+        start_time = time.perf_counter()
+        try:
+            await entry.lock.acquire()
+        except BaseException:
+            self._release_entry(stripe, key, entry)
+            raise
+        self.wait_times.observe((time.perf_counter() - start_time) * 1000)
+        self.stats["acquisitions"] += 1
+        try:
+            yield
+        finally:
+            entry.lock.release()
+            self._release_entry(stripe, key, entry)
+
+    def _release_entry(self, stripe: Dict[Any, _KeyLock], key: Any, entry: _KeyLock):
+        """减少使用计数，没有持有者和等待者时从锁表中删除"""
+        entry.users -= 1
+        if entry.users == 0 and stripe.get(key) is entry:
+            del stripe[key]
+            self.stats["cleaned"] += 1
+
+    def is_locked(self, key: Any) -> bool:
+        """键当前是否被持有"""
+        entry = self._stripe(key).get(key)
+        return entry is not None and entry.lock.locked()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取加锁统计，wait为等待时间直方图"""
+        return dict(
+            self.stats,
+            active_keys=sum(len(stripe) for stripe in self.stripes),
+            wait=self.wait_times.to_dict()
+        )
+
+# 玩家级锁（服务层共用）
+player_locks = KeyedLockManager()
@@ -0,0 +1,136 @@
+# 服务端市场价格推送模块
+import asyncio
+from typing import Dict, Any, List, Optional, Callable, Set, Tuple
+
+class MarketFeed:
+    """
+    市场价格订阅推送
+    订阅时返回快照，之后按固定间隔推送增量：两次推送之间的所有价格变化合并为一条增量，
+    只包含价格或趋势发生变化的商品。增量带有连续的序号，客户端发现序号不连续时重新订阅获取快照
+    """
+
+    def __init__(self, items_provider: Callable[[], List[Dict[str, Any]]],
+                 tick: Optional[Callable[[], Any]] = None, interval: float = 1.0,
+                 delta_fields: Tuple[str, ...] = ("current_price", "price_trend"), key_field: str = "id"):
+        """
+        :param items_provider: 返回当前完整商品列表的函数
+        :param tick: 每次推送前调用的市场模拟函数（可选）
+        :param interval: 推送间隔（秒），间隔内的变化合并推送
+        :param delta_fields: 参与比较并写入增量的字段
+        :param key_field: 商品唯一标识字段
+        """
+        self.items_provider = items_provider
+        self.tick = tick
+        self.interval = interval
+        self.delta_fields = delta_fields
+        self.key_field = key_field
+        self.subscribers: Set[Any] = set()
+        self.seq = 0  # 最近一次发布的序号
+        self.items: Dict[Any, Dict[str, Any]] = {}  # 最近一次发布的商品状态 {item_id: item}
+        self.deltas_published = 0
+        self._initialized = False
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, websocket) -> Dict[str, Any]:
+        """
+        订阅市场推送
+        :return: 与当前序号一致的市场快照
+        """
+        self.subscribers.add(websocket)
+        return self.snapshot()
+
+    def unsubscribe(self, websocket) -> bool:
+        """取消订阅，返回之前是否已订阅"""
+        if websocket in self.subscribers:
+            self.subscribers.discard(websocket)
+            return True
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取最近一次发布的市场快照（后续增量基于该快照）"""
+        if not self._initialized:
+            self._publish_state(self._load_items())
+        return {
+            "seq": self.seq,
+            "items": [dict(item) for item in self.items.values()]
+        }
+
+    def compute_delta(self) -> Optional[Dict[str, Any]]:
+        """
+        比较当前商品列表与上次发布的状态，生成增量并推进序号
+        :return: 增量，没有变化时返回None
+        """
+        current = self._load_items()
+        if not self._initialized:
+            self._publish_state(current)
+            return None
+
+        changed = []
+        for item_id, item in current.items():
+            previous = self.items.get(item_id)
+            if previous is None:
+                # 新上架商品发送完整信息
+                changed.append(dict(item))
+            elif any(item.get(field) != previous.get(field) for field in self.delta_fields):
+                entry = {self.key_field: item_id}
+                for field in self.delta_fields:
+                    entry[field] = item.get(field)
+                changed.append(entry)
+        removed = [item_id for item_id in self.items if item_id not in current]
+
+        if not changed and not removed:
+            return None
+
+        self.items = current
+        self.seq += 1
+        self.deltas_published += 1
+        delta = {"seq": self.seq, "items": changed}
+        if removed:
+            delta["removed"] = removed
+        return delta
+
+    def _load_items(self) -> Dict[Any, Dict[str, Any]]:
+        """读取当前商品列表"""
+        return {item[self.key_field]: item for item in self.items_provider() or []}
+
+    def _publish_state(self, items: Dict[Any, Dict[str, Any]]):
+        """记录初始发布状态"""
+        self.items = items
+        self._initialized = True
+
+    def start(self, publish: Callable[[Set[Any], Dict[str, Any]], Any]):
+        """
+        启动推送任务
+        :param publish: 发布函数，参数为订阅者集合和market_delta消息
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run(publish))
+
+    def stop(self):
+        """停止推送任务"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, publish):
+        """推送循环"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if self.tick is not None:
+                    self.tick()
+                # 没有订阅者时也推进状态，保证之后的快照是最新的
+                delta = self.compute_delta()
+                if delta is not None and self.subscribers:
+                    publish(set(self.subscribers), {"type": "market_delta", "data": delta})
+            except Exception as e:
+                print(f"市场推送失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取推送统计"""
+        return {
+            "subscribers": len(self.subscribers),
+            "seq": self.seq,
+            "items": len(self.items),
+            "deltas_published": self.deltas_published
+        }
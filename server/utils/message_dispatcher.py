@@ -0,0 +1,163 @@
+# 服务端消息分发模块
+import asyncio
+import time
+from typing import Dict, Any, Optional, Callable, List
+from server.utils.metrics import OperationMetrics
+
+def message_handler(message_type: str, pass_websocket: bool = False, ordered: bool = False):
+    """
+    消息处理器装饰器，标记方法负责处理的消息类型
+    :param message_type: 消息类型
+    :param pass_websocket: 是否把客户端连接作为第一个参数传给处理器
+    :param ordered: 同一连接上的该类消息是否必须按到达顺序串行处理
+    """
+    def decorator(func: Callable) -> Callable:
+        func._message_type = message_type
+        func._pass_websocket = pass_websocket
+        func._ordered = ordered
+        return func
+    return decorator
+
+class MessageDispatcher:
+    """消息分发器，按消息类型查表分发，并记录每种消息的延迟直方图与错误数"""
+    
+    def __init__(self, owner: Any, metrics: Optional[OperationMetrics] = None):
+        self.handlers: Dict[str, Callable] = {}
+        self.pass_websocket: Dict[str, bool] = {}
+        self.ordered: Dict[str, bool] = {}
+        self.metrics = metrics or OperationMetrics()
+        self._collect_handlers(owner)
+        
+    def _collect_handlers(self, owner: Any):
+        """收集owner类（含父类）上所有被message_handler标记的方法"""
+        for cls in reversed(type(owner).__mro__):
+            for attr_name, attr in vars(cls).items():
+                message_type = getattr(attr, "_message_type", None)
+                if message_type is None:
+                    continue
+                self.register(
+                    message_type,
+                    getattr(owner, attr_name),
+                    getattr(attr, "_pass_websocket", False),
+                    getattr(attr, "_ordered", False)
+                )
+                
+    def register(self, message_type: str, handler: Callable, pass_websocket: bool = False, ordered: bool = False):
+        """注册消息处理器"""
+        self.handlers[message_type] = handler
+        self.pass_websocket[message_type] = pass_websocket
+        self.ordered[message_type] = ordered
+        
+    def has_handler(self, message_type: str) -> bool:
+        """检查消息类型是否已注册"""
+        return message_type in self.handlers
+        
+    def is_ordered(self, message_type: str) -> bool:
+        """检查消息类型是否要求严格有序处理"""
+        return self.ordered.get(message_type, False)
+        
+    async def dispatch(self, message_type: str, websocket, data: Dict) -> Optional[Dict]:
+        """
+        分发消息到对应的处理器
+        :param message_type: 消息类型
+        :param websocket: 客户端连接
+        :param data: 消息数据
+        :return: 处理器返回的响应
+        """
+        handler = self.handlers[message_type]
+        start_time = time.perf_counter()
+        error = False
+        try:
+            if self.pass_websocket[message_type]:
+                response = await handler(websocket, data)
+            else:
+                response = await handler(data)
+            error = isinstance(response, dict) and response.get("type") == "error"
+            return response
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            self.metrics.record(message_type, elapsed_ms, error)
+            
+    async def dispatch_batch(self, websocket, requests: List[Dict], excluded_types=("batch",)) -> List[Dict]:
+        """
+        并发执行一批子请求
+        要求有序的子请求按在批次中的顺序依次执行，其余子请求并发执行
+        :param websocket: 客户端连接
+        :param requests: 子请求列表，每项包含type、data以及可选的request_id
+        :param excluded_types: 不允许出现在批次中的消息类型
+        :return: 与子请求一一对应的结果列表
+        """
+        results: List[Optional[Dict]] = [None] * len(requests)
+        ordered_indexes = []
+        concurrent_items = []
+        
+        for index, item in enumerate(requests):
+            message_type = item.get("type") if isinstance(item, dict) else None
+            if self.is_ordered(message_type):
+                ordered_indexes.append(index)
+            else:
+                concurrent_items.append(self._dispatch_batch_item(websocket, requests, index, results, excluded_types))
+                
+        async def run_ordered():
+            for index in ordered_indexes:
+                await self._dispatch_batch_item(websocket, requests, index, results, excluded_types)
+                
+        await asyncio.gather(run_ordered(), *concurrent_items)
+        return results
+        
+    async def _dispatch_batch_item(self, websocket, requests: List[Dict], index: int,
+                                   results: List[Optional[Dict]], excluded_types):
+        """执行批次中的单个子请求，结果写入results[index]"""
+        item = requests[index]
+        if not isinstance(item, dict):
+            results[index] = self._batch_error(index, None, "INVALID_REQUEST", "子请求格式无效")
+            return
+            
+        message_type = item.get("type")
+        request_id = item.get("request_id")
+        if message_type in excluded_types or not self.has_handler(message_type):
+            results[index] = self._batch_error(index, request_id, "UNKNOWN_MESSAGE_TYPE", f"未知消息类型: {message_type}")
+            return
+            
+        try:
+            response = await self.dispatch(message_type, websocket, item.get("data") or {})
+        except Exception as e:
+            results[index] = self._batch_error(index, request_id, "INTERNAL_ERROR", str(e))
+            return
+            
+        response = response or {}
+        if "data" in response:
+            response_data = response["data"]
+        else:
+            # 兼容不带data字段的扁平响应
+            response_data = {key: value for key, value in response.items() if key != "type"}
+            
+        result = {
+            "index": index,
+            "request_id": request_id,
+            "type": response.get("type"),
+            "data": response_data
+        }
+        if "data" in response and "version" in response:
+            result["version"] = response["version"]
+        results[index] = result
+        
+    @staticmethod
+    def _batch_error(index: int, request_id, code: str, message: str) -> Dict:
+        """生成子请求错误结果"""
+        return {
+            "index": index,
+            "request_id": request_id,
+            "type": "error",
+            "data": {
+                "code": code,
+                "message": message
+            }
+        }
+        
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取每种消息类型的延迟与错误统计"""
+        return self.metrics.snapshot()
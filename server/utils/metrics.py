@@ -0,0 +1,108 @@
+# 服务端性能指标模块
+import bisect
+import time
+from typing import Dict, Any, List, Optional
+
+# 默认延迟分桶上界（毫秒），最后一个桶收集所有超出上界的样本
+DEFAULT_LATENCY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+class LatencyHistogram:
+    """延迟直方图，使用固定分桶记录耗时分布"""
+    
+    def __init__(self, buckets_ms: Optional[List[float]] = None):
+        self.buckets_ms = list(buckets_ms or DEFAULT_LATENCY_BUCKETS_MS)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        
+    def observe(self, elapsed_ms: float):
+        """记录一次耗时（毫秒）"""
+        index = bisect.bisect_left(self.buckets_ms, elapsed_ms)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+            
+    def percentile(self, percent: float) -> float:
+        """
+        根据分桶估算百分位耗时
+        :param percent: 百分位（0-100）
+        :return: 对应桶的上界（毫秒），超出最大桶时返回最大观测值
+        """
+        if self.count == 0:
+            return 0.0
+            
+        target = self.count * percent / 100.0
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target and bucket_count > 0:
+                if index < len(self.buckets_ms):
+                    return min(self.buckets_ms[index], self.max_ms)
+                return self.max_ms
+        return self.max_ms
+        
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        buckets = {}
+        for index, bucket_count in enumerate(self.counts):
+            label = f"le_{self.buckets_ms[index]}" if index < len(self.buckets_ms) else "inf"
+            buckets[label] = bucket_count
+            
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": buckets
+        }
+
+class OperationMetrics:
+    """按操作名称（如消息类型）统计的延迟与错误计数"""
+    
+    def __init__(self, buckets_ms: Optional[List[float]] = None):
+        self.buckets_ms = buckets_ms
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.error_counts: Dict[str, int] = {}
+        self.started_at = time.time()
+        
+    def record(self, name: str, elapsed_ms: float, error: bool = False):
+        """
+        记录一次操作
+        :param name: 操作名称
+        :param elapsed_ms: 耗时（毫秒）
+        :param error: 是否出错
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = LatencyHistogram(self.buckets_ms)
+            self.histograms[name] = histogram
+        histogram.observe(elapsed_ms)
+        
+        if error:
+            self.error_counts[name] = self.error_counts.get(name, 0) + 1
+        elif name not in self.error_counts:
+            self.error_counts[name] = 0
+            
+    def get_stats(self, name: str) -> Optional[Dict[str, Any]]:
+        """获取单个操作的统计信息"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            return None
+        stats = histogram.to_dict()
+        stats["errors"] = self.error_counts.get(name, 0)
+        return stats
+        
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有操作的统计快照"""
+        return {name: self.get_stats(name) for name in self.histograms}
+        
+    def reset(self):
+        """重置所有统计"""
+        self.histograms.clear()
+        self.error_counts.clear()
+        self.started_at = time.time()
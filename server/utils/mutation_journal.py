@@ -0,0 +1,387 @@
+# 服务端变更日志模块
+# 文档（玩家存档）的修改不再整份重写，而是把与上次持久化版本的差异作为一条小记录追加到分片日志中，
+# 写入量从整份文档变为修改的部分。后台压缩任务定期把日志折叠进快照文件（即原来的存档文件），
+# 加载时读取快照再重放日志尾部。
+#
+# 日志文件按分片存放在快照所在目录：journal_<分片>.log，每行一条JSON记录 {"key": 快照文件名, "ops": [...]}。
+# 压缩时先把日志改名为 journal_<分片>.log.old（之后的追加写入新文件），折叠完成后删除。
+# 所有操作都是"把某个路径设置为某个值"的形式（列表追加也记录起始下标），重复重放是幂等的，
+# 因此折叠中途崩溃后再次重放.old文件不会重复累加
+import asyncio
+import copy
+import json
+import os
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+from server.utils.atomic_write import GroupCommitWriter, commit_batch
+from server.utils.save_codec import decode_save
+from server.utils.io_executor import StorageIOExecutor, IOMetrics, get_io_executor
+
+# 记录中的操作类型
+OP_SET = "set"          # 设置路径的值
+OP_UNSET = "unset"      # 删除路径
+OP_APPEND = "append"    # 列表从index开始替换为value（追加新元素）
+OP_REPLACE = "replace"  # 替换整份文档
+OP_DELETE = "delete"    # 删除文档
+
+_MISSING = object()
+
+def diff_documents(old: Any, new: Any, path: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+    """
+    计算从old到new的变更操作
+    字典逐键递归比较，列表只在前缀不变时记录为追加，其他变化记录为整体设置
+    """
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            old_value = old.get(key, _MISSING)
+            if old_value is _MISSING:
+                ops.append({"op": OP_SET, "path": path + [key], "value": value})
+            elif old_value != value:
+                ops.extend(diff_documents(old_value, value, path + [key]))
+        for key in old:
+            if key not in new:
+                ops.append({"op": OP_UNSET, "path": path + [key]})
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+        return [{"op": OP_APPEND, "path": path, "index": len(old), "value": new[len(old):]}]
+    if old == new:
+        return []
+    if not path:
+        return [{"op": OP_REPLACE, "value": new}]
+    return [{"op": OP_SET, "path": path, "value": new}]
+
+def _parent(document: Dict, path: List[Any], create: bool) -> Optional[Dict]:
+    """取出路径的父字典，create为True时创建缺失的中间字典"""
+    node = document
+    for key in path[:-1]:
+        child = node.get(key)
+        if not isinstance(child, dict):
+            if not create:
+                return None
+            child = {}
+            node[key] = child
+        node = child
+    return node
+
+def apply_ops(document: Optional[Dict], ops: List[Dict[str, Any]]) -> Optional[Dict]:
+    """把变更操作应用到文档上（原地修改），返回结果文档，文档被删除时返回None"""
+    for op in ops:
+        kind = op["op"]
+        if kind == OP_REPLACE:
+            document = copy.deepcopy(op["value"])
+            continue
+        if kind == OP_DELETE:
+            document = None
+            continue
+        if document is None:
+            document = {}
+        path = op["path"]
+        if kind == OP_UNSET:
+            parent = _parent(document, path, create=False)
+            if parent is not None:
+                parent.pop(path[-1], None)
+            continue
+        parent = _parent(document, path, create=True) if path else None
+        value = copy.deepcopy(op["value"])
+        if kind == OP_SET:
+            parent[path[-1]] = value
+        elif kind == OP_APPEND:
+            target = parent[path[-1]] if path else document
+            if not isinstance(target, list):
+                target = []
+                parent[path[-1]] = target
+            target[op["index"]:] = value
+    return document
+
+class MutationJournal:
+    """
+    分片变更日志
+    以快照文件路径为键：load读取快照并重放日志，write把与上次持久化版本的差异追加到日志，
+    日志超过compact_bytes或每compact_interval秒由后台任务折叠进快照。正常关闭前需要调用close()
+    """
+
+    def __init__(self, shards: int = 16, compact_bytes: int = 256 * 1024, compact_interval: float = 60.0,
+                 max_baselines: int = 1000, fsync: bool = True,
+                 io_executor: Optional[StorageIOExecutor] = None, io_metrics: Optional[IOMetrics] = None,
+                 group_commit: Optional[GroupCommitWriter] = None):
+        """
+        :param shards: 每个目录的日志分片数
+        :param compact_bytes: 日志超过该大小（字节）时触发压缩
+        :param compact_interval: 后台压缩间隔（秒）
+        :param max_baselines: 最多保留的持久化版本数（用于计算差异，没有持久化版本时记录整份文档）
+        :param fsync: 追加记录后是否fsync
+        :param io_executor: 执行文件读写的线程池，默认使用共享的存储I/O线程池
+        :param io_metrics: 记录读写字节数和耗时的统计（通常为所属DAO的统计），默认记录到MutationJournal名下
+        :param group_commit: 组提交写入器，指定时压缩产生的快照由它写入，同时压缩的多个分片合并为一批刷盘
+        """
+        self.shards = max(1, shards)
+        self.compact_bytes = compact_bytes
+        self.compact_interval = compact_interval
+        self.max_baselines = max_baselines
+        self.fsync = fsync
+        self.io = io_executor if io_executor is not None else get_io_executor()
+        self.io_metrics = io_metrics if io_metrics is not None else self.io.metrics_for(type(self).__name__)
+        self.group_commit = group_commit
+        self.baselines: "OrderedDict[str, Any]" = OrderedDict()
+        self._append_locks: Dict[str, asyncio.Lock] = {}
+        self._compact_locks: Dict[str, asyncio.Lock] = {}
+        self._journals = set()  # 写入或加载过的日志文件
+        self._compacting = set()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"appends": 0, "ops": 0, "bytes_appended": 0, "full_writes": 0, "compactions": 0, "snapshots_written": 0}
+
+    def journal_path(self, file_path: str) -> str:
+        """快照文件对应的日志文件"""
+        name = os.path.basename(file_path)
+        shard = zlib.crc32(name.encode("utf-8")) % self.shards
+        return os.path.join(os.path.dirname(file_path), f"journal_{shard}.log")
+
+    def _locks(self, journal: str) -> Tuple[asyncio.Lock, asyncio.Lock]:
+        return (self._append_locks.setdefault(journal, asyncio.Lock()),
+                self._compact_locks.setdefault(journal, asyncio.Lock()))
+
+    async def _run_io(self, operation: str, function, *args):
+        """在存储I/O线程池中执行同步函数"""
+        return await self.io.run(self.io_metrics, operation, function, *args)
+
+    def _count_read(self, count: int):
+        self.io_metrics.add_bytes_read(count)
+
+    def _count_written(self, count: int):
+        self.io_metrics.add_bytes_written(count)
+
+    def _read_records(self, journal: str) -> List[Dict[str, Any]]:
+        """读取日志记录，跳过写入中途崩溃留下的不完整行"""
+        records = []
+        try:
+            with open(journal, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return records
+        self._count_read(len(raw))
+        for line in raw.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    def _sync_load(self, file_path: str, journal: str) -> Optional[Dict]:
+        """读取快照并重放日志中该文档的记录（在executor中运行）"""
+        document = self._sync_load_snapshot(file_path)
+        name = os.path.basename(file_path)
+        for path in (journal + ".old", journal):
+            for record in self._read_records(path):
+                if record.get("key") == name:
+                    document = apply_ops(document, record["ops"])
+        return document
+
+    def _sync_append(self, journal: str, payload: bytes) -> int:
+        """追加记录（在executor中运行），返回日志大小"""
+        with open(journal, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            size = f.tell()
+        self._count_written(len(payload))
+        return size
+
+    def _remember(self, file_path: str, document: Any):
+        """记录持久化版本"""
+        self.baselines[file_path] = copy.deepcopy(document)
+        self.baselines.move_to_end(file_path)
+        while len(self.baselines) > self.max_baselines:
+            self.baselines.popitem(last=False)
+
+    async def load(self, file_path: str) -> Optional[Dict]:
+        """加载文档（快照加日志尾部），不存在时返回None"""
+        journal = self.journal_path(file_path)
+        _, compact_lock = self._locks(journal)
+        async with compact_lock:
+            document = await self._run_io("journal_load", self._sync_load, file_path, journal)
+        # 上次运行留下的日志也由本实例压缩
+        self._journals.add(journal)
+        if document is not None:
+            self._remember(file_path, document)
+        return document
+
+    async def write(self, file_path: str, document: Dict) -> bool:
+        """把文档与上次持久化版本的差异追加到日志，没有变化时不写入"""
+        baseline = self.baselines.get(file_path, _MISSING)
+        if baseline is _MISSING or baseline is None:
+            ops = [{"op": OP_REPLACE, "value": document}]
+            self.stats["full_writes"] += 1
+        else:
+            ops = diff_documents(baseline, document)
+            if not ops:
+                return True
+        if not await self._append(file_path, ops):
+            return False
+        self._remember(file_path, document)
+        return True
+
+    async def delete(self, file_path: str) -> bool:
+        """删除文档（记录删除并移除快照），返回文档原来是否存在"""
+        existed = await self.load(file_path) is not None
+        self.baselines.pop(file_path, None)
+        if not await self._append(file_path, [{"op": OP_DELETE}]):
+            return False
+        try:
+            await self._run_io("delete", os.remove, file_path)
+        except FileNotFoundError:
+            pass
+        return existed
+
+    async def _append(self, file_path: str, ops: List[Dict[str, Any]]) -> bool:
+        journal = self.journal_path(file_path)
+        payload = (json.dumps({"key": os.path.basename(file_path), "ops": ops}, ensure_ascii=False) + "\n").encode("utf-8")
+        append_lock, _ = self._locks(journal)
+        try:
+            async with append_lock:
+                size = await self._run_io("journal_append", self._sync_append, journal, payload)
+        except Exception as e:
+            print(f"追加变更日志失败 {journal}: {e}")
+            return False
+        self.stats["appends"] += 1
+        self.stats["ops"] += len(ops)
+        self.stats["bytes_appended"] += len(payload)
+        self._journals.add(journal)
+        self._ensure_compactor()
+        if size >= self.compact_bytes and journal not in self._compacting:
+            asyncio.ensure_future(self.compact(journal))
+        return True
+
+    def _sync_fold(self, journal: str) -> List[Tuple[str, Any]]:
+        """
+        把.old日志中的记录应用到快照（在executor中运行），删除已删除文档的快照，
+        返回需要写入的快照 [(文件路径, 文档)]
+        """
+        old_journal = journal + ".old"
+        records = self._read_records(old_journal)
+        directory = os.path.dirname(journal)
+        documents: Dict[str, Any] = {}
+        for record in records:
+            name = record.get("key")
+            if name not in documents:
+                documents[name] = self._sync_load_snapshot(os.path.join(directory, name))
+            documents[name] = apply_ops(documents[name], record["ops"])
+
+        writes = []
+        for name, document in documents.items():
+            file_path = os.path.join(directory, name)
+            if document is None:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+            else:
+                writes.append((file_path, document))
+        return writes
+
+    async def _write_snapshots(self, writes: List[Tuple[str, Any]]):
+        """原子写入快照，有快照写入失败时抛出IOError（保留.old日志，下次压缩重新折叠）"""
+        if self.group_commit is not None:
+            outcomes = await asyncio.gather(*(self.group_commit.write(file_path, document) for file_path, document in writes))
+            results = {file_path: success for (file_path, _), success in zip(writes, outcomes)}
+        else:
+            results = await self._run_io("journal_compact", commit_batch, writes)
+        if not all(results.values()):
+            raise IOError(f"写入快照失败: {[path for path, success in results.items() if not success]}")
+
+    def _sync_finish_fold(self, journal: str, writes: List[Tuple[str, Any]]):
+        """快照写入完成后删除.old日志（在executor中运行）"""
+        self._count_written(sum(os.path.getsize(file_path) for file_path, _ in writes))
+        try:
+            os.remove(journal + ".old")
+        except FileNotFoundError:
+            pass
+
+    def _sync_load_snapshot(self, file_path: str) -> Optional[Dict]:
+        try:
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        self._count_read(len(raw))
+        return decode_save(raw)
+
+    @staticmethod
+    def _sync_rotate(journal: str) -> bool:
+        """把日志改名为.old（上次折叠未完成时保留原.old，先折叠它），返回是否有需要折叠的记录"""
+        old_journal = journal + ".old"
+        if os.path.exists(old_journal):
+            return True
+        if not os.path.exists(journal) or os.path.getsize(journal) == 0:
+            return False
+        os.replace(journal, old_journal)
+        return True
+
+    async def compact(self, journal: str) -> int:
+        """压缩一个日志分片，返回写入的快照数"""
+        append_lock, compact_lock = self._locks(journal)
+        self._compacting.add(journal)
+        written = 0
+        try:
+            async with compact_lock:
+                # 改名期间暂停追加，之后的追加写入新的日志文件，不必等待折叠完成
+                # 循环一次处理上次遗留的.old，一次处理当前日志
+                for _ in range(2):
+                    async with append_lock:
+                        pending = await self._run_io("journal_rotate", self._sync_rotate, journal)
+                    if not pending:
+                        break
+                    writes = await self._run_io("journal_compact", self._sync_fold, journal)
+                    await self._write_snapshots(writes)
+                    await self._run_io("journal_compact", self._sync_finish_fold, journal, writes)
+                    written += len(writes)
+                    self.stats["compactions"] += 1
+        except Exception as e:
+            print(f"压缩变更日志失败 {journal}: {e}")
+        finally:
+            self._compacting.discard(journal)
+        self.stats["snapshots_written"] += written
+        return written
+
+    async def compact_all(self) -> int:
+        """压缩所有写入或加载过的日志分片，返回写入的快照数"""
+        results = await asyncio.gather(*(self.compact(journal) for journal in list(self._journals)))
+        return sum(results)
+
+    async def compact_directory(self, directory: str) -> int:
+        """压缩目录中的所有日志（包括其他实例写入的），返回写入的快照数"""
+        names = await self._run_io("list", os.listdir, directory)
+        journals = {
+            os.path.join(directory, name[:-len(".old")] if name.endswith(".old") else name)
+            for name in names if name.startswith("journal_") and (name.endswith(".log") or name.endswith(".log.old"))
+        }
+        results = await asyncio.gather(*(self.compact(journal) for journal in journals))
+        return sum(results)
+
+    async def close(self) -> int:
+        """停止后台压缩任务并把所有日志折叠进快照"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        return await self.compact_all()
+
+    def _ensure_compactor(self):
+        """有日志写入时启动后台压缩任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        """后台压缩循环"""
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                await self.compact_all()
+            except Exception as e:
+                print(f"压缩变更日志失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取日志统计"""
+        return dict(self.stats, journals=len(self._journals), baselines=len(self.baselines))
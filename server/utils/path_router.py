@@ -0,0 +1,161 @@
+# 服务端路径模板路由模块
+# 路由模板按路径段编译成前缀树，匹配耗时与路径段数成正比
+# 模板参数写作 {name} 或 {name:type}，type可以是 str、int、float
+import inspect
+from urllib.parse import unquote
+from typing import Dict, Any, Optional, List, Callable, Tuple
+
+# 参数类型转换器
+PARAM_CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "str": str,
+    "int": int,
+    "float": float
+}
+
+class RouteMatch:
+    """路由匹配结果"""
+
+    def __init__(self, route: "Route", params: Dict[str, Any]):
+        self.route = route
+        self.params = params
+
+    @property
+    def handler(self):
+        return self.route.handler
+
+    def build_kwargs(self, data: Optional[Dict] = None) -> Dict[str, Any]:
+        """生成调用处理器的参数：路径参数按名称传入，请求体作为剩余的第一个参数传入"""
+        return self.route.build_kwargs(self.params, data)
+
+class Route:
+    """已注册的路由"""
+
+    def __init__(self, method: str, template: str, handler, param_names: List[str]):
+        self.method = method
+        self.template = template
+        self.handler = handler
+        self.param_names = param_names
+        self._analyze_handler()
+
+    def _analyze_handler(self):
+        """注册时分析处理器签名，确定哪些路径参数可以传入以及请求体参数的位置"""
+        try:
+            parameters = list(inspect.signature(self.handler).parameters.values())
+        except (TypeError, ValueError):
+            parameters = []
+        accepts_kwargs = any(p.kind == p.VAR_KEYWORD for p in parameters)
+        names = [p.name for p in parameters if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)]
+        self.passed_params = [name for name in self.param_names if accepts_kwargs or name in names]
+        body_params = [
+            p for p in parameters
+            if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) and p.name not in self.passed_params
+        ]
+        self.body_param = body_params[0].name if body_params else None
+
+    def build_kwargs(self, params: Dict[str, Any], data: Optional[Dict]) -> Dict[str, Any]:
+        """生成调用处理器的关键字参数"""
+        kwargs = {name: params[name] for name in self.passed_params}
+        if self.body_param is not None and data is not None:
+            kwargs[self.body_param] = data
+        return kwargs
+
+class _RouteNode:
+    """前缀树节点"""
+
+    __slots__ = ("literals", "param_children", "routes")
+
+    def __init__(self):
+        self.literals: Dict[str, "_RouteNode"] = {}  # 字面路径段 {segment: node}
+        self.param_children: List[Tuple[str, Callable[[str], Any], "_RouteNode"]] = []  # [(参数名, 转换器, node)]
+        self.routes: Dict[str, Route] = {}  # 在该节点结束的路由 {method: route}
+
+class PathRouter:
+    """路径模板路由器，字面路径段优先于参数段匹配"""
+
+    def __init__(self):
+        self.root = _RouteNode()
+        self.route_count = 0
+
+    @staticmethod
+    def split_path(path: str) -> List[str]:
+        """把路径拆分为路径段（忽略查询字符串和多余的斜杠）"""
+        path = path.split("?", 1)[0]
+        return [unquote(segment) for segment in path.split("/") if segment]
+
+    def add(self, method: str, template: str, handler) -> Route:
+        """
+        注册路由
+        :param method: HTTP方法
+        :param template: 路径模板，如 /api/players/{player_id} 或 /api/recipes/{recipe_id:int}
+        :param handler: 处理器
+        """
+        node = self.root
+        param_names = []
+        for segment in self.split_path(template):
+            if segment.startswith("{") and segment.endswith("}"):
+                name, _, type_name = segment[1:-1].partition(":")
+                converter = PARAM_CONVERTERS.get(type_name or "str")
+                if converter is None:
+                    raise ValueError(f"未知的路径参数类型: {type_name}")
+                child = None
+                for existing_name, existing_converter, existing_node in node.param_children:
+                    if existing_name == name and existing_converter is converter:
+                        child = existing_node
+                        break
+                if child is None:
+                    child = _RouteNode()
+                    node.param_children.append((name, converter, child))
+                param_names.append(name)
+                node = child
+            else:
+                node = node.literals.setdefault(segment, _RouteNode())
+
+        route = Route(method.upper(), template, handler, param_names)
+        if route.method not in node.routes:
+            self.route_count += 1
+        node.routes[route.method] = route
+        return route
+
+    def match(self, method: str, path: str) -> Optional[RouteMatch]:
+        """
+        匹配路由
+        :return: 匹配结果，路径或方法不匹配时返回None
+        """
+        method = method.upper()
+        node, params = self._find(self.root, self.split_path(path), 0, {}, method)
+        if node is None:
+            return None
+        return RouteMatch(node.routes[method], params)
+
+    def allowed_methods(self, path: str) -> List[str]:
+        """获取路径支持的HTTP方法（用于区分404和405）"""
+        node, _ = self._find(self.root, self.split_path(path), 0, {}, None)
+        return sorted(node.routes) if node is not None else []
+
+    def _find(self, node: _RouteNode, segments: List[str], index: int, params: Dict[str, Any],
+              method: Optional[str]) -> Tuple[Optional[_RouteNode], Dict[str, Any]]:
+        """
+        在前缀树中查找路径对应的节点，字面段不匹配时回退到参数段
+        :param method: 要求节点支持的HTTP方法，为None时只要求节点存在路由
+        """
+        if index == len(segments):
+            if node.routes and (method is None or method in node.routes):
+                return node, params
+            return None, params
+
+        segment = segments[index]
+        child = node.literals.get(segment)
+        if child is not None:
+            found, found_params = self._find(child, segments, index + 1, params, method)
+            if found is not None:
+                return found, found_params
+
+        for name, converter, child in node.param_children:
+            try:
+                value = converter(segment)
+            except ValueError:
+                continue
+            found, found_params = self._find(child, segments, index + 1, dict(params, **{name: value}), method)
+            if found is not None:
+                return found, found_params
+        return None, params
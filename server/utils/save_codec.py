@@ -0,0 +1,75 @@
+# 服务端存档编码模块
+# 存档可以写成以下几种格式，由KITCHEN_SAVE_ENCODING配置（见server/dao/storage_config.py）：
+#   json     缩进的JSON（原来的存档格式）
+#   compact  紧凑JSON（默认），没有缩进和多余空格，仍然是普通JSON文件
+#   zlib     紧凑JSON加zlib压缩
+#   gzip     紧凑JSON加gzip压缩
+# 压缩格式以5字节的文件头开始：\x00LGS 加一个格式字节。合法的JSON不会以\x00开头，
+# 读取时据此自动识别格式，旧的JSON存档与新格式的存档可以混放在同一目录
+import gzip
+import json
+import zlib
+from typing import Any, Optional
+
+SAVE_JSON = "json"
+SAVE_COMPACT = "compact"
+SAVE_ZLIB = "zlib"
+SAVE_GZIP = "gzip"
+SAVE_ENCODINGS = (SAVE_JSON, SAVE_COMPACT, SAVE_ZLIB, SAVE_GZIP)
+
+DEFAULT_SAVE_ENCODING = SAVE_COMPACT
+COMPRESSION_LEVEL = 6
+
+MAGIC = b"\x00LGS"
+_FORMAT_IDS = {SAVE_ZLIB: 1, SAVE_GZIP: 2}
+_FORMAT_NAMES = {format_id: name for name, format_id in _FORMAT_IDS.items()}
+
+_save_encoding = DEFAULT_SAVE_ENCODING
+
+def set_save_encoding(encoding: str):
+    """设置写入存档时使用的默认编码"""
+    global _save_encoding
+    if encoding not in SAVE_ENCODINGS:
+        raise ValueError(f"未知的存档编码: {encoding}，可选值: {', '.join(SAVE_ENCODINGS)}")
+    _save_encoding = encoding
+
+def get_save_encoding() -> str:
+    """获取写入存档时使用的默认编码"""
+    return _save_encoding
+
+def encode_save(data: Any, encoding: Optional[str] = None) -> bytes:
+    """
+    编码存档
+    :param encoding: 存档编码，默认使用set_save_encoding()设置的编码
+    """
+    encoding = encoding or _save_encoding
+    if encoding == SAVE_JSON:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if encoding == SAVE_COMPACT:
+        return payload
+    if encoding == SAVE_ZLIB:
+        return MAGIC + bytes([_FORMAT_IDS[SAVE_ZLIB]]) + zlib.compress(payload, COMPRESSION_LEVEL)
+    if encoding == SAVE_GZIP:
+        # mtime固定为0，相同内容编码结果相同
+        return MAGIC + bytes([_FORMAT_IDS[SAVE_GZIP]]) + gzip.compress(payload, COMPRESSION_LEVEL, mtime=0)
+    raise ValueError(f"未知的存档编码: {encoding}")
+
+def detect_encoding(raw: bytes) -> str:
+    """根据文件头识别存档格式，没有文件头的视为JSON（缩进或紧凑）"""
+    if raw[:len(MAGIC)] != MAGIC:
+        return SAVE_COMPACT
+    format_id = raw[len(MAGIC)] if len(raw) > len(MAGIC) else None
+    name = _FORMAT_NAMES.get(format_id)
+    if name is None:
+        raise ValueError(f"未知的存档格式: {format_id}")
+    return name
+
+def decode_save(raw: bytes) -> Any:
+    """解码存档，自动识别格式"""
+    encoding = detect_encoding(raw)
+    if encoding == SAVE_ZLIB:
+        raw = zlib.decompress(raw[len(MAGIC) + 1:])
+    elif encoding == SAVE_GZIP:
+        raw = gzip.decompress(raw[len(MAGIC) + 1:])
+    return json.loads(raw)
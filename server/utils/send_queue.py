@@ -0,0 +1,153 @@
+# 服务端连接发送队列模块
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, Union
+
+# 队列溢出策略
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # 丢弃最早的可丢弃推送（聊天、行情）
+OVERFLOW_COALESCE = "coalesce"        # 用新推送替换队列中相同合并键的旧推送
+OVERFLOW_DISCONNECT = "disconnect"    # 断开慢速客户端
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE, OVERFLOW_DISCONNECT)
+
+class ClientSendQueue:
+    """单个客户端的有界发送队列，由独立的写协程负责发送"""
+    
+    def __init__(self, websocket, max_size: int = 256, overflow_policy: str = OVERFLOW_DROP_OLDEST):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"未知的队列溢出策略: {overflow_policy}")
+            
+        self.websocket = websocket
+        self.max_size = max(1, max_size)
+        self.overflow_policy = overflow_policy
+        self.queue = deque()  # 元素为 [payload, droppable, coalesce_key]
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+        
+        # 统计信息
+        self.enqueued_count = 0
+        self.sent_count = 0
+        self.dropped_count = 0
+        self.coalesced_count = 0
+        self.peak_depth = 0
+        self.evicted = False
+        
+    def start(self):
+        """启动写协程"""
+        if self._writer_task is None:
+            self._writer_task = asyncio.ensure_future(self._writer())
+            
+    def put(self, payload: Union[str, bytes], droppable: bool = False, coalesce_key: Optional[str] = None) -> bool:
+        """
+        把一帧放入发送队列
+        :param payload: 已编码的消息帧
+        :param droppable: 是否为可丢弃的推送（请求响应不可丢弃）
+        :param coalesce_key: 合并键，coalesce策略下新推送会替换队列中相同键的旧推送
+        :return: 是否成功入队
+        """
+        if self.closed:
+            return False
+            
+        if len(self.queue) >= self.max_size:
+            outcome = self._make_room(payload, droppable, coalesce_key)
+            if outcome != "append":
+                return False
+                
+        self.queue.append([payload, droppable, coalesce_key])
+        self.enqueued_count += 1
+        if len(self.queue) > self.peak_depth:
+            self.peak_depth = len(self.queue)
+        self._wakeup.set()
+        return True
+        
+    def _make_room(self, payload, droppable: bool, coalesce_key: Optional[str]) -> str:
+        """
+        队列已满时按策略腾出空间
+        :return: append（已腾出空间）、dropped（新帧被丢弃）或evicted（客户端被驱逐）
+        """
+        if self.overflow_policy == OVERFLOW_DISCONNECT:
+            self._evict()
+            return "evicted"
+            
+        if self.overflow_policy == OVERFLOW_COALESCE and coalesce_key is not None:
+            # 移除同一合并键的旧推送，新推送排到队尾，保证客户端最后收到的是最新状态
+            for index, entry in enumerate(self.queue):
+                if entry[2] == coalesce_key:
+                    del self.queue[index]
+                    self.coalesced_count += 1
+                    return "append"
+                    
+        # 丢弃最早的可丢弃推送
+        for index, entry in enumerate(self.queue):
+            if entry[1]:
+                del self.queue[index]
+                self.dropped_count += 1
+                return "append"
+                
+        # 队列里全是不可丢弃的响应
+        if droppable:
+            self.dropped_count += 1
+            return "dropped"
+        self._evict()
+        return "evicted"
+        
+    def _evict(self):
+        """驱逐慢速客户端"""
+        self.evicted = True
+        self.closed = True
+        self.dropped_count += len(self.queue)
+        self.queue.clear()
+        self._wakeup.set()
+        asyncio.ensure_future(self._close_websocket())
+        
+    async def _close_websocket(self):
+        """关闭连接"""
+        try:
+            await self.websocket.close(code=1008, reason="slow consumer")
+        except Exception as e:
+            print(f"关闭慢速客户端连接失败: {e}")
+            
+    async def _writer(self):
+        """写协程，按顺序发送队列中的帧"""
+        try:
+            while True:
+                while not self.queue:
+                    if self.closed:
+                        return
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    
+                payload = self.queue.popleft()[0]
+                await self.websocket.send(payload)
+                self.sent_count += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # 连接已断开，停止接收新的帧
+            self.closed = True
+            self.queue.clear()
+            
+    @property
+    def depth(self) -> int:
+        """当前队列深度"""
+        return len(self.queue)
+        
+    def close(self):
+        """关闭发送队列并停止写协程"""
+        self.closed = True
+        self.queue.clear()
+        self._wakeup.set()
+        if self._writer_task is not None and not self._writer_task.done():
+            self._writer_task.cancel()
+            
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列统计信息"""
+        return {
+            "depth": self.depth,
+            "peak_depth": self.peak_depth,
+            "enqueued": self.enqueued_count,
+            "sent": self.sent_count,
+            "dropped": self.dropped_count,
+            "coalesced": self.coalesced_count,
+            "evicted": self.evicted
+        }
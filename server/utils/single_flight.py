@@ -0,0 +1,77 @@
+# 服务端读取合并模块
+# 同一个键的并发读取共用一次进行中的读取：场景加载、服务器预热时大量协程同时请求同一个玩家或目录，
+# 只有第一个调用者真正发起读取，其余调用者等待同一个结果
+import asyncio
+import copy
+from typing import Dict, Any, Callable, Awaitable
+
+class _Flight:
+    """进行中的读取，callers为共用这次读取的调用者数"""
+
+    __slots__ = ("task", "callers")
+
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.callers = 1
+
+class SingleFlight:
+    """
+    读取合并
+    有多个调用者共用一次读取时，每个调用者得到结果的独立副本，调用方修改结果不会互相影响
+    """
+
+    def __init__(self, copy_results: bool = True):
+        """
+        :param copy_results: 结果被多个调用者共用时是否分别复制（结果会被调用方修改时需要）
+        """
+        self.copy_results = copy_results
+        self.in_flight: Dict[Any, _Flight] = {}
+        # calls: 调用次数，hits: 加入已在进行中的读取的调用次数，coalesced: 被多个调用者共用的读取次数
+        self.stats = {"calls": 0, "reads": 0, "hits": 0, "coalesced": 0}
+
+    async def do(self, key: Any, read: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行读取，同一个键已有进行中的读取时等待它的结果
+        :param read: 读取函数，无参数，返回可等待对象
+        """
+        self.stats["calls"] += 1
+        flight = self.in_flight.get(key)
+        if flight is not None:
+            flight.callers += 1
+            self.stats["hits"] += 1
+            if flight.callers == 2:
+                self.stats["coalesced"] += 1
+        else:
+            flight = _Flight(None)
+            flight.task = asyncio.ensure_future(self._run(key, flight, read))
+            self.in_flight[key] = flight
+            self.stats["reads"] += 1
+        # 单个调用者被取消时不取消共用的读取
+        result = await asyncio.shield(flight.task)
+        if self.copy_results and flight.callers > 1:
+            return copy.deepcopy(result)
+        return result
+
+    async def _run(self, key: Any, flight: _Flight, read: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await read()
+        finally:
+            # 读取结束前移出，之后的调用者发起新的读取，完成时callers不会再变化
+            if self.in_flight.get(key) is flight:
+                del self.in_flight[key]
+
+    def forget(self, key: Any):
+        """放弃键上进行中的读取（写入后调用），之后的调用者不会拿到写入前开始读取的结果"""
+        self.in_flight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取读取合并统计"""
+        calls = self.stats["calls"]
+        return dict(
+            self.stats,
+            in_flight=len(self.in_flight),
+            hit_rate=self.stats["hits"] / calls if calls else 0.0
+        )
+
+# DAO文件读取共用的读取合并（以文件路径为键）
+file_reads = SingleFlight()
@@ -0,0 +1,41 @@
+# 可缓存资源的版本号工具模块
+# 版本号为规范化JSON内容的哈希，同一内容在不同进程和不同接口（WebSocket/REST）中版本号一致
+import hashlib
+import json
+from typing import Dict, Any, Optional
+
+def compute_version(data: Any) -> str:
+    """计算资源内容的版本号"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+def is_not_modified(if_version: Optional[str], version: str) -> bool:
+    """判断客户端持有的副本是否仍是最新版本"""
+    return bool(if_version) and if_version == version
+
+def not_modified_response(resource_type: str, version: str) -> Dict[str, Any]:
+    """生成not_modified响应（客户端继续使用本地副本）"""
+    return {
+        "type": "not_modified",
+        "data": {
+            "resource": resource_type,
+            "version": version
+        }
+    }
+
+def versioned_response(response_type: str, data: Any, version: str,
+                       if_version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    生成带版本号的响应，客户端版本一致时返回not_modified
+    :param response_type: 响应消息类型
+    :param data: 资源内容
+    :param version: 资源当前版本号
+    :param if_version: 客户端持有的版本号
+    """
+    if is_not_modified(if_version, version):
+        return not_modified_response(response_type, version)
+    return {
+        "type": response_type,
+        "data": data,
+        "version": version
+    }
@@ -0,0 +1,199 @@
+# 服务端写回缓存模块
+# 热点文档保存在内存中，修改只标记为脏数据，由后台任务按固定间隔写回，
+# 同一文档在一个写回间隔内的多次修改合并为一次写入
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable
+from server.utils.single_flight import SingleFlight
+
+class _CacheEntry:
+    """缓存条目"""
+
+    __slots__ = ("data", "dirty_since", "generation", "writing", "redirtied_at")
+
+    def __init__(self, data: Any):
+        self.data = data
+        self.dirty_since: Optional[float] = None  # 最早一次未写回修改的时间，干净条目为None
+        self.generation = 0  # 修改计数，用于判断写回期间是否又有新的修改
+        self.writing = False  # 是否正在写回
+        self.redirtied_at: Optional[float] = None  # 写回期间第一次新修改的时间，写回成功后作为新的dirty_since
+
+class WriteBehindCache:
+    """
+    写回缓存
+    读取未命中时通过loader加载，put只更新内存并标记为脏数据。脏数据在以下时机写回：
+    后台任务每flush_interval秒一次、条目被LRU淘汰时、脏数据存在时间超过max_dirty_age时，以及flush_all()
+    """
+
+    def __init__(self, loader: Callable[[Any], Awaitable[Any]], writer: Callable[[Any, Any], Awaitable[bool]],
+                 flush_interval: float = 5.0, max_dirty_age: float = 30.0, max_entries: int = 1000):
+        """
+        :param loader: 异步加载函数，参数为键，不存在时返回None
+        :param writer: 异步写入函数，参数为键和数据，返回是否成功
+        :param flush_interval: 后台写回间隔（秒）
+        :param max_dirty_age: 脏数据最长存在时间（秒），后台写回失败或落后时在put中同步写回
+        :param max_entries: 最多缓存的条目数，超出时淘汰最久未使用的条目
+        """
+        self.loader = loader
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.max_dirty_age = max_dirty_age
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Any, _CacheEntry]" = OrderedDict()
+        self._flush_locks: Dict[Any, asyncio.Lock] = {}
+        self.dirty_since: Optional[float] = None  # 所有脏条目中最早的dirty_since，没有脏数据时为None
+        self._task: Optional[asyncio.Task] = None
+        # 同一个键的并发未命中只加载一次，加载结果放入缓存后再复制给各调用者，不需要再复制
+        self._loads = SingleFlight(copy_results=False)
+        self.stats = {"hits": 0, "misses": 0, "puts": 0, "writes": 0, "write_errors": 0, "evictions": 0}
+
+    async def get(self, key: Any) -> Optional[Any]:
+        """获取文档副本，未缓存时加载"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.stats["hits"] += 1
+            self.entries.move_to_end(key)
+            return copy.deepcopy(entry.data)
+
+        self.stats["misses"] += 1
+        data = await self._loads.do(key, lambda: self.loader(key))
+        if data is None:
+            return None
+        # 加载期间可能已有新数据写入缓存，以缓存中的为准
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = _CacheEntry(data)
+            self.entries[key] = entry
+            await self._evict()
+        return copy.deepcopy(entry.data)
+
+    async def put(self, key: Any, data: Any) -> bool:
+        """更新文档并标记为脏数据，返回是否成功（只有同步写回失败时返回False）"""
+        self.stats["puts"] += 1
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = _CacheEntry(None)
+            self.entries[key] = entry
+        else:
+            self.entries.move_to_end(key)
+        entry.data = copy.deepcopy(data)
+        entry.generation += 1
+        now = time.monotonic()
+        if entry.dirty_since is None:
+            entry.dirty_since = now
+        if entry.writing and entry.redirtied_at is None:
+            entry.redirtied_at = now
+        if self.dirty_since is None:
+            self.dirty_since = now
+        self._ensure_flusher()
+
+        if now - entry.dirty_since >= self.max_dirty_age:
+            if not await self.flush(key):
+                return False
+        await self._evict()
+        return True
+
+    def discard(self, key: Any):
+        """丢弃缓存条目（包括未写回的修改），用于删除文档"""
+        self.entries.pop(key, None)
+        self._flush_locks.pop(key, None)
+        self._loads.forget(key)
+        self._refresh_dirty_since()
+
+    def is_dirty(self, key: Any) -> bool:
+        """条目是否有未写回的修改"""
+        entry = self.entries.get(key)
+        return entry is not None and entry.dirty_since is not None
+
+    async def flush(self, key: Any) -> bool:
+        """写回单个条目，条目干净或不存在时直接返回True"""
+        lock = self._flush_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.dirty_since is None:
+                return True
+            generation = entry.generation
+            # 写入的是当前数据的快照，写入期间的新修改留到下一次写回
+            entry.writing = True
+            entry.redirtied_at = None
+            try:
+                success = await self.writer(key, copy.deepcopy(entry.data))
+            finally:
+                entry.writing = False
+            if not success:
+                # 写回失败时保留原来的dirty_since，脏数据的存在时间从最早一次未写回的修改算起
+                self.stats["write_errors"] += 1
+                return False
+            self.stats["writes"] += 1
+            # 写入期间又有新修改时，剩余脏数据的存在时间从写入期间第一次修改算起
+            written_since = entry.dirty_since
+            entry.dirty_since = None if entry.generation == generation else entry.redirtied_at
+            entry.redirtied_at = None
+            if written_since == self.dirty_since:
+                self._refresh_dirty_since()
+            return True
+
+    async def flush_all(self) -> int:
+        """写回所有脏数据（用于正常关闭），返回写回失败的条目数"""
+        dirty_keys = [key for key, entry in self.entries.items() if entry.dirty_since is not None]
+        results = await asyncio.gather(*(self.flush(key) for key in dirty_keys))
+        # 部分条目写回失败时，按剩余脏条目重新计算最早的dirty_since
+        self._refresh_dirty_since()
+        return sum(1 for success in results if not success)
+
+    def _refresh_dirty_since(self):
+        """按剩余脏条目重新计算最早的dirty_since，部分写回失败后仍然反映真实的脏数据存在时间"""
+        self.dirty_since = min(
+            (entry.dirty_since for entry in self.entries.values() if entry.dirty_since is not None), default=None
+        )
+
+    async def close(self) -> int:
+        """停止后台写回任务并写回所有脏数据"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        return await self.flush_all()
+
+    def _ensure_flusher(self):
+        """有脏数据时启动后台写回任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        """后台写回循环"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_all()
+            except Exception as e:
+                print(f"写回缓存失败: {e}")
+
+    async def _evict(self):
+        """淘汰最久未使用的条目，脏条目淘汰前先写回"""
+        while len(self.entries) > self.max_entries:
+            key, entry = next(iter(self.entries.items()))
+            if entry.dirty_since is not None and not await self.flush(key):
+                # 写回失败时保留条目，避免丢失修改
+                self.entries.move_to_end(key)
+                return
+            if self.entries.get(key) is entry and entry.dirty_since is None:
+                self.entries.pop(key)
+                self._flush_locks.pop(key, None)
+                self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计，coalesced为合并掉的写入次数，load_hits为加入进行中加载的未命中次数，
+        oldest_dirty_age为最早的未写回修改已存在的秒数
+        """
+        dirty = sum(1 for entry in self.entries.values() if entry.dirty_since is not None)
+        return dict(
+            self.stats,
+            entries=len(self.entries),
+            load_hits=self._loads.stats["hits"],
+            dirty=dirty,
+            oldest_dirty_age=0.0 if self.dirty_since is None else time.monotonic() - self.dirty_since,
+            coalesced=max(0, self.stats["puts"] - self.stats["writes"] - dirty)
+        )
@@ -0,0 +1,10 @@
+# 共享常量模块初始化文件
+
+# 导入常量定义
+from .message_types import MESSAGE_TYPE_CODES, MESSAGE_TYPE_NAMES
+
+# 定义公开接口
+__all__ = [
+    "MESSAGE_TYPE_CODES",
+    "MESSAGE_TYPE_NAMES"
+]
@@ -0,0 +1,73 @@
+# 客户端与服务端共享的消息类型编码表
+# 紧凑二进制格式用整数编码代替消息类型字符串；新增消息类型只能追加，不能修改已有编码
+from typing import Dict
+
+MESSAGE_TYPE_CODES: Dict[str, int] = {
+    # 请求消息
+    "authenticate": 1,
+    "get_player_data": 2,
+    "update_player_data": 3,
+    "get_recipe_list": 4,
+    "get_market_data": 5,
+    "get_quest_list": 6,
+    "accept_quest": 7,
+    "complete_quest": 8,
+    "chat_message": 9,
+    "get_leaderboard": 10,
+    "buy_item": 11,
+    "sell_item": 12,
+    "craft_dish": 13,
+    "taste_dish": 14,
+    "purchase_item": 15,
+    "upgrade_business": 16,
+    "join_chat_channel": 17,
+    "leave_chat_channel": 18,
+    "batch": 19,
+    "get_active_events": 20,
+    "trigger_random_event": 21,
+    "get_shop_items": 22,
+    "get_shop_item": 23,
+    "get_popular_items": 24,
+    "get_ingredients": 25,
+    "subscribe_market": 26,
+    "unsubscribe_market": 27,
+    
+    # 响应与推送消息
+    "error": 100,
+    "authentication_result": 101,
+    "auth_success": 102,
+    "auth_failed": 103,
+    "player_data": 104,
+    "update_result": 105,
+    "update_success": 106,
+    "recipe_list": 107,
+    "market_data": 108,
+    "quest_list": 109,
+    "quest_accepted": 110,
+    "quest_completed": 111,
+    "quest_result": 112,
+    "message_sent": 113,
+    "leaderboard": 114,
+    "item_purchased": 115,
+    "item_sold": 116,
+    "dish_crafted": 117,
+    "dish_tasted": 118,
+    "purchase_result": 119,
+    "upgrade_result": 120,
+    "chat_channel_joined": 121,
+    "chat_channel_left": 122,
+    "batch_result": 123,
+    "notification": 124,
+    "active_events": 125,
+    "random_events_triggered": 126,
+    "shop_items": 127,
+    "shop_item": 128,
+    "popular_items": 129,
+    "ingredient_list": 130,
+    "not_modified": 131,
+    "market_snapshot": 132,
+    "market_delta": 133,
+    "market_unsubscribed": 134
+}
+
+MESSAGE_TYPE_NAMES: Dict[int, str] = {code: name for name, code in MESSAGE_TYPE_CODES.items()}
@@ -5,9 +5,9 @@ from .decoration_model import DecorationModel
 from .dynamic_pricing_model import DynamicPriceModel
 from .event_model import RandomEventModel
 from .game_name_model import GameNameModel
-from .ingredient_model import IngredientModel
+from .ingredient_model import Ingredient, IngredientInventory
 from .market_model import MarketModel
-from .player_model import PlayerModel
+# player_model依赖Godot运行环境（godot、src.player_settings），不在这里导入，需要时直接导入子模块
 from .recipe_model import RecipeModel
 
 # 定义公开接口
@@ -16,8 +16,8 @@ __all__ = [
     "DynamicPriceModel",
     "RandomEventModel",
     "GameNameModel",
-    "IngredientModel",
+    "Ingredient",
+    "IngredientInventory",
     "MarketModel",
-    "PlayerModel",
     "RecipeModel"
 ]
\ No newline at end of file
@@ -0,0 +1,25 @@
+# 共享工具模块初始化文件
+
+# 导入编解码工具
+from .wire_codec import (
+    JsonCodec,
+    CompactCodec,
+    JSON_CODEC,
+    COMPACT_CODEC,
+    SUPPORTED_ENCODINGS,
+    FrameDecodeError,
+    negotiate_codec,
+    decode_frame
+)
+
+# 定义公开接口
+__all__ = [
+    "JsonCodec",
+    "CompactCodec",
+    "JSON_CODEC",
+    "COMPACT_CODEC",
+    "SUPPORTED_ENCODINGS",
+    "FrameDecodeError",
+    "negotiate_codec",
+    "decode_frame"
+]
@@ -0,0 +1,337 @@
+# 客户端与服务端共享的网络消息编解码模块
+# 支持两种格式：
+#   json    - 默认格式，文本帧
+#   compact - 紧凑二进制格式，MessagePack编码的信封数组，消息类型用整数编码，时间戳用毫秒整数
+import json
+import struct
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Union
+from shared.constants.message_types import MESSAGE_TYPE_CODES, MESSAGE_TYPE_NAMES
+
+try:
+    import msgpack  # 可选依赖，安装后使用C实现加速
+except ImportError:
+    msgpack = None
+
+# 信封中单独编码的顶层字段
+ENVELOPE_FIELDS = ("type", "request_id", "timestamp", "data")
+
+# 解码时允许的最大嵌套层数，超过时视为无效消息帧
+MAX_NESTING_DEPTH = 64
+
+class FrameDecodeError(ValueError):
+    """消息帧无法解码"""
+
+class JsonCodec:
+    """JSON编解码器"""
+
+    name = "json"
+
+    def encode(self, message: Dict[str, Any]) -> str:
+        """编码消息"""
+        return json.dumps(message)
+
+    def encode_data(self, data: Any) -> str:
+        """预先编码消息的data字段，供encode_with_data复用"""
+        return json.dumps(data)
+
+    def encode_with_data(self, message: Dict[str, Any], encoded_data: str) -> str:
+        """把预先编码的data字段拼接到消息中（message中的data字段会被忽略）"""
+        head = json.dumps({key: value for key, value in message.items() if key != "data"})
+        if head == "{}":
+            return '{"data": ' + encoded_data + '}'
+        return head[:-1] + ', "data": ' + encoded_data + '}'
+
+    def decode(self, frame: Union[str, bytes]) -> Dict[str, Any]:
+        """解码消息"""
+        try:
+            return json.loads(frame)
+        except (ValueError, RecursionError) as e:
+            raise FrameDecodeError(f"无效的JSON格式: {e}") from e
+
+class CompactCodec:
+    """
+    紧凑二进制编解码器
+    消息编码为 [类型编码, request_id, 毫秒时间戳, data, 其他顶层字段] 的MessagePack数组
+    """
+
+    name = "compact"
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        """编码消息"""
+        message_type = message.get("type")
+        extra = {key: value for key, value in message.items() if key not in ENVELOPE_FIELDS}
+        envelope = [
+            MESSAGE_TYPE_CODES.get(message_type, message_type),
+            message.get("request_id"),
+            iso_to_epoch_ms(message.get("timestamp")),
+            message.get("data"),
+            extra or None
+        ]
+        return packb(envelope)
+
+    def encode_data(self, data: Any) -> bytes:
+        """预先编码消息的data字段，供encode_with_data复用"""
+        return packb(data)
+
+    def encode_with_data(self, message: Dict[str, Any], encoded_data: bytes) -> bytes:
+        """把预先编码的data字段拼接到消息中（message中的data字段会被忽略）"""
+        message_type = message.get("type")
+        extra = {key: value for key, value in message.items() if key not in ENVELOPE_FIELDS}
+        return b"".join((
+            b"\x95",  # 5个元素的数组
+            packb(MESSAGE_TYPE_CODES.get(message_type, message_type)),
+            packb(message.get("request_id")),
+            packb(iso_to_epoch_ms(message.get("timestamp"))),
+            encoded_data,
+            packb(extra or None)
+        ))
+
+    def decode(self, frame: bytes) -> Dict[str, Any]:
+        """解码消息"""
+        try:
+            envelope = unpackb(frame)
+        except (ValueError, TypeError, IndexError, OverflowError, struct.error) as e:
+            raise FrameDecodeError(f"无效的紧凑消息帧: {e}") from e
+        if not isinstance(envelope, list) or len(envelope) != 5:
+            raise FrameDecodeError("无效的紧凑消息帧")
+
+        type_code, request_id, timestamp_ms, data, extra = envelope
+        message = dict(extra) if extra else {}
+        message["type"] = MESSAGE_TYPE_NAMES.get(type_code, type_code) if isinstance(type_code, int) else type_code
+        message["data"] = data
+        message["request_id"] = request_id
+        if timestamp_ms is not None:
+            try:
+                message["timestamp"] = epoch_ms_to_iso(timestamp_ms)
+            except (TypeError, ValueError, OverflowError, OSError) as e:
+                raise FrameDecodeError(f"无效的时间戳: {timestamp_ms}") from e
+        return message
+
+JSON_CODEC = JsonCodec()
+COMPACT_CODEC = CompactCodec()
+CODECS = {
+    JSON_CODEC.name: JSON_CODEC,
+    COMPACT_CODEC.name: COMPACT_CODEC
+}
+
+# 客户端默认声明支持的编码（按优先级排序）
+SUPPORTED_ENCODINGS = [COMPACT_CODEC.name, JSON_CODEC.name]
+
+def negotiate_codec(client_encodings: Optional[List[str]]):
+    """
+    根据客户端声明的编码列表选择编解码器
+    :param client_encodings: 客户端支持的编码（按优先级排序），为空时使用JSON
+    :return: 选中的编解码器
+    """
+    for encoding in client_encodings or ():
+        if encoding in CODECS:
+            return CODECS[encoding]
+    return JSON_CODEC
+
+def decode_frame(frame: Union[str, bytes]) -> Dict[str, Any]:
+    """根据帧类型自动选择解码器：文本帧为JSON，二进制帧为紧凑格式"""
+    if isinstance(frame, (bytes, bytearray, memoryview)):
+        return COMPACT_CODEC.decode(bytes(frame))
+    return JSON_CODEC.decode(frame)
+
+def iso_to_epoch_ms(value) -> Optional[int]:
+    """
+    ISO格式时间字符串转毫秒时间戳（UTC），无法解析时返回None
+    不带时区的时间按UTC处理，编码结果与服务器所在时区无关
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(round(moment.timestamp() * 1000))
+
+def epoch_ms_to_iso(value: int) -> str:
+    """毫秒时间戳（UTC）转不带时区的ISO格式时间字符串，与iso_to_epoch_ms互逆"""
+    return datetime.fromtimestamp(value / 1000.0, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+# ---------------------------------------------------------------------------
+# MessagePack编码（未安装msgpack时使用的纯Python实现，只支持JSON可表示的类型及bytes）
+# ---------------------------------------------------------------------------
+
+def packb(obj: Any) -> bytes:
+    """把对象编码为MessagePack字节串"""
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    buffer = bytearray()
+    _pack(obj, buffer)
+    return bytes(buffer)
+
+def unpackb(data: bytes) -> Any:
+    """把MessagePack字节串解码为对象"""
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    obj, offset = _unpack(data, 0, 0)
+    if offset != len(data):
+        raise ValueError("MessagePack数据末尾存在多余字节")
+    return obj
+
+def _pack(obj: Any, buffer: bytearray):
+    """递归编码单个对象"""
+    if obj is None:
+        buffer.append(0xc0)
+    elif obj is True:
+        buffer.append(0xc3)
+    elif obj is False:
+        buffer.append(0xc2)
+    elif isinstance(obj, int):
+        _pack_int(obj, buffer)
+    elif isinstance(obj, float):
+        buffer.append(0xcb)
+        buffer += struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        encoded = obj.encode("utf-8")
+        length = len(encoded)
+        if length < 32:
+            buffer.append(0xa0 | length)
+        elif length < 0x100:
+            buffer += struct.pack(">BB", 0xd9, length)
+        elif length < 0x10000:
+            buffer += struct.pack(">BH", 0xda, length)
+        else:
+            buffer += struct.pack(">BI", 0xdb, length)
+        buffer += encoded
+    elif isinstance(obj, (bytes, bytearray)):
+        length = len(obj)
+        if length < 0x100:
+            buffer += struct.pack(">BB", 0xc4, length)
+        elif length < 0x10000:
+            buffer += struct.pack(">BH", 0xc5, length)
+        else:
+            buffer += struct.pack(">BI", 0xc6, length)
+        buffer += obj
+    elif isinstance(obj, (list, tuple)):
+        length = len(obj)
+        if length < 16:
+            buffer.append(0x90 | length)
+        elif length < 0x10000:
+            buffer += struct.pack(">BH", 0xdc, length)
+        else:
+            buffer += struct.pack(">BI", 0xdd, length)
+        for item in obj:
+            _pack(item, buffer)
+    elif isinstance(obj, dict):
+        length = len(obj)
+        if length < 16:
+            buffer.append(0x80 | length)
+        elif length < 0x10000:
+            buffer += struct.pack(">BH", 0xde, length)
+        else:
+            buffer += struct.pack(">BI", 0xdf, length)
+        for key, value in obj.items():
+            _pack(key, buffer)
+            _pack(value, buffer)
+    else:
+        raise TypeError(f"无法编码的类型: {type(obj).__name__}")
+
+def _pack_int(value: int, buffer: bytearray):
+    """编码整数"""
+    if 0 <= value < 0x80:
+        buffer.append(value)
+    elif -32 <= value < 0:
+        buffer.append(value & 0xff)
+    elif 0 <= value < 0x100:
+        buffer += struct.pack(">BB", 0xcc, value)
+    elif 0 <= value < 0x10000:
+        buffer += struct.pack(">BH", 0xcd, value)
+    elif 0 <= value < 0x100000000:
+        buffer += struct.pack(">BI", 0xce, value)
+    elif 0 <= value < 0x10000000000000000:
+        buffer += struct.pack(">BQ", 0xcf, value)
+    elif -0x80 <= value < 0:
+        buffer += struct.pack(">Bb", 0xd0, value)
+    elif -0x8000 <= value < 0:
+        buffer += struct.pack(">Bh", 0xd1, value)
+    elif -0x80000000 <= value < 0:
+        buffer += struct.pack(">Bi", 0xd2, value)
+    elif -0x8000000000000000 <= value < 0:
+        buffer += struct.pack(">Bq", 0xd3, value)
+    else:
+        raise OverflowError("整数超出MessagePack可表示范围")
+
+# 定长格式: 类型字节 -> (struct格式, 字节数)
+_FIXED_FORMATS = {
+    0xca: (">f", 4), 0xcb: (">d", 8),
+    0xcc: (">B", 1), 0xcd: (">H", 2), 0xce: (">I", 4), 0xcf: (">Q", 8),
+    0xd0: (">b", 1), 0xd1: (">h", 2), 0xd2: (">i", 4), 0xd3: (">q", 8)
+}
+
+# 变长格式的长度字段: 类型字节 -> (struct格式, 字节数)
+_LENGTH_FORMATS = {
+    0xc4: (">B", 1), 0xc5: (">H", 2), 0xc6: (">I", 4),
+    0xd9: (">B", 1), 0xda: (">H", 2), 0xdb: (">I", 4),
+    0xdc: (">H", 2), 0xdd: (">I", 4),
+    0xde: (">H", 2), 0xdf: (">I", 4)
+}
+
+def _unpack(data: bytes, offset: int, depth: int):
+    """从offset处解码一个对象，返回 (对象, 新的offset)，depth为当前嵌套层数"""
+    byte = data[offset]
+    offset += 1
+
+    if byte < 0x80:
+        return byte, offset
+    if byte >= 0xe0:
+        return byte - 0x100, offset
+    if 0xa0 <= byte <= 0xbf:
+        length = byte & 0x1f
+        return data[offset:offset + length].decode("utf-8"), offset + length
+    if 0x90 <= byte <= 0x9f:
+        return _unpack_array(data, offset, byte & 0x0f, depth)
+    if 0x80 <= byte <= 0x8f:
+        return _unpack_map(data, offset, byte & 0x0f, depth)
+    if byte == 0xc0:
+        return None, offset
+    if byte == 0xc2:
+        return False, offset
+    if byte == 0xc3:
+        return True, offset
+    if byte in _FIXED_FORMATS:
+        fmt, size = _FIXED_FORMATS[byte]
+        return struct.unpack_from(fmt, data, offset)[0], offset + size
+    if byte in _LENGTH_FORMATS:
+        fmt, size = _LENGTH_FORMATS[byte]
+        length = struct.unpack_from(fmt, data, offset)[0]
+        offset += size
+        if byte in (0xc4, 0xc5, 0xc6):
+            return bytes(data[offset:offset + length]), offset + length
+        if byte in (0xd9, 0xda, 0xdb):
+            return data[offset:offset + length].decode("utf-8"), offset + length
+        if byte in (0xdc, 0xdd):
+            return _unpack_array(data, offset, length, depth)
+        return _unpack_map(data, offset, length, depth)
+    raise ValueError(f"不支持的MessagePack类型字节: 0x{byte:02x}")
+
+def _check_depth(depth: int):
+    if depth >= MAX_NESTING_DEPTH:
+        raise ValueError(f"嵌套层数超过{MAX_NESTING_DEPTH}")
+
+def _unpack_array(data: bytes, offset: int, length: int, depth: int):
+    """解码数组"""
+    _check_depth(depth)
+    items = []
+    for _ in range(length):
+        item, offset = _unpack(data, offset, depth + 1)
+        items.append(item)
+    return items, offset
+
+def _unpack_map(data: bytes, offset: int, length: int, depth: int):
+    """解码映射"""
+    _check_depth(depth)
+    result = {}
+    for _ in range(length):
+        key, offset = _unpack(data, offset, depth + 1)
+        value, offset = _unpack(data, offset, depth + 1)
+        result[key] = value
+    return result, offset